@@ -1,16 +1,33 @@
 # app.py
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import time
+import asyncio
+import hashlib
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from typing import Optional, List, Literal, Tuple
 
 from models import (
-    ConvertResult, JiraCreateResponse,
+    ConvertResult, SplitConvertResult, JiraCreateResponse,
     BulkConvertRequest, BulkConvertResult,
-    JiraField, Health, JiraStory
+    BulkJiraCreateRequest, BulkJiraCreateItem, BulkJiraCreateResponse,
+    JiraField, Health, JiraStory, JobStatus, HistoryItem, HistoryEntry, HistoryPage
 )
-from config import get_settings
-from parsers import extract_text, parse_text, decode_base64
+from config import get_settings, ocr_options
+from parsers import (
+    parse_text, parse_stories, extract_parse_file, structure_hints,
+    ExtractionCache, cache_key, warm_up, shutdown_ocr,
+)
+from utils.text import clamp_text
 import jira_client
+import bulk
+import executors
+import metrics
+import jobs
+import idempotency
+import history
+import responses
+from uploads import UploadLimitMiddleware, spooled_upload, spool_to_path, mapped
 
 
 S = get_settings()
@@ -22,6 +39,19 @@ app = FastAPI(
     swagger_ui_parameters={"defaultModelsExpandDepth": -1},
 )
 
+extract_cache = (
+    ExtractionCache(S.EXTRACT_CACHE_MAX_BYTES, S.EXTRACT_CACHE_DB or None,
+                    S.EXTRACT_CACHE_DB_MAX_BYTES, S.EXTRACT_CACHE_TTL)
+    if S.EXTRACT_CACHE_ENABLED else None
+)
+idem = idempotency.IdempotencyStore(S.IDEMPOTENCY_DB, S.IDEMPOTENCY_TTL)
+# on disk only: an in-memory history would grow with every conversion, per worker, and die with it
+hist = history.HistoryStore(S.HISTORY_DB, S.HISTORY_TTL) if S.HISTORY_DB else None
+job_runner = jobs.JobRunner(
+    jobs.make_store(S.JOB_STORE_DB), S.JOB_WORKERS, S.JOB_TTL, S.JOB_QUEUE_MAX, S.WARM_UP,
+    S.BUSY_RETRY_AFTER,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,6 +59,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    UploadLimitMiddleware, max_bytes=S.MAX_UPLOAD_BYTES,
+    paths=["/convert", "/convert/split", "/jira/create", "/jira/create/split", "/jobs/convert", "/jobs/jira/create"],
+)
+app.add_middleware(
+    responses.CompressionMiddleware, min_bytes=S.COMPRESS_MIN_BYTES,
+    gzip_level=S.GZIP_LEVEL, zstd_level=S.ZSTD_LEVEL,
+)
 
 # ------------  ------------
 def _clean_csv(s: Optional[str]) -> List[str]:
@@ -47,11 +85,145 @@ def _clean_cf_id(s: Optional[str]) -> Optional[str]:
         return None
     return v
 
+def _customfields(story_points_cf: Optional[str], epic_link_cf: Optional[str],
+                  epic_name_cf: Optional[str]) -> dict:
+    return {
+        "story_points": _clean_cf_id(story_points_cf) or "",
+        "epic_link":   _clean_cf_id(epic_link_cf) or "",
+        "epic_name":   _clean_cf_id(epic_name_cf) or "",
+    }
+
+async def _run_timed(request: Optional[Request], timings: dict, stage: str, fn, *args, pool=None, **kwargs):
+    # fn runs (and is timed) in the pool; time spent waiting for a worker is `<stage>_queue`
+    t0 = time.perf_counter()
+    result, wall, cpu = await executors.run_cpu(request, metrics.timed_call, fn, *args, pool=pool, **kwargs)
+    metrics.record(timings, stage, wall, cpu)
+    metrics.record(timings, f"{stage}_queue", max(0.0, time.perf_counter() - t0 - wall))
+    return result
+
+def _extract_opts() -> dict:
+    # extraction runs in a pool worker (cpu_pool or the job runner's), so OCR stays serial there
+    # like in bulk; 0 would mean os.cpu_count() tesseract processes per pool worker
+    return dict(
+        enable_html=S.ENABLE_HTML, html_engine=S.HTML_EXTRACTOR, max_pages=S.MAX_PAGES,
+        enable_ocr=S.ENABLE_OCR, ocr_lang=S.OCR_LANG,
+        ocr_workers=max(1, S.OCR_WORKERS), ocr_window=S.OCR_WINDOW,
+        ocr_min_chars=S.OCR_MIN_PAGE_CHARS, ocr_max_pages=S.OCR_MAX_PAGES,
+        ocr_opts=ocr_options(S),
+    )
+
+def _parse_options(filename: str, **extra) -> dict:
+    return {"priority_map": {}, "max_chars": S.MAX_TEXT_CHARS, "ac_near_duplicates": S.AC_NEAR_DUPLICATES,
+            "structure_hints": structure_hints(filename), **extra}
+
+def _check_split(stories: list) -> list:
+    if len(stories) > S.SPLIT_MAX_STORIES:
+        raise HTTPException(status_code=422,
+                            detail=f"Document splits into {len(stories)} stories; the limit is {S.SPLIT_MAX_STORIES}")
+    return stories
+
+async def _extract_parse(request: Optional[Request], filename: str, b, path: str, timings: dict,
+                         project_key: str, labels: List[str], comps: List[str],
+                         need_raw: bool, heading_level: Optional[int] = None, split: bool = False,
+                         pool=None, progress=None):
+    """
+    Extract and parse (parse_stories() with `split`), as (raw, parsed, extract_diag); raw is
+    None unless `need_raw`. A cache hit is parsed as is; otherwise the worker feeds extracted
+    pages straight into the parser, keeping the chunks only when the text is needed for the
+    response or the cache.
+    """
+    # hashing + cache I/O on a thread, extraction on the process pool; never on the loop
+    opts = _extract_opts()
+    level = S.SPLIT_HEADING_LEVEL if heading_level is None else heading_level
+    options = _parse_options(filename, split_heading_level=level) if split else _parse_options(filename)
+    parse = parse_stories if split else parse_text
+    key = None
+    if extract_cache is not None:
+        def lookup():
+            key = cache_key(filename, b, **opts)
+            return (key,) + extract_cache.get(key)
+
+        t0 = time.perf_counter()
+        key, text, tier = await asyncio.to_thread(lookup)
+        metrics.record(timings, "cache_lookup", time.perf_counter() - t0)
+        if text is not None:
+            parsed = await _run_timed(request, timings, "parse", parse, text, project_key, labels, comps,
+                                      pool=pool, options=options)
+            return (text if need_raw else None), (_check_split(parsed) if split else parsed), \
+                extract_cache.report(key, tier, len(b))
+    parsed, info, text = await _run_timed(
+        request, timings, "extract_parse", extract_parse_file, filename, path, parse, project_key, labels, comps,
+        pool=pool, progress=progress, options=options, keep_text=need_raw or key is not None, **opts,
+    )
+    metrics.EXTRACTIONS.inc(info.get("extractor", "unknown"), "true" if info.get("ocr") else "false")
+    diag = {"extract": info}
+    if key is not None:
+        await asyncio.to_thread(extract_cache.store, key, text, len(b), info)
+        diag.update(extract_cache.report(key, None, len(b)))
+    return (text if need_raw else None), (_check_split(parsed) if split else parsed), diag
+
+async def _create_once(idempotency_key: Optional[str], story_dict: dict, customfields: dict,
+                       timings: dict) -> Tuple[dict, bool]:
+    """create_issue() at most once per Idempotency-Key + payload; returns (created, replayed)."""
+    # not tied to the client connection: once started, a create runs to completion
+    create = lambda: executors.run_io(None, jira_client.create_issue, story_dict,
+                                      customfields=customfields, timings=timings)
+    if not idempotency_key:
+        return await create(), False
+    h = await asyncio.to_thread(jira_client.payload_hash, story_dict, customfields)
+    return await idem.arun(idempotency_key, h, create)
+
+def _shape_raw(raw: str, mode: str) -> Optional[str]:
+    if mode == "none":
+        return None
+    if mode == "truncated":
+        return clamp_text(raw, S.RAW_TEXT_TRUNCATE_CHARS)
+    return raw
+
+# ---------------- Conversion history ----------------
+async def _digest(b) -> Optional[str]:
+    # SHA-256 of the upload, for the history; off the loop like the cache key
+    return await asyncio.to_thread(lambda: hashlib.sha256(b).hexdigest()) if hist is not None else None
+
+def _entry(source: str, filename: Optional[str], digest: Optional[str], story: dict, diag: Optional[dict],
+           key: Optional[str] = None, self_url: Optional[str] = None) -> dict:
+    return {"source": source, "filename": filename, "content_hash": digest, "story": story,
+            "diagnostics": diag, "jira_key": key, "jira_self": self_url}
+
+def _remember(entries: List[dict]) -> None:
+    """Add conversions to the history; a failed write is logged, never raised to the client."""
+    if hist is None or not entries:
+        return
+    try:
+        hist.record(entries)
+    except Exception:
+        history.log.exception("could not record %d conversion(s)", len(entries))
+
+async def _aremember(entries: List[dict]) -> None:
+    await asyncio.to_thread(_remember, entries)
+
+@app.on_event("startup")
+async def _startup():
+    if S.WARM_UP:
+        warm_up()
+    await job_runner.start()
+
+@app.on_event("shutdown")
+async def _shutdown_pools():
+    await job_runner.stop(S.JOB_DRAIN_SECONDS)
+    executors.shutdown()
+    bulk.shutdown()
+    shutdown_ocr()
+
 # ---------------- Health  ----------------
 @app.get("/health", response_model=Health)
 def health():
     return Health(status="ok")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ---------------- Jira helpers ----------------
 @app.get("/jira/fields", response_model=List[JiraField])
 def jira_fields():
@@ -68,32 +240,89 @@ def jira_issue_types(project_key: str):
     except Exception as e:
         raise HTTPException(500, str(e))
 
+@app.get("/jira/cache/stats")
+def jira_cache_stats():
+    return jira_client.meta_cache_stats()
+
+@app.post("/jira/cache/invalidate")
+def jira_cache_invalidate(namespace: Optional[str] = None, key: Optional[str] = None):
+    # namespace: fields | issue_types | users; omit both to clear everything
+    return {"removed": jira_client.invalidate_meta_cache(namespace, key)}
+
 # ---------------- Convert ----------------
 @app.post("/convert", response_model=ConvertResult)
 async def convert(
+    request: Request,
     file: UploadFile = File(...),
     project_key: str = Form(...),
     default_labels: Optional[str] = Form(None),
     default_components: Optional[str] = Form(None),
+    raw_text: Literal["full", "truncated", "none"] = Form("full"),
+    fields: Optional[str] = Form(None, description="comma-separated subset of story,raw_text,diagnostics"),
 ):
-    b = await file.read()
-    raw = extract_text(
-        file.filename, b,
-        enable_html=S.ENABLE_HTML, max_pages=S.MAX_PAGES,
-        enable_ocr=S.ENABLE_OCR, ocr_lang=S.OCR_LANG,
-    )
+    include = responses.parse_fields(fields)
+    if not responses.wants_raw(include):
+        raw_text = "none"
+    labels = _clean_csv(default_labels)
+    comps  = _clean_csv(default_components)
+    timings: dict = {}
+    t0 = time.perf_counter()
+
+    with executors.admission():
+        async with spooled_upload(file, S.MAX_UPLOAD_BYTES) as (b, path):
+            metrics.record(timings, "upload_read", time.perf_counter() - t0)
+            raw, (story_dict, diag), extract_diag = await _extract_parse(
+                request, file.filename, b, path, timings, project_key, labels, comps, raw_text != "none")
+            digest = await _digest(b)
+    diag.update(extract_diag)
+    metrics.record(timings, "total", time.perf_counter() - t0)
+    diag["timings"] = timings
+    await _aremember([_entry("convert", file.filename, digest, story_dict, diag)])
+    if S.TRACE_LOG:
+        metrics.trace("/convert", timings, filename=file.filename, **extract_diag.get("extract", {}))
+    result = ConvertResult(story=JiraStory(**story_dict), raw_text=_shape_raw(raw, raw_text), diagnostics=diag)
+    return responses.json_response(result, include)
+
+@app.post("/convert/split", response_model=SplitConvertResult)
+async def convert_split(
+    request: Request,
+    file: UploadFile = File(...),
+    project_key: str = Form(...),
+    default_labels: Optional[str] = Form(None),
+    default_components: Optional[str] = Form(None),
+    raw_text: Literal["full", "truncated", "none"] = Form("none"),
+    split_heading_level: Optional[int] = Form(None),   # default SPLIT_HEADING_LEVEL; 0 -> Title: lines only
+):
+    """One extraction, one pass: a story per Title:/Summary: line or top-level heading (see parse_stories)."""
     labels = _clean_csv(default_labels)
     comps  = _clean_csv(default_components)
+    timings: dict = {}
+    t0 = time.perf_counter()
 
-    story_dict, diag = parse_text(
-        raw, project_key, labels, comps,
-        options={"priority_map": {}, "max_chars": S.MAX_TEXT_CHARS},
+    with executors.admission():
+        async with spooled_upload(file, S.MAX_UPLOAD_BYTES) as (b, path):
+            metrics.record(timings, "upload_read", time.perf_counter() - t0)
+            raw, stories, extract_diag = await _extract_parse(
+                request, file.filename, b, path, timings, project_key, labels, comps, raw_text != "none",
+                split_heading_level, split=True)
+            digest = await _digest(b)
+    metrics.record(timings, "total", time.perf_counter() - t0)
+    await _aremember([_entry("convert_split", file.filename, digest, st, d) for st, d in stories])
+    if S.TRACE_LOG:
+        metrics.trace("/convert/split", timings, filename=file.filename, stories=len(stories),
+                      **extract_diag.get("extract", {}))
+    result = SplitConvertResult(
+        stories=[ConvertResult(story=JiraStory(**st), diagnostics=d) for st, d in stories],
+        raw_text=_shape_raw(raw, raw_text),
+        diagnostics={**extract_diag, "stories": len(stories), "timings": timings},
     )
-    return ConvertResult(story=JiraStory(**story_dict), raw_text=raw, diagnostics=diag)
+    return responses.json_response(result)
 
 # ---------------- Convert + Create in Jira ----------------
 @app.post("/jira/create", response_model=JiraCreateResponse)
 async def jira_create(
+    request: Request,
+    response: Response,
     file: UploadFile = File(...),
     project_key: str = Form(...),
     default_labels: Optional[str] = Form(None),
@@ -102,54 +331,334 @@ async def jira_create(
     epic_link_cf: Optional[str] = Form(None),      # e.g. customfield_10014
     issuetype_name: str = Form(get_settings().DEFAULT_ISSUETYPE),
     epic_name_cf: Optional[str] = Form(None),      # only for Epic 
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER),
 ):
-    b = await file.read()
-    raw = extract_text(
-        file.filename, b,
-        enable_html=S.ENABLE_HTML, max_pages=S.MAX_PAGES,
-        enable_ocr=S.ENABLE_OCR, ocr_lang=S.OCR_LANG,
-    )
     labels = _clean_csv(default_labels)
     comps  = _clean_csv(default_components)
 
-    story_dict, _ = parse_text(
-        raw, project_key, labels, comps,
-        options={"priority_map": {}, "max_chars": S.MAX_TEXT_CHARS},
-    )
+    timings: dict = {}
+    t0 = time.perf_counter()
+
+    with executors.admission():
+        async with spooled_upload(file, S.MAX_UPLOAD_BYTES) as (b, path):
+            metrics.record(timings, "upload_read", time.perf_counter() - t0)
+            _, (story_dict, _), extract_diag = await _extract_parse(
+                request, file.filename, b, path, timings, project_key, labels, comps, False)
+            digest = await _digest(b)
     story_dict["issuetype_name"] = issuetype_name
 
     try:
-        created = jira_client.create_issue(
-            story_dict,
-            customfields={
-                "story_points": _clean_cf_id(story_points_cf) or "",
-                "epic_link":   _clean_cf_id(epic_link_cf) or "",
-                "epic_name":   _clean_cf_id(epic_name_cf) or "",
-            },
+        created, replayed = await _create_once(
+            idempotency_key, story_dict,
+            _customfields(story_points_cf, epic_link_cf, epic_name_cf), timings,
         )
-        return JiraCreateResponse(key=created["key"], self_url=created["self"], story=JiraStory(**story_dict))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if replayed:
+        response.headers[idempotency.REPLAYED_HEADER] = "true"
+        extract_diag["idempotent_replay"] = True
+    if created.get("description_overflow"):
+        extract_diag["description_overflow"] = created["description_overflow"]
+
+    metrics.record(timings, "total", time.perf_counter() - t0)
+    diagnostics = {**extract_diag, "timings": timings}
+    await _aremember([_entry("jira_create", file.filename, digest, story_dict, diagnostics,
+                             created["key"], created["self"])])
+    if S.TRACE_LOG:
+        metrics.trace("/jira/create", timings, filename=file.filename, key=created["key"],
+                      **extract_diag.get("extract", {}))
+    return JiraCreateResponse(
+        key=created["key"], self_url=created["self"], story=JiraStory(**story_dict),
+        diagnostics=diagnostics,
+    )
+
+# ---------------- Bulk convert + create in Jira ----------------
+@app.post("/jira/create/bulk", response_model=BulkJiraCreateResponse)
+def jira_create_bulk(
+    payload: BulkJiraCreateRequest,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER),
+):
+    labels = [x for x in payload.default_labels if _clean_cf_id(x)]
+    comps  = [x for x in payload.default_components if _clean_cf_id(x)]
+    converted = bulk.convert_many(payload, labels, comps)
+
+    items = [BulkJiraCreateItem(index=c["index"], filename=c["filename"], error=c["error"]) for c in converted]
+    ok = [c for c in converted if c["error"] is None]
+    stories = []
+    for c in ok:
+        story_dict = c["result"]["story"]
+        story_dict["issuetype_name"] = _clean_cf_id(payload.issuetype_name) or S.DEFAULT_ISSUETYPE
+        items[c["index"]].story = JiraStory(**story_dict)
+        stories.append(story_dict)
+
+    customfields = _customfields(payload.story_points_cf, payload.epic_link_cf, payload.epic_name_cf)
+    result = _create_many(items, [(c["index"], st) for c, st in zip(ok, stories)], customfields, idempotency_key)
+    _remember([_entry("jira_create_bulk", c["filename"], c["content_hash"], st, c["result"]["diagnostics"],
+                      items[c["index"]].key, items[c["index"]].self_url) for c, st in zip(ok, stories)])
+    return result
+
+def _create_many(items: List[BulkJiraCreateItem], entries: List[Tuple[int, dict]], customfields: dict,
+                 idempotency_key: Optional[str], timings: Optional[dict] = None) -> BulkJiraCreateResponse:
+    """Bulk-create (index, story_dict) entries, filling in items[index]."""
+    claims = {}
+    if idempotency_key:
+        # one entry per item: "<key>:<index>" + that item's payload hash
+        for i, story_dict in entries:
+            h = jira_client.payload_hash(story_dict, customfields)
+            claims[i] = idem.begin(f"{idempotency_key}:{i}", h)
+    todo = [(i, st) for i, st in entries if i not in claims or claims[i].owner]
+
+    try:
+        created = jira_client.create_issues_bulk([st for _, st in todo], customfields=customfields,
+                                                 timings=timings)
+    except BaseException as e:
+        for i, _ in todo:
+            if i in claims:
+                idem.fail(claims[i], e)
+        raise
+    for (i, _), res in zip(todo, created):
+        it = items[i]
+        it.key, it.self_url, it.error = res["key"], res["self"], res["error"]
+        if res.get("description_overflow"):
+            it.diagnostics = {**(it.diagnostics or {}), "description_overflow": res["description_overflow"]}
+        claim = claims.get(i)
+        if claim is not None:
+            if res["error"]:
+                idem.fail(claim, RuntimeError(res["error"]))
+            else:
+                idem.finish(claim, {"key": res["key"], "self": res["self"]})
+
+    # repeats: stored results, or the outcome of a concurrent request with the same key
+    for i, claim in claims.items():
+        if claim.owner:
+            continue
+        it = items[i]
+        try:
+            prev = claim.value if claim.replay else claim.future.result()
+            it.key, it.self_url, it.replayed = prev["key"], prev["self"], True
+        except Exception as e:
+            it.error = str(e)
+
+    n_ok = sum(1 for it in items if it.key)
+    return BulkJiraCreateResponse(created=n_ok, failed=len(items) - n_ok, items=items)
+
+@app.post("/jira/create/split", response_model=BulkJiraCreateResponse)
+async def jira_create_split(
+    request: Request,
+    file: UploadFile = File(...),
+    project_key: str = Form(...),
+    default_labels: Optional[str] = Form(None),
+    default_components: Optional[str] = Form(None),
+    story_points_cf: Optional[str] = Form(None),
+    epic_link_cf: Optional[str] = Form(None),
+    issuetype_name: str = Form(get_settings().DEFAULT_ISSUETYPE),
+    epic_name_cf: Optional[str] = Form(None),
+    split_heading_level: Optional[int] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER),
+):
+    """/convert/split, then every story through the Jira bulk API; Idempotency-Key is per story, as in bulk."""
+    labels = _clean_csv(default_labels)
+    comps  = _clean_csv(default_components)
+    timings: dict = {}
+    t0 = time.perf_counter()
+
+    with executors.admission():
+        async with spooled_upload(file, S.MAX_UPLOAD_BYTES) as (b, path):
+            metrics.record(timings, "upload_read", time.perf_counter() - t0)
+            _, stories, extract_diag = await _extract_parse(
+                request, file.filename, b, path, timings, project_key, labels, comps, False,
+                split_heading_level, split=True)
+            digest = await _digest(b)
+
+    items, entries = [], []
+    for i, (story_dict, diag) in enumerate(stories):
+        story_dict["issuetype_name"] = issuetype_name
+        items.append(BulkJiraCreateItem(index=i, filename=file.filename, story=JiraStory(**story_dict),
+                                        diagnostics=diag))
+        entries.append((i, story_dict))
+    customfields = _customfields(story_points_cf, epic_link_cf, epic_name_cf)
+    # like _create_once: not tied to the client connection once started
+    t1 = time.perf_counter()
+    result = await executors.run_io(None, _create_many, items, entries, customfields, idempotency_key, timings)
+    metrics.record(timings, "jira_bulk", time.perf_counter() - t1)
+    metrics.record(timings, "total", time.perf_counter() - t0)
+    await _aremember([_entry("jira_create_split", file.filename, digest, st, d, it.key, it.self_url)
+                      for (st, d), it in zip(stories, items)])
+    if S.TRACE_LOG:
+        metrics.trace("/jira/create/split", timings, filename=file.filename, stories=len(stories),
+                      created=result.created, **extract_diag.get("extract", {}))
+    return result
 
 # ---------------- Bulk convert  ----------------
 @app.post("/bulk/convert", response_model=BulkConvertResult)
 def bulk_convert(payload: BulkConvertRequest):
+    # same pool as the streaming variant, but all-or-nothing like before
     items = []
-    for i, name in enumerate(payload.filenames):
-        if payload.mode == "base64":
-            b = decode_base64(payload.files[i])
-        else:
-            with open(payload.files[i], "rb") as fh:
-                b = fh.read()
-
-        raw = extract_text(
-            name, b,
-            enable_html=S.ENABLE_HTML, max_pages=S.MAX_PAGES,
-            enable_ocr=S.ENABLE_OCR, ocr_lang=S.OCR_LANG,
-        )
-        story_dict, diag = parse_text(
-            raw, payload.project_key, [], [],
-            options={"priority_map": {}, "max_chars": S.MAX_TEXT_CHARS},
-        )
-        items.append(ConvertResult(story=JiraStory(**story_dict), raw_text=raw, diagnostics=diag))
-    return BulkConvertResult(items=items)
+    converted = bulk.convert_many(payload)
+    for c in converted:
+        if c["error"]:
+            raise HTTPException(status_code=500, detail=f"{c['filename']}: {c['error']}")
+        items.append(ConvertResult(**c["result"]))
+    _remember([_entry("bulk_convert", c["filename"], c["content_hash"], c["result"]["story"],
+                      c["result"]["diagnostics"]) for c in converted])
+    include = {"items": {"__all__": set(payload.fields)}} if payload.fields else None
+    return responses.json_response(BulkConvertResult(items=items), include)
+
+@app.post("/bulk/convert/stream")
+async def bulk_convert_stream(payload: BulkConvertRequest):
+    # NDJSON, one BulkConvertItem per line as each file finishes (see bulk.py)
+    async def remember(item: dict) -> None:
+        if item["error"] is None:
+            r = item["result"]
+            await _aremember([_entry("bulk_convert", item["filename"], item["content_hash"],
+                                     r["story"], r["diagnostics"])])
+
+    return StreamingResponse(bulk.stream_bulk_convert(payload, remember), media_type="application/x-ndjson")
+
+# ---------------- Background jobs ----------------
+async def _job_story(params: dict, path: str, ctx: jobs.JobContext, timings: dict, need_raw: bool):
+    ctx.stage("extract")
+    with mapped(path) as b:
+        raw, (story_dict, diag), extract_diag = await _extract_parse(
+            None, params["filename"], b, path, timings, params["project_key"], params["labels"],
+            params["components"], need_raw, pool=ctx.pool, progress=ctx.progress)
+        digest = await _digest(b)
+    return raw, story_dict, diag, extract_diag, digest
+
+@job_runner.handler("convert")
+async def _convert_job(params: dict, path: str, ctx: jobs.JobContext) -> dict:
+    timings: dict = {}
+    t0 = time.perf_counter()
+    include = set(params["fields"]) if params.get("fields") else None
+    raw_mode = params["raw_text"] if responses.wants_raw(include) else "none"
+    raw, story_dict, diag, extract_diag, digest = await _job_story(params, path, ctx, timings, raw_mode != "none")
+    diag.update(extract_diag)
+    metrics.record(timings, "total", time.perf_counter() - t0)
+    diag["timings"] = timings
+    await _aremember([_entry("job_convert", params["filename"], digest, story_dict, diag)])
+    result = ConvertResult(story=JiraStory(**story_dict), raw_text=_shape_raw(raw, raw_mode), diagnostics=diag)
+    return result.model_dump(mode="json", include=include)
+
+@job_runner.handler("jira_create")
+async def _jira_create_job(params: dict, path: str, ctx: jobs.JobContext) -> dict:
+    timings: dict = {}
+    t0 = time.perf_counter()
+    _, story_dict, _, extract_diag, digest = await _job_story(params, path, ctx, timings, False)
+    story_dict["issuetype_name"] = params["issuetype_name"]
+    ctx.stage("jira")
+    created, replayed = await _create_once(params["idempotency_key"], story_dict, params["customfields"], timings)
+    if replayed:
+        extract_diag["idempotent_replay"] = True
+    if created.get("description_overflow"):
+        extract_diag["description_overflow"] = created["description_overflow"]
+    metrics.record(timings, "total", time.perf_counter() - t0)
+    result = JiraCreateResponse(
+        key=created["key"], self_url=created["self"], story=JiraStory(**story_dict),
+        diagnostics={**extract_diag, "timings": timings},
+    )
+    await _aremember([_entry("job_jira_create", params["filename"], digest, story_dict, result.diagnostics,
+                             created["key"], created["self"])])
+    return result.model_dump(mode="json")
+
+def _accepted(job: dict, response: Response) -> JobStatus:
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return JobStatus(**job)
+
+@app.post("/jobs/convert", response_model=JobStatus, status_code=202)
+async def submit_convert_job(
+    response: Response,
+    file: UploadFile = File(...),
+    project_key: str = Form(...),
+    default_labels: Optional[str] = Form(None),
+    default_components: Optional[str] = Form(None),
+    raw_text: Literal["full", "truncated", "none"] = Form("full"),
+    fields: Optional[str] = Form(None, description="comma-separated subset of story,raw_text,diagnostics"),
+    lane: Literal["interactive", "bulk"] = Form("interactive"),
+):
+    include = responses.parse_fields(fields)
+    path = await spool_to_path(file, S.MAX_UPLOAD_BYTES)
+    job = job_runner.submit("convert", lane, {
+        "filename": file.filename, "project_key": project_key, "raw_text": raw_text,
+        "fields": sorted(include) if include else None,
+        "labels": _clean_csv(default_labels), "components": _clean_csv(default_components),
+    }, path, file.filename)
+    return _accepted(job, response)
+
+@app.post("/jobs/jira/create", response_model=JobStatus, status_code=202)
+async def submit_jira_create_job(
+    response: Response,
+    file: UploadFile = File(...),
+    project_key: str = Form(...),
+    default_labels: Optional[str] = Form(None),
+    default_components: Optional[str] = Form(None),
+    story_points_cf: Optional[str] = Form(None),
+    epic_link_cf: Optional[str] = Form(None),
+    issuetype_name: str = Form(get_settings().DEFAULT_ISSUETYPE),
+    epic_name_cf: Optional[str] = Form(None),
+    lane: Literal["interactive", "bulk"] = Form("interactive"),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER),
+):
+    path = await spool_to_path(file, S.MAX_UPLOAD_BYTES)
+    job = job_runner.submit("jira_create", lane, {
+        "filename": file.filename, "project_key": project_key, "issuetype_name": issuetype_name,
+        "labels": _clean_csv(default_labels), "components": _clean_csv(default_components),
+        "customfields": _customfields(story_points_cf, epic_link_cf, epic_name_cf),
+        "idempotency_key": idempotency_key,
+    }, path, file.filename)
+    return _accepted(job, response)
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def job_status(job_id: str):
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return JobStatus(**job)
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    """ConvertResult or JiraCreateResponse once done; 202 + status while pending; the job's error if it failed."""
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error_status"] or 500, detail=job["error"])
+    if job["status"] != "done":
+        return JSONResponse(JobStatus(**job).model_dump(mode="json"), status_code=202,
+                            headers={"Retry-After": str(S.BUSY_RETRY_AFTER)})
+    return responses.FastJSONResponse(job["result"])
+
+# ---------------- Conversion history ----------------
+def _history_store() -> history.HistoryStore:
+    if hist is None:
+        raise HTTPException(status_code=404, detail="Conversion history is off (set HISTORY_DB)")
+    return hist
+
+@app.get("/history", response_model=HistoryPage)
+def history_list(
+    project_key: Optional[str] = None,
+    label: Optional[str] = None,
+    epic: Optional[str] = None,
+    jira_key: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+):
+    """
+    Stored conversions, newest first; filters combine. `q`: words (or word*
+    prefixes) in summary/description/acceptance criteria. `jira_key=TD-1234`
+    finds the file that produced an issue. Pages via `cursor` = `next_cursor`.
+    """
+    try:
+        items, nxt = _history_store().search(project_key, label, epic, jira_key, content_hash, q,
+                                             min(limit, history.MAX_PAGE), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return HistoryPage(items=[HistoryItem(**it) for it in items], next_cursor=nxt)
+
+@app.get("/history/{conversion_id}", response_model=HistoryEntry)
+def history_get(conversion_id: int):
+    entry = _history_store().get(conversion_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown conversion")
+    return HistoryEntry(**entry)
@@ -0,0 +1,140 @@
+# bench/ac_bench.py
+"""
+normalize_ac: equivalence with the original two-pass version + lines/sec on big AC blocks.
+
+    python -m bench.ac_bench --lines 100000 --blocks 20000
+
+- exact mode must give the original's items for edge cases ("Given:",
+  "Given -", "andrew", unicode, blank and whitespace-only lines) and for
+  `--blocks` random small blocks
+- timing on `--lines`-line blocks with few, some and no repeated steps
+- how many more items near-duplicate mode drops on a copy-pasted block
+
+Exits non-zero on any mismatch.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from utils.ac_rules import GWT_LINE, normalize_ac
+
+
+def reference_normalize_ac(lines):
+    # normalize_ac as it was before the one-pass rewrite, kept as the oracle
+    out, cur = [], []
+    for ln in lines:
+        t = ln.strip()
+        if not t:
+            if cur:
+                out.append(" ".join(cur))
+                cur = []
+            continue
+        m = GWT_LINE.match(t)
+        if m:
+            role = m.group(1).title()
+            rest = m.group(2).strip()
+            cur.append(f"{role}: {rest}")
+        else:
+            cur.append(t)
+    if cur:
+        out.append(" ".join(cur))
+    seen, final = set(), []
+    for x in out:
+        k = x.lower()
+        if len(k) > 3 and k not in seen:
+            final.append(x)
+            seen.add(k)
+    return final
+
+
+EDGE_CASES = [
+    [], [""], ["   ", "\t", ""], ["Given:"], ["Given -"], ["Given - "], ["given:", "x"], ["Given", "x"],
+    ["andrew logs in"], ["AND then"], ["Then:: -  done"], ["WHEN clicked"], ["gİven x", "gıven y"],
+    ["Ünïcödé step", "ünïcödé STEP"], ["abc", "abcd", "ABCD"], ["a\nGiven b", "", "Given b"],
+    ["Given a", "", "", "  ", "given A", "When b"], [" Given x "], ["Given x\r", "And y"],
+    ["Then x\x1c"], ["- Given x", "* when y"],
+]
+_STEPS = ["Given", "given:", "GIVEN -", "When", "then", "And", "andrew", "and", "*", "-", "Thenx", ""]
+_WORDS = ["user", "logs in", "Ünïcödé", "the cart", "CSV", "is shown", "", " ", "\t", ":", "-", ".", "x"]
+
+
+def random_block(rng: random.Random) -> list:
+    pool = [" ".join(rng.choice(_STEPS + _WORDS) for _ in range(rng.randint(0, 4)))
+            for _ in range(rng.randint(1, 8))]
+    return [rng.choice(pool) for _ in range(rng.randint(0, 16))]
+
+
+def big_block(rng: random.Random, n: int, distinct: int) -> list:
+    # Given/When/Then scenarios of four steps drawn from `distinct` step texts
+    out = []
+    for i in range(n):
+        if i % 5 == 4:
+            out.append("")
+        else:
+            role = ("Given", "When", "Then", "And")[i % 5]
+            out.append(f"  {role} step {rng.randrange(distinct)} happens ")
+    return out
+
+
+def pasted_block(rng: random.Random, n: int) -> list:
+    # scenarios copy-pasted with spacing and punctuation drift
+    out = []
+    for i in range(0, n, 3):
+        s = rng.randrange(n // 30 or 1)
+        given = rng.choice(["Given a user, with role {}", "Given  a user with role {}.", "given a user with role {} "])
+        then = rng.choice(["Then the export works", "Then: the export works!", "then the export - works"])
+        out += [given.format(s), then, ""]
+    return out[:n]
+
+
+def _lines_per_sec(fn, block, reps=5) -> float:
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn(block)
+        best = min(best, time.perf_counter() - t0)
+    return len(block) / best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=100000, help="lines in each timing block")
+    ap.add_argument("--blocks", type=int, default=20000, help="random blocks for the equivalence check")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for block in EDGE_CASES + [random_block(rng) for _ in range(args.blocks)]:
+        if normalize_ac(block) != reference_normalize_ac(block):
+            mismatches += 1
+            print(f"mismatch: {block!r}", file=sys.stderr)
+
+    timing = {}
+    for name, distinct in (("repeated", 50), ("mixed", args.lines // 30), ("distinct", 10**9)):
+        block = big_block(rng, args.lines, distinct)
+        if normalize_ac(block) != reference_normalize_ac(block):
+            mismatches += 1
+            print(f"mismatch on the {name} timing block", file=sys.stderr)
+        before = _lines_per_sec(reference_normalize_ac, block)
+        after = _lines_per_sec(normalize_ac, block)
+        timing[name] = {"lines_per_sec_before": round(before), "lines_per_sec_after": round(after),
+                        "speedup": round(after / before, 2)}
+
+    pasted = pasted_block(rng, args.lines)
+    exact, near = normalize_ac(pasted), normalize_ac(pasted, near_duplicates=True)
+    print(json.dumps({
+        "equivalence_blocks": len(EDGE_CASES) + args.blocks,
+        "mismatches": mismatches,
+        "timing": timing,
+        "near_duplicates": {"items_exact": len(exact), "items_near": len(near),
+                            "near_lines_per_sec": round(_lines_per_sec(
+                                lambda b: normalize_ac(b, near_duplicates=True), pasted))},
+    }, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# bench/adf_bench.py
+"""
+Jira description ADF: the batched, size-aware builder against the original one.
+
+    python -m bench.adf_bench --chars 10000 100000 400000
+
+For parse_text stories of each size reports, for the original _to_adf and
+the new builder (unlimited, and cut to JIRA_DESCRIPTION_LIMIT as create_issue
+sends it): build + json.dumps ms, distinct dicts and serialized characters.
+Checks, for every size and a few edge cases:
+- no text is lost: the doc holds the start of the description, then the
+  start of the acceptance criteria, and the overflow (as comments) holds the
+  rest of each, in order
+- the description, and each overflow comment, serializes within the limit
+Exits non-zero on any failure.
+"""
+import argparse
+import json
+import sys
+import time
+
+import jira_client as J
+from bench import corpus
+from config import get_settings
+from parsers.heuristics import parse_text
+
+EDGE_CASES = [
+    ("", None), ("   \n\n", ["x"]), ("### Head\n#tag\n###\n- \n- item\n-item", ["a", "b"]),
+    ("x" * 100000, None), ("é" * 40000 + "\nnext", ["ü" * 9000] * 3), ("line\n" * 20000, ["ac"] * 5000),
+]
+
+
+def reference_to_adf(description, acceptance=None):
+    # _to_adf as it was before the batched builder, kept for comparison
+    content = []
+    lines = (description or "").splitlines()
+    if not lines:
+        content.append(J._adf_text_paragraph(" "))
+    else:
+        for ln in lines:
+            content.append(J._adf_text_paragraph(ln))
+    if acceptance:
+        content.append(J._adf_heading("Acceptance Criteria", level=3))
+        content.append(J._adf_bullet_list(acceptance))
+    return {"type": "doc", "version": 1, "content": content}
+
+
+def _dicts(node, seen=None) -> int:
+    # distinct dict objects: the shared hardBreak node is built once
+    seen = set() if seen is None else seen
+    if isinstance(node, dict):
+        if id(node) in seen:
+            return 0
+        seen.add(id(node))
+        return 1 + sum(_dicts(v, seen) for v in node.values())
+    if isinstance(node, list):
+        return sum(_dicts(v, seen) for v in node)
+    return 0
+
+
+def _text(node) -> str:
+    return "".join(c.get("text", "") for c in node.get("content", []) if c["type"] == "text")
+
+
+def doc_lines(doc) -> list:
+    out = []
+    for node in doc["content"]:
+        if node["type"] == "heading":
+            out.append("#" * node["attrs"]["level"] + " " + _text(node))
+        elif node["type"] == "bulletList":
+            out += ["- " + _text(it["content"][0]) for it in node["content"]]
+        else:
+            out += [c["text"] for c in node.get("content", []) if c["type"] == "text"]
+    return out
+
+
+def expected_lines(text: str) -> list:
+    out = []
+    for ln in (ln.rstrip() for ln in J._adf_lines(text)):
+        m = J._ADF_HEADING.match(ln) if ln[:1] == "#" else None
+        if m:
+            out.append(f"{m.group(1)} {m.group(2)}")
+        elif ln:
+            out.append(ln)
+    return out
+
+
+def check(description, acceptance, limit: int) -> list:
+    """Problems with the cut doc + overflow comments for one story; [] if none."""
+    problems = []
+    doc, rest = J._description_adf(description, acceptance, limit, "comment")
+    if len(json.dumps(doc)) > limit:
+        problems.append(f"description serializes to {len(json.dumps(doc))} > {limit}")
+    kept, moved = doc_lines(doc), []
+    if rest:
+        kept = kept[:-1]                                 # the "continued in ..." note
+        for c in J._comment_docs(rest, limit, 10 ** 6):
+            if len(json.dumps(c)) > limit:
+                problems.append(f"comment serializes to {len(json.dumps(c))} > {limit}")
+            moved += [ln for ln in doc_lines(c) if ln != "### Acceptance Criteria (continued)"]
+    d = expected_lines(description or "")
+    a = expected_lines("\n".join(["### Acceptance Criteria", *(f"- {x}" for x in acceptance)])) if acceptance else []
+    # kept = d[:i] + a[:len(kept) - i] and moved = the rest of both, for some i
+    if not any(kept == d[:i] + a[:len(kept) - i] and moved == d[i:] + a[len(kept) - i:]
+               for i in range(min(len(d), len(kept)) + 1)):
+        problems.append("text lost or out of order")
+    return problems
+
+
+def _timed(fn, reps=5):
+    best, out = float("inf"), None
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn()
+        json.dumps(out)
+        best = min(best, time.perf_counter() - t0)
+    return out, round(best * 1000, 2)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, nargs="+", default=[10000, 100000, 400000])
+    args = ap.parse_args(argv)
+
+    limit = get_settings().JIRA_DESCRIPTION_LIMIT
+    failures = []
+    for i, (desc, ac) in enumerate(EDGE_CASES):
+        failures += [f"edge case {i}: {p}" for p in check(desc, ac, limit)]
+
+    result = {"limit": limit, "sizes": {}}
+    for chars in args.chars:
+        raw = corpus.make_md(corpus.spec_lines(chars, seed=chars)).decode()
+        story, _ = parse_text(raw, "TD", [], [], {"priority_map": {}, "max_chars": 400000})
+        desc, ac = story["description"], story["acceptance_criteria"]
+        failures += [f"{chars} chars: {p}" for p in check(desc, ac, limit)]
+        row = {}
+        for name, fn in (("original", lambda: reference_to_adf(desc, ac)),
+                         ("batched", lambda: J._to_adf(desc, ac)),
+                         ("batched_cut", lambda: J._description_adf(desc, ac, limit)[0])):
+            doc, ms = _timed(fn)
+            row[name] = {"ms": ms, "dicts": _dicts(doc), "serialized_chars": len(json.dumps(doc))}
+        row["overflow_chars"] = sum(len(ln) + 1 for ln in J._description_adf(desc, ac, limit)[1])
+        result["sizes"][chars] = row
+
+    result["failures"] = failures
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
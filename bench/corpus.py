@@ -0,0 +1,182 @@
+# bench/corpus.py
+"""
+Synthetic inputs for the benchmarks, generated locally and deterministically.
+
+    python -m bench.corpus --out /tmp/corpus --chars 200000 --pages 20
+
+Writes spec.md, spec.html, spec.docx, spec.pdf (text layer) and
+spec_scanned.pdf (rasterized pages, no text layer).
+"""
+import io
+import os
+import random
+import argparse
+from typing import List
+
+_WORDS = ("login payment export invoice retry cache latency report admin tenant "
+          "search filter upload webhook audit token session dashboard alert queue").split()
+
+
+def spec_lines(chars: int = 20000, seed: int = 1) -> List[str]:
+    """A Jira-ish spec: header fields, user stories, prose and a Given/When/Then AC block."""
+    rng = random.Random(seed)
+    w = lambda n: " ".join(rng.choice(_WORDS) for _ in range(n))
+    lines = [
+        f"Title: {w(4).capitalize()}",
+        f"Labels: {w(1)}, {w(1)}",
+        "Components: backend",
+        f"Priority: {rng.choice(['P1', 'High', 'Medium'])}",
+        "Story Points: 5",
+        "Epic Link: TD-1",
+        "",
+    ]
+    size = sum(len(x) + 1 for x in lines)
+    ac_every = 40
+    n = 0
+    while size < chars:
+        n += 1
+        if n % ac_every == 0:
+            block = ["Acceptance Criteria:"]
+            for _ in range(rng.randint(2, 6)):
+                block += [f"Given {w(4)}", f"When {w(3)}", f"Then {w(5)}", ""]
+            new = block
+        elif n % 7 == 0:
+            new = [f"As a {rng.choice(_WORDS)} I want {w(6)} so that {w(5)}"]
+        elif n % 11 == 0:
+            new = [f"- {w(7)} #{rng.choice(_WORDS)}", ""]
+        else:
+            new = [f"{w(12).capitalize()}. {w(10).capitalize()}."]
+        lines += new
+        size += sum(len(x) + 1 for x in new)
+    return lines
+
+
+def make_md(lines: List[str]) -> bytes:
+    return "\n".join(lines).encode()
+
+
+def make_html(lines: List[str]) -> bytes:
+    out = ["<html><head><title>Spec</title><style>p{margin:0}</style>",
+           "<script>var x = 1;</script></head><body>"]
+    for ln in lines:
+        if not ln:
+            continue
+        if ln.startswith("- "):
+            out.append(f"<ul><li>{ln[2:]}</li></ul>")
+        elif ln.endswith(":") or ln.startswith("Title:"):
+            out.append(f"<h3>{ln}</h3>")
+        else:
+            out.append(f"<div><p>{ln}</p></div>")
+    out.append("<noscript>enable js</noscript></body></html>")
+    return "\n".join(out).encode()
+
+
+def make_docx(lines: List[str]) -> bytes:
+    from docx import Document
+    doc = Document()
+    for ln in lines:
+        if ln.startswith("Title:"):
+            doc.add_heading(ln, level=1)
+        elif ln.startswith("- "):
+            doc.add_paragraph(ln[2:], style="List Bullet")
+        else:
+            doc.add_paragraph(ln)
+    bio = io.BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(lines: List[str], pages: int = 1) -> bytes:
+    """Minimal multi-page PDF with a Helvetica text layer (no external deps)."""
+    pages = max(1, pages)
+    per = max(1, -(-len(lines) // pages))
+    chunks = [lines[i:i + per] for i in range(0, len(lines), per)] or [[""]]
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for chunk in chunks:
+        body = " ".join(f"({_pdf_escape(l)}) '" for l in chunk)
+        stream = f"BT /F1 8 Tf 36 800 Td 9 TL {body} ET"
+        objs.append(f"<< /Length {len(stream.encode('latin-1', 'replace'))} >>\nstream\n{stream}\nendstream")
+        content_id = len(objs)
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                    f"/Contents {content_id} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offs = []
+    for i, o in enumerate(objs, 1):
+        offs.append(len(out))
+        out += f"{i} 0 obj\n{o}\nendobj\n".encode("latin-1", "replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offs).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def make_scanned_pdf(lines: List[str], pages: int = 1, dpi: int = 150, noise: float = 0.0,
+                     seed: int = 1) -> bytes:
+    """Rasterized pages (Pillow's built-in font) saved as an image-only PDF."""
+    from PIL import Image, ImageDraw, ImageFont
+    rng = random.Random(seed)
+    w, h = int(8.27 * dpi), int(11.69 * dpi)
+    try:
+        font = ImageFont.load_default(size=max(10, dpi // 9))
+    except TypeError:
+        font = ImageFont.load_default()
+    step = int(font.getbbox("Ag")[3] * 1.5) or 12
+    per = max(1, (h - 2 * dpi // 2) // step)
+    imgs = []
+    for p in range(max(1, pages)):
+        img = Image.new("L", (w, h), 255)
+        d = ImageDraw.Draw(img)
+        y = dpi // 2
+        for ln in lines[p * per:(p + 1) * per]:
+            d.text((dpi // 2, y), ln, fill=0, font=font)
+            y += step
+        if noise:
+            px = img.load()
+            for _ in range(int(w * h * noise)):
+                px[rng.randrange(w), rng.randrange(h)] = rng.choice((0, 255))
+        imgs.append(img.convert("RGB"))
+    bio = io.BytesIO()
+    imgs[0].save(bio, format="PDF", save_all=True, append_images=imgs[1:], resolution=dpi)
+    return bio.getvalue()
+
+
+def build(chars: int = 20000, pages: int = 5, seed: int = 1, scanned: bool = True) -> dict:
+    """{filename: bytes} for every supported input type."""
+    lines = spec_lines(chars, seed)
+    files = {
+        "spec.md": make_md(lines),
+        "spec.html": make_html(lines),
+        "spec.docx": make_docx(lines),
+        "spec.pdf": make_text_pdf(lines, pages),
+    }
+    if scanned:
+        files["spec_scanned.pdf"] = make_scanned_pdf(lines, pages, seed=seed)
+    return files
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--chars", type=int, default=20000)
+    ap.add_argument("--pages", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+    for name, data in build(args.chars, args.pages, args.seed).items():
+        with open(os.path.join(args.out, name), "wb") as fh:
+            fh.write(data)
+        print(f"{name}\t{len(data)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench/health_latency.py
+"""
+/health latency while CPU-heavy conversions run.
+
+    python -m bench.health_latency --file scanned.pdf --jobs 4 --seconds 20
+
+Starts `uvicorn app:app` (one worker) on a free port, samples /health with no
+load, then again while `--jobs` clients keep posting `--file` to /convert.
+Without --file a large synthetic Markdown spec is used. 503s from admission
+control are counted, not treated as failures.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))] if xs else None
+
+
+def _sample_health(base: str, seconds: float, interval: float = 0.02):
+    lat = []
+    end = time.monotonic() + seconds
+    with requests.Session() as s:
+        while time.monotonic() < end:
+            t0 = time.perf_counter()
+            s.get(f"{base}/health", timeout=30).raise_for_status()
+            lat.append((time.perf_counter() - t0) * 1000)
+            time.sleep(interval)
+    return {"n": len(lat), "p50_ms": round(_pct(lat, 50), 2), "p99_ms": round(_pct(lat, 99), 2),
+            "max_ms": round(max(lat), 2)}
+
+
+def _synthetic_spec(path: str, lines: int = 100_000) -> None:
+    with open(path, "w") as fh:
+        fh.write("Title: Load test spec\nLabels: bench\n")
+        for i in range(lines):
+            fh.write(f"As a user I want feature {i} #tag{i % 50} with {i % 13} points\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--file")
+    ap.add_argument("--jobs", type=int, default=4)
+    ap.add_argument("--seconds", type=float, default=15)
+    args = ap.parse_args(argv)
+
+    path = args.file
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "spec.md")
+        _synthetic_spec(path)
+
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, EXTRACT_CACHE_ENABLED="false")
+    srv = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"{base}/health", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+
+        idle = _sample_health(base, min(5.0, args.seconds))
+
+        stop = threading.Event()
+        counts = {"ok": 0, "busy": 0, "error": 0}
+        lock = threading.Lock()
+
+        def client():
+            with requests.Session() as s:
+                while not stop.is_set():
+                    with open(path, "rb") as fh:
+                        r = s.post(f"{base}/convert", files={"file": (os.path.basename(path), fh)},
+                                   data={"project_key": "TD", "raw_text": "none"}, timeout=600)
+                    key = "ok" if r.ok else "busy" if r.status_code == 503 else "error"
+                    with lock:
+                        counts[key] += 1
+                    if r.status_code == 503:
+                        time.sleep(float(r.headers.get("Retry-After", "1")))
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(args.jobs)]
+        for t in threads:
+            t.start()
+        time.sleep(0.5)
+        loaded = _sample_health(base, args.seconds)
+        stop.set()
+
+        print(json.dumps({"file": path, "jobs": args.jobs, "health_idle": idle,
+                          "health_under_load": loaded, "convert": counts}, indent=2))
+    finally:
+        srv.terminate()
+        try:
+            srv.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            srv.kill()
+
+
+if __name__ == "__main__":
+    main()
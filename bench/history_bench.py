@@ -0,0 +1,160 @@
+# bench/history_bench.py
+"""
+Conversion history: lookup latency and keyset vs offset paging.
+
+    python -m bench.history_bench --rows 50000
+
+Records `--rows` synthetic conversions (in batches, as bulk endpoints do),
+then reports ms per lookup by project, label, epic, Jira key, content hash
+and full-text `q`, and the time to walk every page of a project listing
+with HistoryStore cursors against LIMIT/OFFSET on the same table.
+Checks that each lookup returns exactly what a Python scan of the recorded
+entries does (newest first, up to the page size), both through FTS5 and
+through the LIKE scan used on a SQLite without it (including words with
+"%", "_" and backslashes), and that the cursor walk visits every matching
+row once, in order. Exits non-zero on any failure.
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+
+from history import _ITEM_COLS, HistoryStore
+
+_WORDS = ["export", "login", "invoice", "retry", "alert", "admin", "report", "upload", "cart", "search"]
+_LABELS = ["api", "ui", "backend", "billing", "ops"]
+
+
+def make_entries(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        words = rng.sample(_WORDS, 3)
+        story = {
+            "project_key": rng.choice(["TD", "OPS", "PAY", "WEB"]),
+            "summary": " ".join(words) + f" {i}",
+            "description": " ".join(rng.choice(_WORDS) for _ in range(20)),
+            "acceptance_criteria": [f"Given {rng.choice(_WORDS)} Then {rng.choice(_WORDS)}"],
+            "labels": rng.sample(_LABELS, rng.randint(0, 2)),
+            "epic_link": f"EP-{rng.randrange(50)}" if rng.random() < 0.5 else None,
+        }
+        out.append({"story": story, "source": "bench", "filename": f"f{i}.md",
+                    "content_hash": hashlib.sha256(str(i % (n // 2 or 1)).encode()).hexdigest(),
+                    "jira_key": f"TD-{i}" if i % 3 == 0 else None})
+    return out
+
+
+# words LIKE would treat as wildcards or escapes, next to rows an unescaped pattern also matches
+# (LIKE scan only: FTS5 splits these words at the punctuation)
+_SPECIAL = [("rate 50% today", "50%"), ("rate 500 today", None), ("use a_b here", "a_b"),
+            ("use axb here", None), ("path c:\\tmp now", "c:\\tmp"), ("path c:tmp now", None)]
+
+
+def special_entries() -> list:
+    return [{"story": {"project_key": "SPC", "summary": text, "description": "", "acceptance_criteria": [],
+                       "labels": [], "epic_link": None},
+             "source": "bench", "filename": f"s{i}.md", "content_hash": f"special-{i}", "jira_key": None}
+            for i, (text, _) in enumerate(_SPECIAL)]
+
+
+def expected(entries, ids, limit, **f) -> list:
+    # the same filter as a Python scan, newest first
+    def ok(e):
+        s = e["story"]
+        return ((not f.get("project_key") or s["project_key"] == f["project_key"])
+                and (not f.get("label") or f["label"] in s["labels"])
+                and (not f.get("epic_link") or s["epic_link"] == f["epic_link"])
+                and (not f.get("jira_key") or e["jira_key"] == f["jira_key"])
+                and (not f.get("content_hash") or e["content_hash"] == f["content_hash"])
+                and (not f.get("q") or all(
+                    w in (s["summary"] + " " + s["description"] + " " + " ".join(s["acceptance_criteria"])).split()
+                    for w in f["q"].split())))
+    return [i for i, e in sorted(zip(ids, entries), key=lambda p: -p[0]) if ok(e)][:limit]
+
+
+def _ms(fn, reps=5):
+    best, out = float("inf"), None
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, round(best * 1000, 3)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--page", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=11)
+    args = ap.parse_args(argv)
+
+    store = HistoryStore()
+    entries = make_entries(args.rows, args.seed)
+    t0 = time.perf_counter()
+    ids = []
+    for i in range(0, len(entries), 500):
+        ids += store.record(entries[i:i + 500])
+    record_ms = (time.perf_counter() - t0) * 1000
+    entries += special_entries()
+    ids += store.record(entries[args.rows:])
+
+    failures, lookups = [], {}
+    probes = {
+        "project": {"project_key": "OPS"}, "label": {"label": "billing"}, "epic": {"epic_link": "EP-7"},
+        "jira_key": {"jira_key": f"TD-{(args.rows // 2) // 3 * 3}"},
+        "content_hash": {"content_hash": entries[args.rows // 3]["content_hash"]},
+        "q": {"q": "invoice alert"}, "q_and_project": {"q": "retry", "project_key": "PAY"},
+        "label_and_epic": {"label": "ui", "epic_link": "EP-3"},
+    }
+    probes.update({f"q_special_{i}": {"q": q} for i, (_, q) in enumerate(_SPECIAL) if q})
+    fts = store.fts
+    # the same lookups through the LIKE scan a SQLite without FTS5 gets
+    for mode in (("fts5", "like") if fts else ("like",)):
+        store.fts = mode == "fts5"
+        for name, f in probes.items():
+            if mode == "fts5" and name.startswith("q_special"):
+                continue
+            (items, _), ms = _ms(lambda: store.search(limit=args.page, **f))
+            got = [it["id"] for it in items]
+            if got != expected(entries, ids, args.page, **f):
+                failures.append(f"{name} ({mode}): results differ from a scan")
+            lookups.setdefault(mode, {})[name] = {"ms": ms, "hits": len(got)}
+    store.fts = fts
+
+    def keyset():
+        seen, cursor = [], None
+        while True:
+            items, cursor = store.search(project_key="TD", limit=args.page, cursor=cursor)
+            seen += [it["id"] for it in items]
+            if not cursor:
+                return seen
+
+    def offset():
+        seen, off = [], 0
+        while True:
+            # the same columns and row building as search(), paged with OFFSET instead
+            rows = store._db.execute(f"SELECT {', '.join(_ITEM_COLS)} FROM conversions WHERE project_key = ?"
+                                     " ORDER BY id DESC LIMIT ? OFFSET ?", ("TD", args.page, off)).fetchall()
+            seen += [store._item(r)["id"] for r in rows]
+            off += args.page
+            if len(rows) < args.page:
+                return seen
+
+    walked, keyset_ms = _ms(keyset, reps=3)
+    walked_off, offset_ms = _ms(offset, reps=3)
+    if walked != expected(entries, ids, len(entries), project_key="TD") or walked != walked_off:
+        failures.append("cursor walk missed, repeated or reordered rows")
+
+    print(json.dumps({
+        "rows": args.rows, "fts5": store.fts, "record_ms": round(record_ms, 1),
+        "lookup": lookups,
+        "paging": {"pages": -(-len(walked) // args.page), "keyset_ms": keyset_ms, "offset_ms": offset_ms},
+        "failures": failures,
+    }, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench/html_bench.py
+"""
+HTML extractors against the BeautifulSoup one they replaced.
+
+    python -m bench.html_bench --mb 5 --iterations 5
+
+First a differential check: hand-written edge cases (entities, comments, CDATA,
+nested and unclosed skip tags, stray end tags, encodings) plus random tag soup
+are run through every engine and compared with the bs4 output. "stream" must
+match everywhere; "lxml" only on well-formed input, since libxml2 repairs
+broken markup differently (its mismatches on the soup are reported, not
+failed). Then throughput on a Confluence-like export of about `--mb` MB.
+Exits 1 if any required case differs.
+"""
+import argparse
+import json
+import random
+import sys
+
+from bench import corpus
+from bench.run import measure
+from parsers.html_reader import ENGINES, read_html_bytes
+
+CASES = [
+    b"",
+    b"plain text, no tags",
+    b"<p>a &amp; b<b> x</b>y</p>",
+    b"<p>&lt;tag&gt; &copy; &nbsp;x&unknown; &amp &notit; &#8212; &#x2014; &#147;q&#148; &#0; &#99999999;</p>",
+    b"<!DOCTYPE html><html><head><title>T</title><meta charset='utf-8'></head><body>b</body></html>",
+    b"<div>a<!-- comment -->b<?pi x?>c<![CDATA[ d ]]>e</div>",
+    b"<script>if (a < b) { x = '</p>'; }</script>after<style>p{x:1}</style>end",
+    b"<noscript><p>one<noscript>two</noscript>three</p></noscript>four",
+    b"<div><noscript>x</div>visible</noscript>also",
+    b"<noscript>never closed <p>gone",
+    b"<p>stray</span> end tag</p></div>tail",
+    b"<ul><li>one<li>two<li>three</ul>",
+    b"<table><tr><td> a </td><td>\n\n</td><td>b</td></tr></table>",
+    b"<ruby>kan<rt>kana</rt><rp>(</rp>ji</ruby><template><p>t</p></template>z",
+    b"<p>line<br>break<br/>here<hr>rule<img src=x>img</p><p/>after",
+    b"<pre>\n  keep   inner   spaces\n</pre><textarea>  ta  </textarea>",
+    "<p>café – 日本</p>".encode("utf-8"),
+    "<meta charset=\"iso-8859-1\"><p>café</p>".encode("latin-1"),
+    "<p>smart “quotes”</p>".encode("cp1252"),
+    b"\xef\xbb\xbf<p>bom</p>",
+    b"<P CLASS=x>Upper</P><SCRIPT>hidden()</SCRIPT>shown",
+    b"<p>a\r\nb\tc\xc2\xa0</p>",
+]
+
+# cases libxml2 reads differently (recovery, CDATA, entities without ";", CRLF); stream-only
+LXML_EXEMPT = {3, 5, 7, 8, 9, 10, 13, 14, 21}
+
+_TAGS = ["p", "div", "span", "b", "i", "ul", "li", "td", "tr", "h2", "a", "script", "style",
+         "noscript", "br", "img", "template"]
+_TEXT = ["alpha", "beta &amp; gamma", "&lt;x&gt;", "  ", "\n", "delta&nbsp;eps", "&#8212;", "z<", "a > b"]
+
+
+def soup(seed: int, n: int = 200) -> bytes:
+    """Random, often malformed, markup."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        r = rnd.random()
+        t = rnd.choice(_TAGS)
+        if r < 0.35:
+            out.append(rnd.choice(_TEXT))
+        elif r < 0.6:
+            out.append(f"<{t}>" if rnd.random() < 0.8 else f"<{t} class='c{rnd.randint(0, 9)}'/>")
+        elif r < 0.8:
+            out.append(f"</{t}>")
+        elif r < 0.9:
+            out.append("<!-- c -->")
+        else:
+            out.append(f"<{t}>{rnd.choice(_TEXT)}</{t}>")
+    return "".join(out).encode()
+
+
+def confluence(mb: float, seed: int = 1) -> bytes:
+    """A Confluence-style export: corpus spec text wrapped in macro/table markup."""
+    lines = corpus.spec_lines(int(mb * 1e6 / 3), seed)
+    html = corpus.make_html(lines).decode()
+    html = html.replace("<div><p>", '<div class="confluence-information-macro"><span class="aui-icon">'
+                                    '</span><div class="macro-body"><p>')
+    html = html.replace("</p></div>", "</p></div></div>\n<table class=\"confluenceTable\"><tbody><tr>"
+                                      "<td class=\"confluenceTd\">cell &amp; more</td></tr></tbody></table>")
+    return html.encode()
+
+
+def check(seeds: int) -> dict:
+    cases = [(f"case{i}", b, i not in LXML_EXEMPT) for i, b in enumerate(CASES)]
+    cases += [(f"soup{s}", soup(s), False) for s in range(seeds)]
+    cases.append(("confluence", confluence(0.2), True))
+    result = {}
+    for engine in ENGINES[:-1]:
+        failed, soft = [], 0
+        for name, b, strict in cases:
+            if read_html_bytes(b, engine) == read_html_bytes(b, "bs4"):
+                continue
+            if engine == "stream" or strict:
+                failed.append(name)
+            else:
+                soft += 1
+        result[engine] = {"cases": len(cases), "failed": failed}
+        if engine != "stream":
+            result[engine]["malformed_differences"] = soft
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=5.0)
+    ap.add_argument("--iterations", type=int, default=5)
+    ap.add_argument("--seeds", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    result = {"check": check(args.seeds)}
+    b = confluence(args.mb)
+    result["input_mb"] = round(len(b) / 1e6, 2)
+    for engine in ENGINES:
+        stats = measure(lambda: read_html_bytes(b, engine), args.iterations, len(b), trace_memory=True)
+        result[engine] = stats
+    for engine in ENGINES[:-1]:
+        result[f"speedup_{engine}"] = round(result["bs4"]["p50_ms"] / result[engine]["p50_ms"], 2)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if any(v["failed"] for v in result["check"].values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench/ocr_bench.py
+"""
+Serial vs page-streaming OCR on a scanned PDF.
+
+    python -m bench.ocr_bench scanned.pdf --pages 20 --workers 4 --window 4
+
+Each mode runs in a fresh interpreter so peak RSS (self + children) is not
+polluted by the other run.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+
+def _serial_ocr(b: bytes, lang: str, max_pages: int) -> str:
+    # the original implementation: rasterize everything, then OCR page by page
+    import pytesseract
+    from pdf2image import convert_from_bytes
+    pages = convert_from_bytes(b, dpi=200, first_page=1, last_page=max_pages)
+    parts = []
+    for i, page in enumerate(pages):
+        text = pytesseract.image_to_string(page, lang=lang)
+        if text.strip():
+            parts.append(f"[Page {i+1} OCR]\n{text.strip()}")
+    return "\n\n".join(parts).strip()
+
+
+def _run_one(args) -> dict:
+    from parsers.ocr_reader import run_ocr_on_pdf
+    from pdf2image import pdfinfo_from_bytes
+
+    with open(args.pdf, "rb") as fh:
+        b = fh.read()
+    pages = min(int(pdfinfo_from_bytes(b)["Pages"]), args.pages)
+
+    t0 = time.perf_counter()
+    if args.run == "serial":
+        text = _serial_ocr(b, args.lang, args.pages)
+    else:
+        text = run_ocr_on_pdf(b, lang=args.lang, max_pages=args.pages,
+                              workers=args.workers, window=args.window)
+    dt = time.perf_counter() - t0
+
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "mode": args.run,
+        "pages": pages,
+        "seconds": round(dt, 3),
+        "pages_per_sec": round(pages / dt, 3) if dt else None,
+        "peak_rss_mb": round(self_kb / 1024, 1),
+        "peak_child_rss_mb": round(child_kb / 1024, 1),
+        "chars": len(text),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdf")
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--lang", default="eng")
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--window", type=int, default=4)
+    ap.add_argument("--run", choices=["serial", "pipeline"], help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(_run_one(args)))
+        return
+
+    results = []
+    for mode in ("serial", "pipeline"):
+        cmd = [sys.executable, "-m", "bench.ocr_bench", args.pdf,
+               "--pages", str(args.pages), "--lang", args.lang,
+               "--workers", str(args.workers), "--window", str(args.window),
+               "--run", mode]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
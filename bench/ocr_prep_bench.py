@@ -0,0 +1,131 @@
+# bench/ocr_prep_bench.py
+"""
+OCR preprocessing on a synthetic scanned corpus.
+
+    python -m bench.ocr_prep_bench --pages 10 --dpi 200 --noise 0.01
+
+Renders `--pages` corpus pages as scans (A4 at `--dpi`, each rotated by a
+known angle in +-`--max-skew` degrees, salt-and-pepper `--noise`) and reports:
+- preprocessing ms/page, pixels and PNG bytes handed to tesseract, and the
+  deskew error against the known angle
+- with tesseract installed: OCR seconds/page and character accuracy
+  (difflib ratio against the rendered text) for the current path (page image
+  as rasterized) and the preprocessed one; otherwise "skipped"
+- the DPI page_dpi() picks for common page sizes
+"""
+import argparse
+import difflib
+import io
+import json
+import random
+import shutil
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from bench import corpus
+from config import get_settings, ocr_options
+from parsers import ocr_prep
+from parsers.ocr_reader import _ocr_page, page_dpi
+
+PAGE_SIZES = {"A5": (420, 595), "letter": (612, 792), "A4": (595, 842), "A3": (842, 1191),
+              "receipt": (216, 432), "slide": (720, 405)}
+
+
+def scans(pages: int, dpi: int, noise: float, max_skew: float, seed: int = 1):
+    """[(image, truth_text, skew_degrees)] for `pages` A4 pages."""
+    rng = random.Random(seed)
+    w, h = int(8.27 * dpi), int(11.69 * dpi)
+    font = ImageFont.load_default(size=max(10, dpi // 9))
+    step = int(font.getbbox("Ag")[3] * 1.5)
+    per = (h - dpi) // step
+    lines = []
+    while len(lines) < pages * per:
+        lines += corpus.spec_lines(pages * per * 60, seed + len(lines))
+    out = []
+    for p in range(pages):
+        chunk = lines[p * per:(p + 1) * per]
+        img = Image.new("L", (w, h), 255)
+        d = ImageDraw.Draw(img)
+        for i, ln in enumerate(chunk):
+            d.text((dpi // 2, dpi // 2 + i * step), ln, fill=0, font=font)
+        skew = round(rng.uniform(-max_skew, max_skew), 1)
+        img = img.rotate(skew, resample=Image.BILINEAR, fillcolor=255)
+        if noise:
+            px = img.load()
+            for _ in range(int(w * h * noise)):
+                px[rng.randrange(w), rng.randrange(h)] = rng.choice((0, 255))
+        out.append((img.convert("RGB"), "\n".join(chunk), skew))
+    return out
+
+
+def _png_bytes(img) -> int:
+    bio = io.BytesIO()
+    img.save(bio, format="PNG")
+    return bio.tell()
+
+
+def _accuracy(truth: str, text: str) -> float:
+    norm = lambda s: " ".join(s.split())
+    return difflib.SequenceMatcher(None, norm(truth), norm(text), autojunk=False).ratio()
+
+
+def preprocessing(pages, opts) -> dict:
+    ms, px_in, px_out, png_in, png_out, errors = [], 0, 0, 0, 0, []
+    for img, _, skew in pages:
+        t0 = time.perf_counter()
+        out, _, info = ocr_prep.preprocess(img, opts["target_xheight"], opts["deskew"])
+        ms.append((time.perf_counter() - t0) * 1000)
+        px_in += img.width * img.height
+        png_in += _png_bytes(img)
+        if out is not None:
+            px_out += out.width * out.height
+            png_out += _png_bytes(out)
+        # preprocess reports the correction, i.e. minus the applied skew
+        errors.append(abs(info["skew"] + skew))
+    n = len(pages)
+    return {
+        "ms_per_page": round(sum(ms) / n, 1),
+        "pixels_per_page": {"before": px_in // n, "after": px_out // n},
+        "png_kb_per_page": {"before": round(png_in / n / 1024, 1), "after": round(png_out / n / 1024, 1)},
+        "deskew_error_deg": {"mean": round(sum(errors) / n, 2), "max": round(max(errors), 2)},
+    }
+
+
+def ocr(pages, lang: str, dpi: int, opts) -> dict:
+    out = {}
+    for name, o in (("current", None), ("preprocessed", dict(opts, preprocess=True))):
+        secs, acc = 0.0, []
+        for img, truth, _ in pages:
+            t0 = time.perf_counter()
+            text = _ocr_page(img, lang, o, dpi if o else None)
+            secs += time.perf_counter() - t0
+            acc.append(_accuracy(truth, text))
+        out[name] = {"s_per_page": round(secs / len(pages), 3), "accuracy": round(sum(acc) / len(acc), 4)}
+    out["speedup"] = round(out["current"]["s_per_page"] / out["preprocessed"]["s_per_page"], 2)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--noise", type=float, default=0.01)
+    ap.add_argument("--max-skew", type=float, default=4.0)
+    ap.add_argument("--lang", default="eng")
+    args = ap.parse_args(argv)
+
+    opts = ocr_options(get_settings())
+    pages = scans(args.pages, args.dpi, args.noise, args.max_skew)
+    result = {"pages": len(pages), "dpi": args.dpi, "noise": args.noise,
+              "preprocess": preprocessing(pages, opts)}
+    if shutil.which("tesseract"):
+        result["ocr"] = ocr(pages, args.lang, args.dpi, opts)
+    else:
+        result["ocr"] = "skipped: tesseract not installed"
+    result["adaptive_dpi"] = {k: page_dpi(w, h, opts) for k, (w, h) in PAGE_SIZES.items()}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
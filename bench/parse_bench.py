@@ -0,0 +1,195 @@
+# bench/parse_bench.py
+"""
+parse_text: differential check + lines/sec against the original per-line regex chain.
+
+    python -m bench.parse_bench --docs 200 --lines 20000
+
+Exits non-zero if any generated document parses differently.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from parsers.heuristics import parse_text
+from utils.text import split_lines, squash_spaces, clamp_text
+from utils.ac_rules import normalize_ac
+from utils.detection import (
+    RE_ACCEPTANCE, RE_TITLE, RE_LABELS, RE_COMPONENTS, RE_PRIORITY, RE_POINTS,
+    RE_EPIC, RE_USER_STORY, RE_POINTS_INLINE, RE_PRIORITY_INLINE, RE_HASHTAG, comma_words,
+)
+from utils.mapping import map_priority
+
+
+def reference_parse_text(raw, project_key, default_labels, default_components, options):
+    # parse_text as it was before the dispatch engine; kept verbatim as the oracle
+    lines = split_lines(raw)
+    title = ""
+    labels = set([x.lower() for x in default_labels])
+    components = set(default_components)
+    priority = None
+    story_points = None
+    epic_link = None
+    user_story_lines = []
+    desc_lines = []
+    ac_block = []
+    in_ac = False
+
+    for ln in lines:
+        l = ln.strip()
+        low = l.lower()
+        if RE_ACCEPTANCE.match(low):
+            in_ac = True
+            continue
+        if in_ac:
+            if not l:
+                in_ac = False
+            else:
+                ac_block.append(l)
+            continue
+        if not title:
+            m = RE_TITLE.match(low)
+            if m:
+                title = m.group(2).strip()
+                continue
+        m = RE_LABELS.match(low)
+        if m:
+            labels.update(comma_words(m.group(1)))
+            continue
+        m = RE_COMPONENTS.match(low)
+        if m:
+            components.update(comma_words(m.group(1)))
+            continue
+        m = RE_PRIORITY.match(low)
+        if m:
+            priority = m.group(1).strip().lower()
+            continue
+        m = RE_POINTS.match(low)
+        if m:
+            try:
+                story_points = float(m.group(2))
+            except: pass
+            continue
+        m = RE_EPIC.match(low)
+        if m:
+            epic_link = m.group(2).strip()
+            continue
+        if RE_USER_STORY.match(low):
+            user_story_lines.append(l)
+        else:
+            desc_lines.append(l)
+        if options.get("label_hashtags", True):
+            for tag in [m.group(1).lower() for m in RE_HASHTAG.finditer(l)]:
+                labels.add(tag)
+        if options.get("detect_points_from_text", True) and story_points is None:
+            m = RE_POINTS_INLINE.search(l)
+            if m:
+                try: story_points = float(m.group(1))
+                except: pass
+        if options.get("detect_priority_from_text", True) and not priority:
+            m = RE_PRIORITY_INLINE.search(l)
+            if m:
+                priority = m.group(1)
+
+    acceptance = normalize_ac(ac_block)
+    if not title:
+        title = (user_story_lines[0] if user_story_lines else "")
+        title = title or next((x for x in lines if x.strip()), "Generated Story")
+        title = squash_spaces(title)[:255]
+    desc = []
+    if user_story_lines:
+        desc.append("### User Story")
+        desc.extend(user_story_lines)
+    if desc_lines:
+        desc.append("### Details / Context")
+        desc.extend(desc_lines)
+    if acceptance:
+        desc.append("### Acceptance Criteria")
+        desc.extend(f"- {a}" for a in acceptance)
+    description = "\n".join(desc).strip()
+    prio = map_priority(priority, options.get("priority_map", {})) if priority else None
+    story = {
+        "project_key": project_key, "summary": title,
+        "description": clamp_text(description, options.get("max_chars", 400000)),
+        "acceptance_criteria": acceptance, "labels": sorted(labels),
+        "components": sorted(components), "story_points": story_points,
+        "priority": prio, "epic_link": epic_link, "assignee_account_id": None,
+    }
+    diagnostics = {
+        "found_user_story_lines": len(user_story_lines), "ac_count": len(acceptance),
+        "labels_auto": sorted(list(labels)), "priority_token": priority,
+        "story_points_detected": story_points,
+    }
+    return story, diagnostics
+
+
+_FIELD_LINES = [
+    "Title: {w}", "SUMMARY :  {w} {w}", "title:{w}", "Labels: {w}, {w}", "label : {w}",
+    "Components: {w},{w}", "component: {w}", "Priority: {p}", "PRIORITY:{p}",
+    "Story Points: {n}", "sp: {n}", "Points : {n}.5", "points: x{n}", "Epic: {w}-{n}",
+    "Epic Link: {w}", "As a {w} I want {w}", "AS THE {w}", "as an {w}", "Acceptance Criteria:",
+    "AC:", "criteria :", "ſp: {n}", "ſummary: {w}", "Given {w}", "When {w} then {w}",
+    "Then {w}", "And {w}", "#{w} #{w}-{n} text", "needs {n} story points", "this is {p} now",
+    "{w} {w} {w}", "Ünïcödé {w} Σ", "İstanbul {w}", "  {w}  ", "", "", "- {w} {n}", "tag#{w}",
+    "Κείμενο ΣΑΣ", "title: ΟΔΟΣ", "SEV2 {w}", "{n} pts",
+    "# Title: {w}", "## Acceptance Criteria", "### {w} {w}", "#{w}", "  - Given {w}", "* Then {w}",
+    "• When {w}", "- And {w}", "| Given {w} | Then {w} |", "|---|---|", "| {w} |  |", "|",
+]
+_WORDS = ["login", "Payment", "API", "retry", "UI", "export", "csv", "Ops", "db", "cache"]
+_PRIOS = ["P0", "p1", "High", "low", "Critical", "sev3", "medium"]
+
+
+def make_doc(rng: random.Random, n_lines: int) -> str:
+    out = []
+    for _ in range(n_lines):
+        tpl = rng.choice(_FIELD_LINES) if rng.random() < 0.35 else "{w} {w} {w} {w} {w} {w}"
+        out.append(tpl.format(w=rng.choice(_WORDS), p=rng.choice(_PRIOS), n=rng.randint(0, 20)))
+    return "\n".join(out)
+
+
+def _lines_per_sec(fn, docs, reps=3):
+    total = sum(d.count("\n") + 1 for d in docs)
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        for d in docs:
+            fn(d, "TD", ["Seed"], [], {"priority_map": {}, "max_chars": 400000})
+        best = min(best, time.perf_counter() - t0)
+    return total / best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=200)
+    ap.add_argument("--lines", type=int, default=20000, help="lines in each timing document")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for i in range(args.docs):
+        doc = make_doc(rng, rng.randint(1, 200))
+        opts = {"priority_map": {}, "max_chars": rng.choice([400000, 300]),
+                "label_hashtags": rng.random() < 0.8,
+                "detect_points_from_text": rng.random() < 0.8,
+                "detect_priority_from_text": rng.random() < 0.8}
+        if parse_text(doc, "TD", ["Seed"], ["Core"], opts) != reference_parse_text(doc, "TD", ["Seed"], ["Core"], opts):
+            mismatches += 1
+            print(f"mismatch in doc {i}:\n{doc[:500]}", file=sys.stderr)
+
+    timing_docs = [make_doc(rng, args.lines) for _ in range(3)]
+    before = _lines_per_sec(reference_parse_text, timing_docs)
+    after = _lines_per_sec(parse_text, timing_docs)
+    print(json.dumps({
+        "differential_docs": args.docs,
+        "mismatches": mismatches,
+        "lines_per_sec_before": round(before),
+        "lines_per_sec_after": round(after),
+        "speedup": round(after / before, 2),
+    }, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
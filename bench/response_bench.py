@@ -0,0 +1,90 @@
+# bench/response_bench.py
+"""
+Serialization time and payload size of a /convert response.
+
+    python -m bench.response_bench --chars 20000 200000 400000 --iterations 20
+
+For each document size a ConvertResult is built from the parsed corpus, then
+every response shape (full, raw_text=truncated, fields=story,diagnostics) is
+serialized the way FastAPI did before (validate against the response model,
+then json.dumps) and the way the endpoints do now (responses.json_response),
+and the result is compressed with gzip and, if installed, zstd.
+"""
+import argparse
+import json
+import zlib
+
+from fastapi.responses import JSONResponse
+
+import responses
+from bench import corpus
+from bench.run import measure
+from config import get_settings
+from models import ConvertResult, JiraStory
+from parsers import parse_text
+from utils.text import clamp_text
+
+S = get_settings()
+
+
+def _result(chars: int, raw_mode: str) -> ConvertResult:
+    raw = "\n".join(corpus.spec_lines(chars))
+    story, diag = parse_text(raw, "TD", [], [], options={"priority_map": {}})
+    raw = {"full": raw, "truncated": clamp_text(raw, S.RAW_TEXT_TRUNCATE_CHARS), "none": None}[raw_mode]
+    return ConvertResult(story=JiraStory(**story), raw_text=raw, diagnostics=diag)
+
+
+SHAPES = {
+    "full": ("full", None),
+    "raw_text=truncated": ("truncated", None),
+    "fields=story,diagnostics": ("none", {"story", "diagnostics"}),
+}
+
+
+def _fastapi_default(r: ConvertResult) -> bytes:
+    # FastAPI with response_model: re-validate, dump, then stdlib json
+    return JSONResponse(ConvertResult.model_validate(r.model_dump()).model_dump(mode="json")).body
+
+
+def _compressors():
+    out = {"gzip": lambda b: zlib.compress(b, S.GZIP_LEVEL, wbits=31)}
+    if responses.zstandard is not None:
+        z = responses.zstandard.ZstdCompressor(level=S.ZSTD_LEVEL)
+        out["zstd"] = z.compress
+    return out
+
+
+def run(sizes, iterations: int) -> dict:
+    out = {"serializer": "orjson" if responses.orjson is not None else "pydantic_core"}
+    for chars in sizes:
+        per = {}
+        for shape, (raw_mode, include) in SHAPES.items():
+            r = _result(chars, raw_mode)
+            body = responses.json_response(r, include).body
+            row = {"bytes": len(body)}
+            if include is None:
+                row["fastapi_default"] = measure(lambda: _fastapi_default(r), iterations, trace_memory=False)
+            row["json_response"] = measure(lambda: responses.json_response(r, include).body, iterations,
+                                           trace_memory=False)
+            for name, fn in _compressors().items():
+                row[name] = {"bytes": len(fn(body)),
+                             **measure(lambda: fn(body), iterations, trace_memory=False)}
+            per[shape] = row
+        full = per["full"]
+        per["serialize_speedup"] = round(full["fastapi_default"]["p50_ms"] / full["json_response"]["p50_ms"], 2)
+        per["smallest_vs_full"] = round(min(v["bytes"] for k, v in per["fields=story,diagnostics"].items()
+                                            if isinstance(v, dict) and "bytes" in v) / full["bytes"], 3)
+        out[f"{chars}_chars"] = per
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, nargs="+", default=[20000, 200000, 400000])
+    ap.add_argument("--iterations", type=int, default=20)
+    args = ap.parse_args(argv)
+    print(json.dumps(run(args.chars, args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
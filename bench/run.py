@@ -0,0 +1,297 @@
+# bench/run.py
+"""
+Stage and end-to-end benchmarks for the Doc→Jira pipeline.
+
+    python -m bench.run --chars 200000 --pages 20 --iterations 20 --out bench.json
+    python -m bench.run ... --baseline main.json --threshold 0.15   # exit 2 on regression
+
+Stages are timed in-process on a synthetic corpus (bench/corpus.py). Endpoints
+go through FastAPI's TestClient against a local stub Jira server. OCR stages
+are skipped (and reported as such) when tesseract/pdftoppm are not installed.
+Output is JSON with p50/p90/p99 latency, throughput and peak memory per stage.
+It also checks that the Jira client retries 429s from the stub after their
+Retry-After (retry_check); exit 1 if it doesn't.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench import corpus
+
+
+# --------------------------- stub Jira ---------------------------
+
+class _StubJira(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    counter = 0
+    # throttle mode: the next `throttle` POSTs get 429 + Retry-After: `retry_after`, then 201s again
+    throttle = 0
+    retry_after = "1"
+    posts: list = []         # (perf_counter, status) per POST, for retry_check()
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code: int, body, headers=None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/rest/api/3/field"):
+            return self._reply(200, [{"id": "summary", "name": "Summary", "schema": {}}])
+        if self.path.startswith("/rest/api/3/issue/createmeta"):
+            return self._reply(200, {"projects": [{"issuetypes": [{"name": "Story"}, {"name": "Bug"}]}]})
+        return self._reply(200, [])
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with _StubJira._lock:
+            throttled = _StubJira.throttle > 0
+            if throttled:
+                _StubJira.throttle -= 1
+            _StubJira.posts.append((time.perf_counter(), 429 if throttled else 201))
+        if throttled:
+            return self._reply(429, {"errorMessages": ["Rate limit exceeded"]}, {"Retry-After": _StubJira.retry_after})
+        if self.path.endswith("/issue/bulk"):
+            issues = []
+            for _ in body.get("issueUpdates", []):
+                _StubJira.counter += 1
+                issues.append({"id": str(_StubJira.counter), "key": f"TD-{_StubJira.counter}", "self": "stub"})
+            return self._reply(201, {"issues": issues, "errors": []})
+        _StubJira.counter += 1
+        return self._reply(201, {"id": str(_StubJira.counter), "key": f"TD-{_StubJira.counter}", "self": "stub"})
+
+
+def start_stub_jira() -> ThreadingHTTPServer:
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _StubJira)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+# --------------------------- measurement ---------------------------
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+
+def measure(fn, iterations: int, input_bytes: int = 0, warmup: int = 1, trace_memory: bool = True) -> dict:
+    for _ in range(warmup):
+        fn()
+    lat = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    total = sum(lat)
+    out = {
+        "iterations": iterations,
+        "p50_ms": round(_pct(lat, 50) * 1000, 3),
+        "p90_ms": round(_pct(lat, 90) * 1000, 3),
+        "p99_ms": round(_pct(lat, 99) * 1000, 3),
+        "ops_per_sec": round(iterations / total, 2) if total else None,
+    }
+    if input_bytes:
+        out["input_bytes"] = input_bytes
+        out["mb_per_sec"] = round(input_bytes * iterations / total / 1e6, 2) if total else None
+    if trace_memory:
+        # separate pass: tracemalloc slows allocation-heavy code down too much to time under it
+        tracemalloc.start()
+        fn()
+        out["peak_py_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    return out
+
+
+# --------------------------- suites ---------------------------
+
+def stage_benchmarks(files: dict, iterations: int) -> dict:
+    from parsers.pdf_reader import read_pdf_bytes
+    from parsers.docx_reader import read_docx_bytes
+    from parsers.html_reader import read_html_bytes
+    from parsers.heuristics import parse_text
+    from utils.ac_rules import normalize_ac
+    import jira_client
+
+    res = {}
+    pdf, docx, html, md = files["spec.pdf"], files["spec.docx"], files["spec.html"], files["spec.md"]
+    res["read_pdf_bytes"] = measure(lambda: read_pdf_bytes(pdf, 10_000), iterations, len(pdf))
+    res["read_docx_bytes"] = measure(lambda: read_docx_bytes(docx), iterations, len(docx))
+    res["read_html_bytes"] = measure(lambda: read_html_bytes(html), iterations, len(html))
+
+    if "spec_scanned.pdf" in files and shutil.which("tesseract") and shutil.which("pdftoppm"):
+        from parsers.ocr_reader import run_ocr_on_pdf
+        scanned = files["spec_scanned.pdf"]
+        res["run_ocr_on_pdf"] = measure(lambda: run_ocr_on_pdf(scanned, max_pages=10_000, workers=0),
+                                        max(1, iterations // 10), len(scanned), warmup=0, trace_memory=False)
+    else:
+        res["run_ocr_on_pdf"] = {"skipped": "tesseract/pdftoppm not installed"}
+
+    raw = md.decode()
+    opts = {"priority_map": {}, "max_chars": 400000}
+    res["parse_text"] = measure(lambda: parse_text(raw, "TD", [], [], opts), iterations, len(md))
+
+    ac_lines = [ln for ln in raw.splitlines() if ln.startswith(("Given", "When", "Then", "And")) or not ln]
+    res["normalize_ac"] = measure(lambda: normalize_ac(ac_lines), iterations)
+
+    story, _ = parse_text(raw, "TD", [], [], opts)
+    res["_to_adf"] = measure(lambda: jira_client._to_adf(story["description"], story["acceptance_criteria"]),
+                             iterations)
+    return res
+
+
+def endpoint_benchmarks(files: dict, iterations: int) -> dict:
+    from fastapi.testclient import TestClient
+    import app
+
+    res = {}
+    with TestClient(app.app) as c:
+        def post(path, name, extra=None):
+            data = {"project_key": "TD", **(extra or {})}
+            r = c.post(path, files={"file": (name, files[name])}, data=data)
+            r.raise_for_status()
+
+        for name in ("spec.md", "spec.pdf", "spec.docx"):
+            res[f"POST /convert {name}"] = measure(
+                lambda: post("/convert", name, {"raw_text": "none"}), iterations, len(files[name]),
+                trace_memory=False)
+        res["POST /jira/create spec.md"] = measure(
+            lambda: post("/jira/create", "spec.md"), iterations, len(files["spec.md"]), trace_memory=False)
+    return res
+
+
+def retry_check(throttled: int = 2, retry_after: float = 0.2) -> dict:
+    """
+    Against the stub in throttle mode: create_issue() and create_issues_bulk()
+    must retry through `throttled` 429s, waiting at least Retry-After between
+    attempts, and give up with the 429 once JIRA_MAX_RETRIES are spent.
+    """
+    import jira_client
+    from parsers.heuristics import parse_text
+
+    story, _ = parse_text("Title: Retry check\nAs a user I want retries", "TD", [], [],
+                          {"priority_map": {}, "max_chars": 10000})
+    cf = {"story_points": "", "epic_link": "", "epic_name": ""}
+
+    def run(n, fn):
+        _StubJira.posts, _StubJira.throttle, _StubJira.retry_after = [], n, str(retry_after)
+        t0 = time.perf_counter()
+        try:
+            out = fn()
+        except Exception as e:
+            out = e
+        return out, time.perf_counter() - t0, list(_StubJira.posts)
+
+    res, failures = {}, []
+    cases = {
+        "create_issue": (throttled, lambda: jira_client.create_issue(dict(story), customfields=cf)),
+        "create_issues_bulk": (throttled, lambda: jira_client.create_issues_bulk([dict(story)] * 3, customfields=cf)),
+        "gives_up": (jira_client.S.JIRA_MAX_RETRIES + 1, lambda: jira_client.create_issue(dict(story), customfields=cf)),
+    }
+    for name, (n, fn) in cases.items():
+        out, elapsed, posts = run(n, fn)
+        gaps = [b[0] - a[0] for a, b in zip(posts, posts[1:])]
+        codes = [code for _, code in posts]
+        if name == "gives_up":
+            want = [429] * (jira_client.S.JIRA_MAX_RETRIES + 1)
+            ok = codes == want and isinstance(out, Exception) and "429" in str(out)
+        else:
+            created = out if isinstance(out, list) else [out]
+            ok = codes == [429] * n + [201] and all(isinstance(c, dict) and c.get("key") for c in created)
+        if not ok:
+            failures.append(f"{name}: expected {n} x 429 then a retry outcome, got {codes} / {out!r}")
+        if any(g < retry_after * 0.95 for g in gaps):
+            failures.append(f"{name}: retried before Retry-After ({retry_after}s): gaps {gaps}")
+        res[name] = {"posts": codes, "gaps_ms": [round(g * 1000, 1) for g in gaps],
+                     "elapsed_ms": round(elapsed * 1000, 1)}
+    _StubJira.throttle = 0
+    res["failures"] = failures
+    return res
+
+
+# --------------------------- regression check ---------------------------
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Stages whose p50 got slower than baseline by more than `threshold` (a fraction)."""
+    regressions = []
+    for suite in ("stages", "endpoints"):
+        for name, cur in current.get(suite, {}).items():
+            base = baseline.get(suite, {}).get(name)
+            if not base or "p50_ms" not in cur or "p50_ms" not in base or not base["p50_ms"]:
+                continue
+            ratio = cur["p50_ms"] / base["p50_ms"]
+            if ratio > 1 + threshold:
+                regressions.append({"suite": suite, "stage": name, "baseline_p50_ms": base["p50_ms"],
+                                    "p50_ms": cur["p50_ms"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, default=200000)
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--iterations", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--no-endpoints", action="store_true")
+    ap.add_argument("--no-scanned", action="store_true")
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--threshold", type=float, default=0.15)
+    args = ap.parse_args(argv)
+
+    # settings are read at import time, so the stub must be wired in before app/jira_client load
+    stub = start_stub_jira()
+    os.environ.update({
+        "JIRA_BASE": f"http://127.0.0.1:{stub.server_port}",
+        "JIRA_EMAIL": "bench@example.com",
+        "JIRA_API_TOKEN": "bench",
+        "EXTRACT_CACHE_ENABLED": "false",
+        "ENABLE_HTML": "true",
+    })
+
+    files = corpus.build(args.chars, args.pages, args.seed, scanned=not args.no_scanned)
+    result = {
+        "meta": {"python": platform.python_version(), "cpus": os.cpu_count(),
+                 "chars": args.chars, "pages": args.pages, "iterations": args.iterations,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "stages": stage_benchmarks(files, args.iterations),
+    }
+    if not args.no_endpoints:
+        result["endpoints"] = endpoint_benchmarks(files, args.iterations)
+    result["retry"] = retry_check()
+    result["meta"]["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    code = 0
+    if args.baseline:
+        with open(args.baseline) as fh:
+            result["regressions"] = compare(result, json.load(fh), args.threshold)
+        code = 2 if result["regressions"] else 0
+    if result["retry"]["failures"]:
+        code = 1
+
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
+    stub.shutdown()
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# bench/serve_bench.py
+"""
+The production launcher under load: shared cache and a graceful reload.
+
+    python -m bench.serve_bench --workers 2 --clients 4 --seconds 20
+
+Starts `python -m serve` on a free port with a fresh state directory, then:
+- posts one document repeatedly: with the SQLite cache shared, only the first
+  request may miss, whichever worker the later ones land on
+- keeps `--clients` clients posting distinct documents to /convert, submits a
+  background job, and sends SIGHUP a third of the way in; every request and
+  the job must succeed (503s from admission control are counted, not failed)
+  and all worker processes must have been replaced
+Exits 1 on any failure.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from bench import corpus
+from bench.health_latency import _free_port
+
+
+def _children(pid: int):
+    out = set()
+    for d in os.listdir("/proc"):
+        if d.isdigit():
+            try:
+                with open(f"/proc/{d}/stat") as fh:
+                    ppid = int(fh.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                out.add(int(d))
+    return out
+
+
+def _wait_up(base: str, proc) -> None:
+    for _ in range(300):
+        if proc.poll() is not None:
+            raise SystemExit(f"serve exited with {proc.returncode}")
+        try:
+            requests.get(f"{base}/health", timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise SystemExit("serve did not come up")
+
+
+def _doc(i: int, chars: int) -> bytes:
+    return corpus.make_md(corpus.spec_lines(chars, seed=i))
+
+
+def shared_cache(base: str, n: int) -> dict:
+    doc = _doc(0, 20000)
+    tiers = []
+    with requests.Session() as s:
+        for _ in range(n):
+            # a new connection each time, so requests spread over the workers
+            r = requests.post(f"{base}/convert", files={"file": ("spec.md", doc)},
+                              data={"project_key": "TD", "raw_text": "none"}, timeout=60)
+            r.raise_for_status()
+            tiers.append(r.json()["diagnostics"]["extract_cache"]["tier"])
+    return {"requests": n, "misses": tiers.count(None), "memory": tiers.count("memory"),
+            "disk": tiers.count("disk")}
+
+
+def reload_under_load(base: str, pid: int, clients: int, seconds: float, chars: int) -> dict:
+    stop = threading.Event()
+    counts = {"ok": 0, "busy": 0, "error": 0}
+    errors = []
+    lock = threading.Lock()
+    seq = iter(range(1, 10**9))
+
+    def client():
+        with requests.Session() as s:
+            while not stop.is_set():
+                with lock:
+                    i = next(seq)
+                try:
+                    r = s.post(f"{base}/convert", files={"file": (f"spec{i}.md", _doc(i, chars))},
+                               data={"project_key": "TD", "raw_text": "none"}, timeout=120)
+                    key = "ok" if r.ok else "busy" if r.status_code == 503 else "error"
+                    if key == "error":
+                        errors.append(f"{r.status_code} {r.text[:120]}")
+                except requests.RequestException as e:
+                    key = "error"
+                    errors.append(repr(e)[:160])
+                with lock:
+                    counts[key] += 1
+                if key == "busy":
+                    time.sleep(0.2)
+
+    before = _children(pid)
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds / 3)
+    job = requests.post(f"{base}/jobs/convert", files={"file": ("job.md", _doc(0, chars * 20))},
+                        data={"project_key": "TD"}, timeout=60).json()
+    os.kill(pid, signal.SIGHUP)
+    time.sleep(seconds * 2 / 3)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    status = None
+    for _ in range(600):
+        status = requests.get(f"{base}/jobs/{job['id']}", timeout=10).json()
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.2)
+    after = _children(pid)
+    return {**counts, "errors": errors[:5], "job": status["status"], "job_error": status.get("error"),
+            "children_replaced": len(before - after)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--clients", type=int, default=4)
+    ap.add_argument("--seconds", type=float, default=20)
+    ap.add_argument("--chars", type=int, default=50000)
+    args = ap.parse_args(argv)
+
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    state = tempfile.mkdtemp()
+    env = dict(os.environ, SERVE_STATE_DIR=state, SERVE_GRACEFUL_TIMEOUT="60")
+    proc = subprocess.Popen([sys.executable, "-m", "serve", "--workers", str(args.workers),
+                             "--port", str(port), "--log-level", "warning"], env=env)
+    try:
+        _wait_up(base, proc)
+        time.sleep(1)              # let every worker finish starting
+        result = {"shared_cache": shared_cache(base, 4 * args.workers)}
+        result["reload"] = reload_under_load(base, proc.pid, args.clients, args.seconds, args.chars)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=180)
+    print(json.dumps(result, indent=2))
+    r = result["reload"]
+    ok = (result["shared_cache"]["misses"] == 1 and r["error"] == 0 and r["ok"] > 0
+          and r["job"] == "done" and r["children_replaced"] >= args.workers)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
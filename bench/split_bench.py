@@ -0,0 +1,81 @@
+# bench/split_bench.py
+"""
+One multi-story document vs the same stories uploaded one by one.
+
+    python -m bench.split_bench --stories 100 --chars 4000 --iterations 5
+
+Builds `--stories` corpus specs (each starts with its own Title: line) and
+joins them into one document, as Markdown and as a text-layer PDF. Both go
+through the app (TestClient, extraction cache off): "split" is one
+POST /convert/split, "by_hand" one POST /convert per piece. Also checks that
+each split story equals parse_text() of its piece; exits 1 if any differs.
+"""
+import argparse
+import json
+import os
+import sys
+
+from bench import corpus
+from bench.run import measure
+from parsers import parse_text, parse_stories
+
+OPTS = {"priority_map": {}, "split_heading_level": 0}
+
+
+def pieces(stories: int, chars: int):
+    return [corpus.spec_lines(chars, seed) for seed in range(1, stories + 1)]
+
+
+def check(docs) -> dict:
+    whole = [ln for d in docs for ln in d + [""]]
+    split = parse_stories("\n".join(whole), "TD", [], [], OPTS)
+    alone = [parse_text("\n".join(d), "TD", [], [], OPTS) for d in docs]
+    bad = [i for i, ((s, _), (a, _)) in enumerate(zip(split, alone)) if s != a]
+    return {"stories": len(split), "expected": len(docs), "mismatched": bad}
+
+
+def _pdf(lines):
+    return corpus.make_text_pdf(lines, pages=max(1, min(50, len(lines) // 150)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stories", type=int, default=100)
+    ap.add_argument("--chars", type=int, default=4000)
+    ap.add_argument("--iterations", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    docs = pieces(args.stories, args.chars)
+    result = {"check": check(docs)}
+    whole = [ln for d in docs for ln in d + [""]]
+
+    os.environ.update({"EXTRACT_CACHE_ENABLED": "false", "SPLIT_HEADING_LEVEL": "0"})
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    with TestClient(app_module.app) as client:
+        for fmt, make in (("md", corpus.make_md), ("pdf", _pdf)):
+            doc = make(whole)
+            parts = [make(d) for d in docs]
+            form = {"project_key": "TD", "raw_text": "none"}
+
+            def split():
+                r = client.post("/convert/split", files={"file": ("prd." + fmt, doc)}, data=form)
+                assert r.status_code == 200 and len(r.json()["stories"]) == len(parts), r.text[:200]
+
+            def by_hand():
+                for p in parts:
+                    r = client.post("/convert", files={"file": ("story." + fmt, p)}, data=form)
+                    assert r.status_code == 200, r.text[:200]
+
+            s = measure(split, args.iterations, len(doc), trace_memory=False)
+            h = measure(by_hand, args.iterations, sum(map(len, parts)), trace_memory=False)
+            result[fmt] = {"split": s, "by_hand": h, "requests": {"split": 1, "by_hand": len(parts)},
+                           "speedup": round(h["p50_ms"] / s["p50_ms"], 2)}
+    print(json.dumps(result, indent=2))
+    ok = result["check"]["stories"] == result["check"]["expected"] and not result["check"]["mismatched"]
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench/startup.py
+"""
+Cold-start cost of the top-level modules.
+
+    python -m bench.startup --runs 5 --out startup.json
+
+Each target is imported in a fresh interpreter under `-X importtime`; reported
+are the median cumulative import time of the target, the slowest transitive
+imports, wall time to a ready interpreter and peak RSS. "app+warm_up" also
+imports every document reader, i.e. what WARM_UP=true pays at startup.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = {
+    "config": "import config",
+    "parsers": "import parsers",
+    "app": "import app",
+    "app+warm_up": "import app, parsers; parsers.warm_up()",
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+_RSS = "import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def _once(code: str) -> dict:
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", f"{code}\n{_RSS}"],
+                       capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    wall = time.perf_counter() - t0
+    if p.returncode:
+        raise RuntimeError(p.stderr.strip().splitlines()[-1])
+    top, cum = {}, 0
+    for ln in p.stderr.splitlines():
+        m = _LINE.match(ln)
+        if not m:
+            continue
+        us, name = int(m.group(2)), m.group(4)
+        top[name] = max(top.get(name, 0), us)
+        if len(m.group(3)) == 1:          # direct import of the -c snippet
+            cum += us
+    return {"wall_s": wall, "import_us": cum, "rss_kb": int(p.stdout.split()[-1]), "modules": top}
+
+
+def run(runs: int) -> dict:
+    out = {}
+    for name, code in TARGETS.items():
+        samples = [_once(code) for _ in range(runs)]
+        last = samples[-1]["modules"]
+        slow = sorted(last.items(), key=lambda kv: -kv[1])[:10]
+        out[name] = {
+            "import_ms": round(statistics.median(s["import_us"] for s in samples) / 1000, 1),
+            "wall_ms": round(statistics.median(s["wall_s"] for s in samples) * 1000, 1),
+            "peak_rss_mb": round(statistics.median(s["rss_kb"] for s in samples) / 1024, 1),
+            "modules_loaded": len(last),
+            "slowest_ms": {k: round(v / 1000, 1) for k, v in slow},
+        }
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--out")
+    args = ap.parse_args(argv)
+    text = json.dumps(run(args.runs), indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
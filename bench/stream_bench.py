@@ -0,0 +1,206 @@
+# bench/stream_bench.py
+"""
+Streamed extract+parse under the default settings (extraction cache on, OCR on).
+
+    python -m bench.stream_bench --chars 400000 --pages 40 --docs 300
+
+For md/html/docx/PDF inputs, runs cached_extract_parse() as bulk does (a miss,
+then a hit) and extract_parse_file() as the API does, and checks the stories and
+the cached text against extract_text() + parse_text(). Then checks the PDF OCR
+merge chunk by chunk against the previous whole-document implementation on
+`--docs` random page layouts (OCR faked: short, empty and missing pages), and
+reports the peak traced memory of streaming a large text PDF against
+extracting it whole first. Exits non-zero on any mismatch.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench.corpus import spec_lines, make_md, make_html, make_docx, make_text_pdf
+from config import get_settings, ocr_options
+from parsers import core, extract_text, extract_parse, extract_parse_file, parse_text, structure_hints
+from parsers import ExtractionCache, cached_extract_parse
+
+S = get_settings()
+
+
+def default_opts() -> dict:
+    # what app/bulk pass, from the default Settings
+    return dict(
+        enable_html=S.ENABLE_HTML, html_engine=S.HTML_EXTRACTOR, max_pages=S.MAX_PAGES,
+        enable_ocr=S.ENABLE_OCR, ocr_lang=S.OCR_LANG,
+        ocr_workers=1, ocr_window=S.OCR_WINDOW,
+        ocr_min_chars=S.OCR_MIN_PAGE_CHARS, ocr_max_pages=S.OCR_MAX_PAGES,
+        ocr_opts=ocr_options(S),
+    )
+
+
+def parse_options() -> dict:
+    return {"priority_map": {}, "max_chars": S.MAX_TEXT_CHARS, "ac_near_duplicates": S.AC_NEAR_DUPLICATES}
+
+
+def reference_pdf_pages_with_ocr(file_bytes, pages, info, ocr_lang, ocr_workers, ocr_window,
+                                 ocr_min_chars, ocr_max_pages, file_path, progress=None, ocr_opts=None) -> str:
+    # the whole-document OCR merge before pages were streamed; kept verbatim as the oracle
+    pages = list(pages)
+    need = [i for i, t in enumerate(pages, 1) if len(t.strip()) < ocr_min_chars][:ocr_max_pages]
+    info["ocr_pages"] = need
+    if not need:
+        return "\n".join(pages).strip()
+
+    info["ocr"] = True
+    try:
+        ocr = core._load("ocr_reader", "ocr_pdf_pages")(
+            file_bytes, need, ocr_lang, ocr_workers, ocr_window, file_path, progress, ocr_opts)
+    except Exception as e:
+        info["ocr_error"] = str(e)
+        text = "\n".join(pages).strip()
+        return text or f"[PDF OCR failed: {e}]"
+
+    missing = [i for i in need if i not in ocr]
+    if missing:
+        info["ocr_failed_pages"] = missing
+    out, prev_ocr = [], None
+    for i, t in enumerate(pages, 1):
+        is_ocr = i in ocr
+        if is_ocr:
+            if not ocr[i]:
+                continue
+            t = f"[Page {i} OCR]\n{ocr[i]}"
+        if prev_ocr is not None:
+            out.append("\n\n" if (is_ocr or prev_ocr) else "\n")
+        out.append(t)
+        prev_ocr = is_ocr
+    return "".join(out).strip()
+
+
+def check_defaults(chars: int, pages: int, failures: list) -> dict:
+    lines = spec_lines(chars)
+    blank = [""] * (-(-len(lines) // pages))
+    docs = {
+        "spec.md": make_md(lines), "spec.html": make_html(lines), "spec.docx": make_docx(lines),
+        "spec.pdf": make_text_pdf(lines, pages),
+        # a blank page goes through the default OCR fallback (or its error path without poppler)
+        "spec_blank_page.pdf": make_text_pdf(lines[:len(blank)] + blank + lines[len(blank):], pages + 1),
+    }
+    opts, popts = default_opts(), parse_options()
+    cache = ExtractionCache(S.EXTRACT_CACHE_MAX_BYTES) if S.EXTRACT_CACHE_ENABLED else None
+    out = {}
+    with tempfile.TemporaryDirectory() as d:
+        for name, b in docs.items():
+            info = {}
+            text = extract_text(name, b, info=info, **opts)
+            want = parse_text(text, "TD", [], [], options={**popts, "structure_hints": structure_hints(name)})
+            path = os.path.join(d, name)
+            with open(path, "wb") as fh:
+                fh.write(b)
+
+            got = {}
+            # degraded OCR text (an OCR error or failed pages) is never cached, so it misses again
+            cacheable = "ocr_error" not in info and not info.get("ocr_failed_pages")
+            for tier in ("miss", "hit" if cacheable else "miss"):
+                parsed, kept, diag = cached_extract_parse(cache, name, b, parse_text, "TD", [], [],
+                                                          options=popts, keep_text=True, file_path=path, **opts)
+                got[tier] = (diag.get("extract_cache") or {}).get("tier")
+                if cache is not None and (got[tier] is None) != (tier == "miss"):
+                    failures.append(f"{name}: expected a cache {tier}")
+                if parsed != want:
+                    failures.append(f"{name}: cached_extract_parse ({tier}) parses differently")
+                if kept != text:
+                    failures.append(f"{name}: cached_extract_parse ({tier}) text differs from extract_text")
+            parsed, finfo, kept = extract_parse_file(name, path, parse_text, "TD", [], [],
+                                                     options=popts, keep_text=True, **opts)
+            if parsed != want or kept != text:
+                failures.append(f"{name}: extract_parse_file differs from extract_text + parse_text")
+            if finfo != info:
+                failures.append(f"{name}: extract info differs: {finfo} != {info}")
+            out[name] = {"extract": info, "cache": got}
+    return out
+
+
+def check_ocr_merge(docs: int, seed: int, failures: list) -> int:
+    rng = random.Random(seed)
+    real_load = core._load
+    checked = 0
+    try:
+        for n in range(docs):
+            pages = [rng.choice(["", " ", "x" * rng.randint(1, 30), f"page {n} " + "word " * rng.randint(0, 40)])
+                     for _ in range(rng.randint(1, 30))]
+            ocr = {i: rng.choice(["", "scanned text", f"ocr {i}\nline two"]) for i in range(1, len(pages) + 1)
+                   if rng.random() < 0.85}
+            calls = []
+
+            def fake_load(module, attr):
+                if (module, attr) == ("ocr_reader", "ocr_pdf_pages"):
+                    def ocr_pdf_pages(b, want, *a):
+                        calls.append(list(want))
+                        return {i: ocr[i] for i in want if i in ocr}
+                    return ocr_pdf_pages
+                if (module, attr) == ("bench", "pages"):
+                    return lambda b, max_pages, progress: iter(pages)
+                return real_load(module, attr)
+
+            core._load = fake_load
+            window, min_chars, max_pages = rng.randint(1, 6), rng.choice([1, 5, 20]), rng.randint(0, 12)
+            want_info = {}
+            want = reference_pdf_pages_with_ocr(None, pages, want_info, "eng", 1, window, min_chars, max_pages, None)
+            calls.clear()
+            got_info = {"ocr": False}
+            chunks = list(core._pdf_chunks(None, "bench", "pages", got_info, enable_ocr=True, ocr_window=window,
+                                           ocr_min_chars=min_chars, ocr_max_pages=max_pages))
+            got = "\n".join(chunks).strip()
+            want_info.setdefault("ocr", False)
+            if got != want or got_info != want_info:
+                failures.append(f"ocr merge doc {n}: {got_info} vs {want_info}")
+            if any(len(c) > window for c in calls) or sum(calls, []) != want_info["ocr_pages"]:
+                failures.append(f"ocr merge doc {n}: OCR calls {calls} don't cover {want_info['ocr_pages']}")
+            checked += 1
+    finally:
+        core._load = real_load
+    return checked
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, default=400000)
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--docs", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    failures = []
+    t0 = time.perf_counter()
+    defaults = check_defaults(args.chars, args.pages, failures)
+    merged = check_ocr_merge(args.docs, args.seed, failures)
+
+    b = make_text_pdf(spec_lines(args.chars), args.pages)
+    opts, popts = default_opts(), parse_options()
+    whole = lambda: parse_text(extract_text("spec.pdf", b, **opts), "TD", [], [], options=popts)
+    streamed = lambda: extract_parse("spec.pdf", b, parse_text, "TD", [], [], options=popts, **opts)
+    kept = lambda: extract_parse("spec.pdf", b, parse_text, "TD", [], [], options=popts, keep_text=True, **opts)
+    print(json.dumps({
+        "settings": {"extract_cache": S.EXTRACT_CACHE_ENABLED, "ocr": S.ENABLE_OCR},
+        "defaults": defaults, "ocr_merge_docs": merged,
+        "peak_kib": {"whole": peak_kib(whole), "streamed": peak_kib(streamed), "streamed_keep_text": peak_kib(kept)},
+        "seconds": round(time.perf_counter() - t0, 2),
+        "failures": failures[:20],
+    }, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
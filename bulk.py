@@ -0,0 +1,174 @@
+# bulk.py
+import os
+import mmap
+import asyncio
+import hashlib
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Callable
+
+from config import get_settings, ocr_options
+import metrics
+import responses
+from models import BulkConvertRequest, BulkConvertItem
+from parsers import parse_text, decode_base64, ExtractionCache, cached_extract_parse
+
+S = get_settings()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache: Optional[ExtractionCache] = None
+
+
+def _worker_cache() -> Optional[ExtractionCache]:
+    # per-process; only the SQLite tier (if configured) is shared between workers
+    global _cache
+    if _cache is None and S.EXTRACT_CACHE_ENABLED:
+        _cache = ExtractionCache(S.EXTRACT_CACHE_MAX_BYTES, S.EXTRACT_CACHE_DB or None,
+                                 S.EXTRACT_CACHE_DB_MAX_BYTES, S.EXTRACT_CACHE_TTL)
+    return _cache
+
+
+def _opts(path: Optional[str]) -> dict:
+    # parallelism comes from the bulk pool, so OCR stays serial inside a worker
+    return dict(
+        enable_html=S.ENABLE_HTML, html_engine=S.HTML_EXTRACTOR, max_pages=S.MAX_PAGES,
+        enable_ocr=S.ENABLE_OCR, ocr_lang=S.OCR_LANG,
+        ocr_workers=1, ocr_window=S.OCR_WINDOW, file_path=path,
+        ocr_min_chars=S.OCR_MIN_PAGE_CHARS, ocr_max_pages=S.OCR_MAX_PAGES,
+        ocr_opts=ocr_options(S),
+    )
+
+
+def _extract_parse(name: str, b, path: Optional[str], project_key: str, include_raw_text: bool,
+                   labels: List[str], comps: List[str], stages: list):
+    # pages are parsed as they are extracted; the text is only joined for the cache or raw_text
+    options = {"priority_map": {}, "max_chars": S.MAX_TEXT_CHARS, "ac_near_duplicates": S.AC_NEAR_DUPLICATES}
+    ((story, diag), raw, extract_diag), wall, cpu = metrics.timed_call(
+        cached_extract_parse, _worker_cache(), name, b, parse_text, project_key, labels, comps,
+        options=options, keep_text=include_raw_text, **_opts(path))
+    stages.append(("extract_parse", wall, cpu))
+    diag.update(extract_diag)
+    return story, diag, raw
+
+
+def convert_one(index: int, name: str, src: Optional[str], mode: str,
+                project_key: str, include_raw_text: bool = True,
+                default_labels: Optional[List[str]] = None,
+                default_components: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Extract + parse one bulk item. Never raises; errors are returned per item.
+    Runs in a pool process: stage timings come back as "stages" for record_item().
+    """
+    try:
+        if src is None:
+            raise ValueError("no file content for this filename")
+        stages: list = []
+        args = (project_key, include_raw_text, default_labels or [], default_components or [], stages)
+        if mode == "base64":
+            b = decode_base64(src)
+            digest = hashlib.sha256(b).hexdigest()
+            story, diag, raw = _extract_parse(name, b, None, *args)
+        else:
+            # map the file instead of reading it; OCR can then use the path directly
+            with open(src, "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    digest = hashlib.sha256(b"").hexdigest()
+                    story, diag, raw = _extract_parse(name, b"", None, *args)
+                else:
+                    with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        digest = hashlib.sha256(mm).hexdigest()
+                        story, diag, raw = _extract_parse(name, mm, src, *args)
+        result = {"story": story, "raw_text": raw if include_raw_text else None, "diagnostics": diag}
+        # content_hash is for the conversion history; BulkConvertItem leaves it out
+        return {"index": index, "filename": name, "result": result, "error": None, "content_hash": digest,
+                "stages": stages}
+    except Exception as e:
+        return {"index": index, "filename": name, "result": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def record_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    In the API process: record a convert_one() item's stages and extraction in
+    /metrics (the pool process's own series are never served) and fill in its
+    diagnostics["timings"].
+    """
+    timings: dict = {}
+    for stage, wall, cpu in item.pop("stages", ()):
+        metrics.record(timings, stage, wall, cpu)
+    if item["result"] is not None:
+        diag = item["result"]["diagnostics"]
+        info = diag.get("extract")
+        if info is not None:       # not on a cache hit
+            metrics.EXTRACTIONS.inc(info.get("extractor", "unknown"), "true" if info.get("ocr") else "false")
+        diag["timings"] = timings
+    return item
+
+
+def _include_raw(payload: BulkConvertRequest) -> bool:
+    return payload.include_raw_text and (not payload.fields or "raw_text" in payload.fields)
+
+
+def item_include(payload: BulkConvertRequest) -> Optional[dict]:
+    """pydantic `include` for one BulkConvertItem under payload.fields, or None for everything."""
+    if not payload.fields:
+        return None
+    return {"index": True, "filename": True, "error": True, "result": set(payload.fields)}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, S.BULK_CONCURRENCY or os.cpu_count() or 1))
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def convert_many(payload: BulkConvertRequest,
+                 default_labels: Optional[List[str]] = None,
+                 default_components: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Blocking variant: convert every item on the pool, results in input order."""
+    futs = []
+    for i, name in enumerate(payload.filenames):
+        src = payload.files[i] if i < len(payload.files) else None
+        futs.append(get_pool().submit(
+            convert_one, i, name, src, payload.mode, payload.project_key,
+            _include_raw(payload), default_labels, default_components,
+        ))
+    return [record_item(f.result()) for f in futs]
+
+
+async def stream_bulk_convert(payload: BulkConvertRequest,
+                              on_item: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+                              ) -> AsyncIterator[bytes]:
+    """Yields one NDJSON line per item, in completion order; `on_item` sees each item first."""
+    loop = asyncio.get_running_loop()
+    limit = max(1, S.BULK_CONCURRENCY or os.cpu_count() or 1)
+    if payload.concurrency:
+        limit = min(limit, payload.concurrency)
+    sem = asyncio.Semaphore(limit)
+
+    async def run(i: int, name: str) -> Dict[str, Any]:
+        src = payload.files[i] if i < len(payload.files) else None
+        job = partial(convert_one, i, name, src, payload.mode,
+                      payload.project_key, _include_raw(payload))
+        async with sem:
+            return record_item(await loop.run_in_executor(get_pool(), job))
+
+    include = item_include(payload)
+    tasks = [asyncio.ensure_future(run(i, n)) for i, n in enumerate(payload.filenames)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            item = await fut
+            if on_item is not None:
+                await on_item(item)
+            yield responses.dumps(BulkConvertItem(**item).model_dump(mode="json", include=include)) + b"\n"
+    finally:
+        # client went away: drop everything that has not started yet
+        for t in tasks:
+            t.cancel()
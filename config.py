@@ -1,7 +1,4 @@
 # config.py
-from dotenv import load_dotenv, find_dotenv
-load_dotenv(find_dotenv(), override=True)
-
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,15 +13,110 @@ class Settings(BaseSettings):
     JIRA_EMAIL: str | None = None
     JIRA_API_TOKEN: str | None = None
 
+    # Jira HTTP client
+    JIRA_TIMEOUT: float = 30
+    JIRA_POOL_SIZE: int = 10               # keep-alive connections per host
+    JIRA_MAX_RETRIES: int = 4
+    JIRA_BACKOFF_BASE: float = 0.5         # seconds; doubled per attempt, full jitter
+    JIRA_BACKOFF_MAX: float = 30
+    JIRA_RATE_LIMIT: float = 10            # requests/s per process; 0 disables
+    JIRA_RATE_BURST: int = 20
+    JIRA_BULK_CHUNK: int = 50              # issues per /issue/bulk call (Jira max 50)
+    JIRA_BULK_PARALLEL: int = 4            # bulk calls in flight
+    JIRA_DESCRIPTION_LIMIT: int = 32000    # serialized ADF chars per description/comment (Jira rejects > 32767)
+    JIRA_DESCRIPTION_OVERFLOW: str = "comment"   # the rest of a longer one: comment | attachment | truncate
+    JIRA_OVERFLOW_MAX_COMMENTS: int = 10   # comment mode: anything past this many comments is dropped
+
+    # Jira metadata cache (seconds)
+    JIRA_FIELDS_TTL: float = 3600
+    JIRA_CREATEMETA_TTL: float = 3600
+    JIRA_USER_TTL: float = 600
+    JIRA_USER_CACHE_MAX: int = 5000        # users kept in memory (least recently used dropped); 0 -> no limit
+    JIRA_META_STALE: float = 86400         # serve stale + refresh in background within this window
+    JIRA_META_DB: str | None = None        # SQLite path shared by workers; memory only when unset
+
     # Default
     DEFAULT_ISSUETYPE: str = "Story"
 
     # Parsing / OCR
     ENABLE_HTML: bool = False
+    HTML_EXTRACTOR: str = "stream"         # stream | lxml | bs4 (the old BeautifulSoup path)
     ENABLE_OCR: bool = True
     OCR_LANG: str = "eng"
     MAX_PAGES: int = 50
     MAX_TEXT_CHARS: int = 400000
+    MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024   # /convert, /jira/create; 0 disables
+    RAW_TEXT_TRUNCATE_CHARS: int = 10000        # raw_text=truncated on /convert
+    OCR_WORKERS: int = 1                   # tesseract processes per extraction, nested in each pool worker; 1 -> serial
+    OCR_WINDOW: int = 4                    # pages rasterized per pdftoppm call
+    OCR_MIN_PAGE_CHARS: int = 20           # PDF pages with less text-layer text than this get OCR'd
+    OCR_MAX_PAGES: int = 10                # at most this many OCR'd pages per PDF
+    OCR_PREPROCESS: bool = False           # deskew/crop/scale/binarize pages before tesseract
+    OCR_TARGET_XHEIGHT: int = 20           # px; larger text is scaled down to this
+    OCR_DESKEW: bool = True
+    OCR_PAGE_PX: int = 2200                # rasterize PDF pages to ~this many px on the long side; 0 -> 200 dpi
+    OCR_DPI_MIN: int = 100
+    OCR_DPI_MAX: int = 300
+    OCR_PSM: int | None = None             # tesseract --psm / --oem; None -> tesseract default
+    OCR_OEM: int | None = None
+
+    # Extraction cache (keyed by file hash + extraction options)
+    EXTRACT_CACHE_ENABLED: bool = True
+    EXTRACT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EXTRACT_CACHE_DB: str | None = None    # SQLite path for a persistent tier
+    EXTRACT_CACHE_DB_MAX_BYTES: int = 1024 * 1024 * 1024  # text kept in that tier, oldest dropped first; 0 -> no limit
+    EXTRACT_CACHE_TTL: float = 30 * 86400  # seconds an entry stays in that tier; 0 -> forever
+
+    # Request execution
+    EXTRACT_WORKERS: int = 2               # process pool for /convert, /jira/create
+    EXTRACT_QUEUE_DEPTH: int = 8           # admitted requests waiting for a worker before 503
+    BUSY_RETRY_AFTER: int = 5              # seconds, sent with 503
+    DISCONNECT_POLL_SECONDS: float = 0.5
+    JIRA_THREADS: int = 8
+
+    # Background jobs (/jobs/*)
+    JOB_WORKERS: int = 2                   # own process pool, separate from EXTRACT_WORKERS
+    JOB_QUEUE_MAX: int = 100               # queued jobs before submit returns 503
+    JOB_TTL: float = 3600                  # seconds a finished job's result is kept
+    JOB_STORE_DB: str | None = None        # SQLite path; in memory when unset
+    JOB_DRAIN_SECONDS: float = 0           # on shutdown, let running/queued jobs finish for up to this long
+
+    # Idempotency-Key on Jira creates
+    IDEMPOTENCY_DB: str | None = None      # SQLite path; per-process in-memory DB when unset
+    IDEMPOTENCY_TTL: float = 86400         # seconds a stored create response is replayed
+
+    # Conversion history (/history); off unless HISTORY_DB is set
+    HISTORY_DB: str | None = None          # SQLite path (python -m serve sets one in SERVE_STATE_DIR)
+    HISTORY_TTL: float = 30 * 86400        # seconds a conversion is kept; 0 -> forever
+
+    # Responses
+    COMPRESS_MIN_BYTES: int = 1024         # gzip/zstd bodies at least this big (streams always); 0 disables
+    GZIP_LEVEL: int = 5
+    ZSTD_LEVEL: int = 3                    # zstd needs the `zstandard` package
+
+    # Production launcher (python -m serve); 0 -> sized from the CPUs
+    SERVE_HOST: str = "0.0.0.0"
+    SERVE_PORT: int = 8000
+    SERVE_WORKERS: int = 0                 # uvicorn worker processes
+    SERVE_CPUS: int = 0                    # CPU budget to split; 0 -> affinity / cgroup quota
+    SERVE_STATE_DIR: str = ".taskbench"    # shared SQLite files (extraction cache, jobs, idempotency, Jira metadata)
+    SERVE_GRACEFUL_TIMEOUT: float = 120    # seconds a stopping worker gets to finish in-flight work
+
+    # Startup
+    WARM_UP: bool = False                  # import all readers at startup / in pool workers
+
+    # Instrumentation
+    TRACE_LOG: bool = False                # per-request timing line on the "taskbench.trace" logger
+
+    # Bulk convert
+    BULK_CONCURRENCY: int = 4              # process pool size / items in flight; 0 -> cpu count
+
+    # Multi-story documents (/convert/split, /jira/create/split)
+    SPLIT_HEADING_LEVEL: int = 2           # headings at this level or above start a story; 0 -> Title: lines only
+    SPLIT_MAX_STORIES: int = 200           # more than this is rejected (422)
+
+    # Acceptance criteria
+    AC_NEAR_DUPLICATES: bool = False       # also drop items differing from an earlier one only in punctuation/spacing
 
     # Team-managed 
     SEND_PRIORITY: bool = False            
@@ -38,4 +130,16 @@ class Settings(BaseSettings):
 
 @lru_cache
 def get_settings() -> Settings:
+    # .env is read on first use, not at import, so importing config stays cheap
+    from dotenv import load_dotenv, find_dotenv
+    load_dotenv(find_dotenv(), override=True)
     return Settings()
+
+
+def ocr_options(s: Settings) -> dict:
+    """The OCR_* settings that change how pages are OCR'd, as passed to extract_text(ocr_opts=...)."""
+    return {
+        "preprocess": s.OCR_PREPROCESS, "target_xheight": s.OCR_TARGET_XHEIGHT, "deskew": s.OCR_DESKEW,
+        "page_px": s.OCR_PAGE_PX, "dpi_min": s.OCR_DPI_MIN, "dpi_max": s.OCR_DPI_MAX,
+        "psm": s.OCR_PSM, "oem": s.OCR_OEM,
+    }
@@ -0,0 +1,97 @@
+# executors.py
+import asyncio
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from config import get_settings
+from parsers import warm_up
+
+S = get_settings()
+
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+_io_pool: Optional[ThreadPoolExecutor] = None
+_inflight = 0
+
+
+def cpu_pool() -> ProcessPoolExecutor:
+    # extraction + parsing; sized separately from the uvicorn workers
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=max(1, S.EXTRACT_WORKERS),
+            initializer=warm_up if S.WARM_UP else None,
+        )
+    return _cpu_pool
+
+
+def io_pool() -> ThreadPoolExecutor:
+    # blocking Jira calls
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=max(1, S.JIRA_THREADS), thread_name_prefix="jira")
+    return _io_pool
+
+
+def shutdown() -> None:
+    global _cpu_pool, _io_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=True, cancel_futures=True)
+        _cpu_pool = None
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = None
+
+
+@contextmanager
+def admission():
+    """
+    Admit one CPU-bound request, or fail fast with 503 + Retry-After once
+    EXTRACT_WORKERS are busy and EXTRACT_QUEUE_DEPTH more are already waiting.
+    Only touched from the event loop thread, so a plain counter is enough.
+    """
+    global _inflight
+    if _inflight >= max(1, S.EXTRACT_WORKERS) + S.EXTRACT_QUEUE_DEPTH:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, retry later",
+            headers={"Retry-After": str(S.BUSY_RETRY_AFTER)},
+        )
+    _inflight += 1
+    try:
+        yield
+    finally:
+        _inflight -= 1
+
+
+def load() -> dict:
+    return {"inflight": _inflight, "capacity": max(1, S.EXTRACT_WORKERS) + S.EXTRACT_QUEUE_DEPTH}
+
+
+async def _until_done(request: Optional[Request], fut: asyncio.Future):
+    """Await `fut`; if the client disconnects first, cancel it (a no-op once it has started)."""
+    if request is None:
+        return await fut
+    while True:
+        done, _ = await asyncio.wait({fut}, timeout=S.DISCONNECT_POLL_SECONDS)
+        if done:
+            return fut.result()
+        if await request.is_disconnected():
+            fut.cancel()
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+async def run_cpu(request: Optional[Request], fn, *args, pool=None, **kwargs):
+    # `pool` overrides cpu_pool(), e.g. the job runner's own pool
+    loop = asyncio.get_running_loop()
+    fut = loop.run_in_executor(pool or cpu_pool(), partial(fn, *args, **kwargs))
+    return await _until_done(request, fut)
+
+
+async def run_io(request: Optional[Request], fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    fut = loop.run_in_executor(io_pool(), partial(fn, *args, **kwargs))
+    return await _until_done(request, fut)
@@ -0,0 +1,201 @@
+# history.py
+"""
+Conversion history: every story the API produces (/convert, the split, bulk
+and Jira-create variants, jobs) with the SHA-256 of its source file, project
+key, labels, epic link and, once created, its Jira key.
+
+One SQLite table holds the rows, with indexes for the lookups the /history
+endpoints offer: project, label (a side table), epic, Jira key and content
+hash. An FTS5 index over summary, description and acceptance criteria
+serves full-text search; on a SQLite built without FTS5 that search falls
+back to a LIKE scan.
+
+Listing is newest first with keyset pagination: a page ends with the id of
+its last row as the cursor, and the next page continues below that id.
+Offsets would rescan every skipped row, and keep shifting as new rows arrive.
+
+The app keeps a history only in a database file (HISTORY_DB), which every
+worker process shares; rows older than HISTORY_TTL (30 days by default) are
+purged as new ones are recorded.
+"""
+import json
+import time
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+log = logging.getLogger("taskbench.history")
+
+MAX_PAGE = 200
+# light columns for listings; story and diagnostics only come with get()
+_ITEM_COLS = ("id", "created", "source", "filename", "content_hash", "project_key", "summary",
+              "labels", "epic_link", "jira_key", "jira_self")
+# story fields kept in their own columns (searchable) rather than in the story JSON
+_SPLIT = ("summary", "description", "acceptance_criteria")
+
+
+def _fts_query(q: str) -> str:
+    # every word must appear; quoted so "-", ":" etc. aren't FTS operators; a trailing * is a prefix search
+    terms = []
+    for w in q.split():
+        prefix = w.endswith("*") and len(w) > 1
+        w = w.rstrip("*") if prefix else w
+        terms.append('"' + w.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _like_pattern(w: str) -> str:
+    # substring match for the no-FTS5 fallback; "%", "_" and backslashes in the word are literal
+    return "%" + w.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class HistoryStore:
+    def __init__(self, db_path: Optional[str] = None, ttl: float = 0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False)
+        if db_path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS conversions ("
+            " id INTEGER PRIMARY KEY, created REAL NOT NULL, source TEXT NOT NULL, filename TEXT,"
+            " content_hash TEXT, project_key TEXT NOT NULL, summary TEXT NOT NULL, description TEXT NOT NULL,"
+            " acceptance TEXT NOT NULL, labels TEXT NOT NULL, epic_link TEXT, jira_key TEXT, jira_self TEXT,"
+            " story TEXT NOT NULL, diagnostics TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS conversions_project ON conversions (project_key, id);"
+            "CREATE INDEX IF NOT EXISTS conversions_epic ON conversions (epic_link, id);"
+            "CREATE INDEX IF NOT EXISTS conversions_jira_key ON conversions (jira_key, id);"
+            "CREATE INDEX IF NOT EXISTS conversions_hash ON conversions (content_hash, id);"
+            "CREATE INDEX IF NOT EXISTS conversions_created ON conversions (created);"
+            "CREATE TABLE IF NOT EXISTS conversion_labels ("
+            " label TEXT NOT NULL, conversion_id INTEGER NOT NULL, PRIMARY KEY (label, conversion_id))"
+            " WITHOUT ROWID;"
+        )
+        self.fts = True
+        try:
+            # external content: the text lives in `conversions`, the triggers keep the index in step
+            self._db.executescript(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS conversions_fts USING fts5("
+                " summary, description, acceptance, content='conversions', content_rowid='id');"
+                "CREATE TRIGGER IF NOT EXISTS conversions_ai AFTER INSERT ON conversions BEGIN"
+                " INSERT INTO conversions_fts (rowid, summary, description, acceptance)"
+                " VALUES (new.id, new.summary, new.description, new.acceptance); END;"
+                "CREATE TRIGGER IF NOT EXISTS conversions_ad AFTER DELETE ON conversions BEGIN"
+                " INSERT INTO conversions_fts (conversions_fts, rowid, summary, description, acceptance)"
+                " VALUES ('delete', old.id, old.summary, old.description, old.acceptance); END;"
+            )
+        except sqlite3.OperationalError as e:
+            log.warning("SQLite without FTS5 (%s); full-text search scans the table", e)
+            self.fts = False
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS conversions_labels_ad AFTER DELETE ON conversions BEGIN"
+            " DELETE FROM conversion_labels WHERE conversion_id = old.id; END"
+        )
+        self._db.commit()
+
+    def record(self, entries: List[Dict[str, Any]]) -> List[int]:
+        """
+        Store conversions in one transaction; ids in order. An entry has "story"
+        and optionally "source", "filename", "content_hash", "diagnostics",
+        "jira_key" and "jira_self".
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            try:
+                for e in entries:
+                    story = e["story"]
+                    labels = sorted({str(x).lower() for x in story.get("labels") or []})
+                    rest = {k: v for k, v in story.items() if k not in _SPLIT}
+                    cur = self._db.execute(
+                        "INSERT INTO conversions (created, source, filename, content_hash, project_key, summary,"
+                        " description, acceptance, labels, epic_link, jira_key, jira_self, story, diagnostics)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (now, e.get("source", "convert"), e.get("filename"), e.get("content_hash"),
+                         story.get("project_key") or "", story.get("summary") or "", story.get("description") or "",
+                         "\n".join(story.get("acceptance_criteria") or []), json.dumps(labels),
+                         (story.get("epic_link") or "").upper() or None, e.get("jira_key"), e.get("jira_self"),
+                         json.dumps(rest), json.dumps(e.get("diagnostics") or {}, default=str)),
+                    )
+                    ids.append(cur.lastrowid)
+                    self._db.executemany("INSERT OR IGNORE INTO conversion_labels (label, conversion_id) VALUES (?, ?)",
+                                         [(lb, cur.lastrowid) for lb in labels])
+                if self.ttl:
+                    self._db.execute("DELETE FROM conversions WHERE created < ?", (now - self.ttl,))
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return ids
+
+    def get(self, conversion_id: int) -> Optional[Dict[str, Any]]:
+        """A stored conversion with its full story and diagnostics, or None."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(_ITEM_COLS)}, description, acceptance, story, diagnostics"
+                " FROM conversions WHERE id = ?", (conversion_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        item = self._item(row)
+        description, acceptance, story, diagnostics = row[len(_ITEM_COLS):]
+        item["story"] = {**json.loads(story), "summary": item["summary"], "description": description,
+                         "acceptance_criteria": acceptance.split("\n") if acceptance else []}
+        item["diagnostics"] = json.loads(diagnostics)
+        return item
+
+    def search(self, project_key: Optional[str] = None, label: Optional[str] = None,
+               epic_link: Optional[str] = None, jira_key: Optional[str] = None,
+               content_hash: Optional[str] = None, q: Optional[str] = None,
+               limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        (items newest first, cursor for the next page or None). Filters combine
+        with AND; `q` matches words (or "word*" prefixes) in the summary,
+        description or acceptance criteria. `cursor` is a previous page's.
+        """
+        limit = max(1, min(limit, MAX_PAGE))
+        try:
+            before = int(cursor) if cursor else None
+        except ValueError:
+            raise ValueError("invalid cursor")
+        cols = ", ".join(f"c.{c}" for c in _ITEM_COLS)
+        joins, where, args = [], [], []
+        # order and page on the id column of the table that drives the query, so its index does the work
+        key = "c.id"
+        if q and q.strip() and self.fts:
+            joins.append("JOIN conversions_fts ON conversions_fts.rowid = c.id")
+            where.append("conversions_fts MATCH ?")
+            args.append(_fts_query(q))
+            key = "conversions_fts.rowid"
+        elif q and q.strip():
+            for w in q.split():
+                where.append("(c.summary LIKE ? ESCAPE '\\' OR c.description LIKE ? ESCAPE '\\'"
+                             " OR c.acceptance LIKE ? ESCAPE '\\')")
+                args += [_like_pattern(w.rstrip("*"))] * 3
+        if label:
+            joins.append("JOIN conversion_labels l ON l.conversion_id = c.id")
+            where.append("l.label = ?")
+            args.append(label.lower())
+            key = key if key != "c.id" else "l.conversion_id"
+        # issue keys are stored upper-case (the parser may hand back "ep-7")
+        for col, value in (("project_key", project_key), ("epic_link", epic_link and epic_link.upper()),
+                           ("jira_key", jira_key and jira_key.upper()), ("content_hash", content_hash)):
+            if value:
+                where.append(f"c.{col} = ?")
+                args.append(value)
+        if before is not None:
+            where.append(f"{key} < ?")
+            args.append(before)
+        sql = (f"SELECT {cols} FROM conversions c {' '.join(joins)}"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {key} DESC LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, (*args, limit + 1)).fetchall()
+        items = [self._item(r) for r in rows[:limit]]
+        return items, (str(items[-1]["id"]) if len(rows) > limit else None)
+
+    @staticmethod
+    def _item(row) -> Dict[str, Any]:
+        item = dict(zip(_ITEM_COLS, row))
+        item["labels"] = json.loads(item["labels"])
+        return item
@@ -0,0 +1,184 @@
+# idempotency.py
+"""
+Idempotency-Key support for the Jira create endpoints.
+
+An entry is keyed by the client's key plus a hash of the Jira payload the
+request would send, so a retried or double-submitted create replays the
+stored response instead of writing to Jira again. A duplicate that arrives
+while the first request is still running waits for its outcome. Failures are
+passed to those waiters but not stored, so a later retry tries again.
+
+With a database file several worker processes can share the store: a claims
+table decides which of them runs a create, and the others poll for its
+stored response (or for the claim to be dropped on failure).
+"""
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+CLAIM_TTL = 600.0       # seconds; an older claim is from a worker that died mid-create
+POLL_SECONDS = 0.1
+
+
+class Claim:
+    """Outcome of begin(): a stored `value`, or a `future` to wait on or (if `owner`) to resolve."""
+
+    def __init__(self, k: tuple, value: Any = None, future: Optional[Future] = None, owner: bool = False):
+        self.k, self.value, self.future, self.owner = k, value, future, owner
+
+    @property
+    def replay(self) -> bool:
+        return self.future is None
+
+
+class IdempotencyStore:
+    def __init__(self, db_path: Optional[str] = None, ttl: float = 86400):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, Future] = {}
+        self._shared = bool(db_path)
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False)
+        if db_path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency ("
+            " key TEXT NOT NULL, payload_hash TEXT NOT NULL, response TEXT NOT NULL,"
+            " created REAL NOT NULL, PRIMARY KEY (key, payload_hash))"
+        )
+        if self._shared:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_claims ("
+                " key TEXT NOT NULL, payload_hash TEXT NOT NULL, claimed REAL NOT NULL,"
+                " PRIMARY KEY (key, payload_hash))"
+            )
+        self._db.commit()
+        self.replays = 0
+        self.waits = 0
+
+    def _stored(self, k: tuple):
+        row = self._db.execute(
+            "SELECT response FROM idempotency WHERE key = ? AND payload_hash = ? AND created > ?",
+            (*k, time.time() - self.ttl),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _claim(self, k: tuple) -> bool:
+        now = time.time()
+        self._db.execute("DELETE FROM idempotency_claims WHERE key = ? AND payload_hash = ? AND claimed <= ?",
+                         (*k, now - CLAIM_TTL))
+        n = self._db.execute("INSERT OR IGNORE INTO idempotency_claims (key, payload_hash, claimed) VALUES (?, ?, ?)",
+                             (*k, now)).rowcount
+        self._db.commit()
+        return n == 1
+
+    def _release(self, k: tuple) -> None:
+        if self._shared:
+            self._db.execute("DELETE FROM idempotency_claims WHERE key = ? AND payload_hash = ?", k)
+
+    def begin(self, key: str, payload_hash: str) -> Claim:
+        k = (key, payload_hash)
+        with self._lock:
+            value = self._stored(k)
+            if value is not None:
+                self.replays += 1
+                return Claim(k, value=value)
+            fut = self._inflight.get(k)
+            if fut is not None:
+                self.waits += 1
+                return Claim(k, future=fut)
+            if self._shared:
+                if not self._claim(k):
+                    # another worker is running it
+                    fut = self._inflight[k] = Future()
+                    self.waits += 1
+                    threading.Thread(target=self._watch, args=(k, fut), daemon=True).start()
+                    return Claim(k, future=fut)
+                # it may have finished between the lookup and the claim
+                value = self._stored(k)
+                if value is not None:
+                    self._release(k)
+                    self._db.commit()
+                    self.replays += 1
+                    return Claim(k, value=value)
+            fut = self._inflight[k] = Future()
+            return Claim(k, future=fut, owner=True)
+
+    def _watch(self, k: tuple, fut: Future) -> None:
+        # resolve a claim held by another process: its stored response, or failure once it lets go
+        while True:
+            time.sleep(POLL_SECONDS)
+            with self._lock:
+                value = self._stored(k)
+                held = value is None and self._db.execute(
+                    "SELECT 1 FROM idempotency_claims WHERE key = ? AND payload_hash = ? AND claimed > ?",
+                    (*k, time.time() - CLAIM_TTL),
+                ).fetchone() is not None
+                if not held:
+                    self._inflight.pop(k, None)
+            if value is not None:
+                fut.set_result(value)
+                return
+            if not held:
+                fut.set_exception(RuntimeError("a concurrent request with the same Idempotency-Key failed"))
+                return
+
+    def finish(self, claim: Claim, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO idempotency (key, payload_hash, response, created) VALUES (?, ?, ?, ?)",
+                (*claim.k, json.dumps(value), now),
+            )
+            self._release(claim.k)
+            self._db.execute("DELETE FROM idempotency WHERE created <= ?", (now - self.ttl,))
+            self._db.commit()
+            self._inflight.pop(claim.k, None)
+        claim.future.set_result(value)
+
+    def fail(self, claim: Claim, exc: BaseException) -> None:
+        with self._lock:
+            self._release(claim.k)
+            self._db.commit()
+            self._inflight.pop(claim.k, None)
+        claim.future.set_exception(exc)
+
+    def run(self, key: str, payload_hash: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """fn() at most once per (key, payload_hash); returns (value, replayed)."""
+        claim = self.begin(key, payload_hash)
+        if claim.replay:
+            return claim.value, True
+        if not claim.owner:
+            return claim.future.result(), True
+        try:
+            value = fn()
+        except BaseException as e:
+            self.fail(claim, e)
+            raise
+        self.finish(claim, value)
+        return value, False
+
+    async def arun(self, key: str, payload_hash: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """run() for coroutines; SQLite work goes to a thread."""
+        claim = await asyncio.to_thread(self.begin, key, payload_hash)
+        if claim.replay:
+            return claim.value, True
+        if not claim.owner:
+            return await asyncio.wrap_future(claim.future), True
+        try:
+            value = await fn()
+        except BaseException as e:
+            self.fail(claim, e)
+            raise
+        await asyncio.to_thread(self.finish, claim, value)
+        return value, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM idempotency").fetchone()[0]
+            return {"entries": n, "inflight": len(self._inflight), "replays": self.replays, "waits": self.waits}
@@ -1,11 +1,28 @@
 # jira_client.py
 import json
+import re
+import time
+import random
 import base64
+import hashlib
+import sqlite3
+import logging
+import threading
 import requests
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Tuple
 from config import get_settings
+import metrics
 
 S = get_settings()
+log = logging.getLogger("taskbench.jira")
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# seconds a metadata-cache write waits for another worker holding the shared SQLite file's lock
+_BUSY_TIMEOUT = 2.0
 
 
 def _auth_headers() -> Dict[str, str]:
@@ -20,18 +37,280 @@ def _auth_headers() -> Dict[str, str]:
     }
 
 
+# --------------------------- HTTP session ---------------------------
+
+class _TokenBucket:
+    """Client-side rate limiter: `rate` requests/s, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_bucket = _TokenBucket(S.JIRA_RATE_LIMIT, S.JIRA_RATE_BURST)
+
+
+def _get_session() -> requests.Session:
+    # one keep-alive session per process; auth header is built once
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                sess = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=S.JIRA_POOL_SIZE, max_retries=0)
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                sess.headers.update(_auth_headers())
+                _session = sess
+    return _session
+
+
+def reset_session() -> None:
+    """Drop the pooled session (e.g. after changing JIRA_* settings or in tests)."""
+    global _session, _bucket
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _bucket = _TokenBucket(S.JIRA_RATE_LIMIT, S.JIRA_RATE_BURST)
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter
+    return random.uniform(0, min(S.JIRA_BACKOFF_MAX, S.JIRA_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after(r: requests.Response) -> Optional[float]:
+    v = r.headers.get("Retry-After")
+    if not v:
+        return None
+    try:
+        secs = float(v)
+    except ValueError:
+        try:
+            secs = parsedate_to_datetime(v).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(secs, 0.0), S.JIRA_BACKOFF_MAX)
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Rate-limited request on the shared session.
+    - 429: retried for every method, honoring Retry-After
+    - 5xx / connection errors: retried for GET only (a POST may already have created the issue)
+    The last response is returned as-is once retries run out.
+    """
+    idempotent = method.upper() == "GET"
+    attempt = 0
+    while True:
+        _bucket.acquire()
+        try:
+            r = _get_session().request(method, url, timeout=S.JIRA_TIMEOUT, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if not idempotent or attempt >= S.JIRA_MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+
+        retryable = r.status_code == 429 or (idempotent and r.status_code in RETRY_STATUSES)
+        if not retryable or attempt >= S.JIRA_MAX_RETRIES:
+            return r
+        delay = _retry_after(r)
+        time.sleep(delay if delay is not None else _backoff(attempt))
+        attempt += 1
+
+
+# --------------------------- metadata cache ---------------------------
+
+class _MetaCache:
+    """
+    TTL cache for slow-changing Jira metadata.
+    - fresh (age < ttl): served from memory
+    - stale (age < ttl + JIRA_META_STALE): served from memory, refreshed in a background thread
+    - otherwise: fetched; concurrent misses for one key share a single upstream call
+    With `db_path`, fetched values are also written to a SQLite file that other
+    worker processes read on a memory miss, so one fetch serves them all; that
+    file is best-effort (errors are logged and the cache carries on in memory).
+    `max_entries` caps a namespace's in-memory entries, dropping the least recently used.
+    """
+
+    _COUNTERS = ("hits", "disk_hits", "stale_hits", "misses", "upstream_calls", "refresh_errors")
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[Dict[str, int]] = None):
+        self._entries: Dict[str, "OrderedDict[str, tuple]"] = {}   # ns -> key -> (value, fetched_at)
+        self._max = max_entries or {}
+        self._inflight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=_BUSY_TIMEOUT, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jira_meta ("
+                " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, fetched REAL NOT NULL,"
+                " PRIMARY KEY (ns, key))"
+            )
+            self._db.commit()
+
+    def _disk_get(self, k: tuple) -> Optional[tuple]:
+        # (value, fetched_at on the monotonic clock) from the shared file; None on a miss or error
+        try:
+            row = self._db.execute("SELECT value, fetched FROM jira_meta WHERE ns = ? AND key = ?", k).fetchone()
+        except sqlite3.Error as e:
+            log.warning("jira meta cache: disk read skipped (%s)", e)
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), time.monotonic() - max(0.0, time.time() - row[1])
+
+    def _disk_write(self, sql: str, params: tuple) -> None:
+        try:
+            self._db.execute(sql, params)
+            self._db.commit()
+        except sqlite3.Error as e:
+            log.warning("jira meta cache: disk write skipped (%s)", e)
+            try:
+                self._db.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _set(self, k: tuple, ent: tuple) -> None:
+        entries = self._entries.setdefault(k[0], OrderedDict())
+        entries[k[1]] = ent
+        entries.move_to_end(k[1])
+        cap = self._max.get(k[0])
+        while cap and len(entries) > cap:
+            entries.popitem(last=False)
+
+    def _bump(self, ns: str, what: str) -> None:
+        st = self._stats.setdefault(ns, dict.fromkeys(self._COUNTERS, 0))
+        st[what] += 1
+
+    def _load(self, k: tuple, fut: Future, loader) -> None:
+        with self._lock:
+            self._bump(k[0], "upstream_calls")
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                if k[1] in self._entries.get(k[0], ()):
+                    self._bump(k[0], "refresh_errors")
+                self._inflight.pop(k, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self._set(k, (value, time.monotonic()))
+            if self._db is not None:
+                self._disk_write("INSERT OR REPLACE INTO jira_meta (ns, key, value, fetched) VALUES (?, ?, ?, ?)",
+                                 (*k, json.dumps(value), time.time()))
+            self._inflight.pop(k, None)
+        fut.set_result(value)
+
+    def get(self, ns: str, key: str, ttl: float, loader):
+        k = (ns, key)
+        leader = background = False
+        with self._lock:
+            ent = self._entries.get(ns, {}).get(key)
+            if ent is None and self._db is not None:
+                ent = self._disk_get(k)
+                if ent is not None:
+                    self._set(k, ent)
+                    if time.monotonic() - ent[1] < ttl:
+                        self._bump(ns, "disk_hits")
+                        return ent[0]
+            elif ent is not None:
+                self._entries[ns].move_to_end(key)
+            age = time.monotonic() - ent[1] if ent else None
+            if ent and age < ttl:
+                self._bump(ns, "hits")
+                return ent[0]
+            fut = self._inflight.get(k)
+            if fut is None:
+                fut = Future()
+                self._inflight[k] = fut
+                leader = True
+            if ent and age < ttl + S.JIRA_META_STALE:
+                self._bump(ns, "stale_hits")
+                background = leader
+            else:
+                self._bump(ns, "misses")
+                ent = None
+
+        if ent is not None:
+            if background:
+                threading.Thread(target=self._load, args=(k, fut, loader), daemon=True).start()
+            return ent[0]
+        if leader:
+            self._load(k, fut, loader)
+        return fut.result()
+
+    def invalidate(self, ns: Optional[str] = None, key: Optional[str] = None) -> int:
+        with self._lock:
+            drop = [(n, kk) for n, entries in self._entries.items() for kk in entries
+                    if (ns is None or n == ns) and (key is None or kk == key)]
+            for n, kk in drop:
+                del self._entries[n][kk]
+            if self._db is not None:
+                # other workers keep their memory copies until the ttl runs out
+                self._disk_write("DELETE FROM jira_meta WHERE (? IS NULL OR ns = ?) AND (? IS NULL OR key = ?)",
+                                 (ns, ns, key, key))
+        return len(drop)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {ns: dict(st) for ns, st in self._stats.items()}
+            for ns, entries in self._entries.items():
+                if entries:
+                    out.setdefault(ns, dict.fromkeys(self._COUNTERS, 0))["entries"] = len(entries)
+        return out
+
+
+_meta = _MetaCache(S.JIRA_META_DB or None, {"users": S.JIRA_USER_CACHE_MAX})
+
+
+def meta_cache_stats() -> Dict[str, Any]:
+    return _meta.stats()
+
+
+def invalidate_meta_cache(namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+    """Drop cached metadata; returns the number of entries removed."""
+    return _meta.invalidate(namespace, key)
+
+
 # --------------------------- Jira helpers ---------------------------
 
-def list_fields() -> List[Dict[str, Any]]:
+def _fetch_fields() -> List[Dict[str, Any]]:
     url = f"{S.JIRA_BASE}/rest/api/3/field"
-    r = requests.get(url, headers=_auth_headers(), timeout=30)
+    r = _request("GET", url)
     r.raise_for_status()
     return r.json()
 
 
-def list_project_issue_types(project_key: str) -> List[str]:
+def _fetch_project_issue_types(project_key: str) -> List[str]:
     url = f"{S.JIRA_BASE}/rest/api/3/issue/createmeta?projectKeys={project_key}"
-    r = requests.get(url, headers=_auth_headers(), timeout=30)
+    r = _request("GET", url)
     r.raise_for_status()
     data = r.json()
     names: List[str] = []
@@ -48,13 +327,27 @@ def list_project_issue_types(project_key: str) -> List[str]:
     return out
 
 
-def search_user_by_email(email: str) -> List[Dict[str, Any]]:
+def _fetch_users(email: str) -> List[Dict[str, Any]]:
     url = f"{S.JIRA_BASE}/rest/api/3/user/search?query={email}"
-    r = requests.get(url, headers=_auth_headers(), timeout=30)
+    r = _request("GET", url)
     r.raise_for_status()
     return r.json()
 
 
+def list_fields() -> List[Dict[str, Any]]:
+    return _meta.get("fields", "", S.JIRA_FIELDS_TTL, _fetch_fields)
+
+
+def list_project_issue_types(project_key: str) -> List[str]:
+    return _meta.get("issue_types", project_key, S.JIRA_CREATEMETA_TTL,
+                     lambda: _fetch_project_issue_types(project_key))
+
+
+def search_user_by_email(email: str) -> List[Dict[str, Any]]:
+    return _meta.get("users", email.strip().lower(), S.JIRA_USER_TTL,
+                     lambda: _fetch_users(email))
+
+
 # --------------------------- ADF helpers ---------------------------
 
 def _adf_text_paragraph(text: str) -> Dict[str, Any]:
@@ -83,28 +376,200 @@ def _adf_bullet_list(items: List[str]) -> Dict[str, Any]:
     return {"type": "bulletList", "content": list_items}
 
 
+_ADF_BLOCK_CHARS = 2000       # paragraphs/lists close at about this much JSON, longer lines are cut
+_ADF_HEADING = re.compile(r"(#{1,6}) +(\S.*)")
+_HARD_BREAK = {"type": "hardBreak"}
+OVERFLOW_FILENAME = "description-continued.md"
+_OVERFLOW_NOTES = {
+    "comment": "Continued in the comments below.",
+    "attachment": f"Continued in the attached {OVERFLOW_FILENAME}.",
+    "truncate": "Truncated: {chars} more characters were not sent.",
+}
+
+
+def _adf_lines(text: str) -> List[str]:
+    lines = text.splitlines()
+    if max(map(len, lines), default=0) > _ADF_BLOCK_CHARS:
+        n = _ADF_BLOCK_CHARS
+        lines = [ln[i:i + n] for ln in lines for i in range(0, len(ln) or 1, n)]
+    return lines
+
+
+# JSON a line adds to a paragraph / bullet list besides its own text
+_ADF_LINE_COST = {
+    "para": len(json.dumps([{"type": "text", "text": ""}, _HARD_BREAK])),
+    "list": len(json.dumps(_adf_bullet_list(["x"]))) - len(json.dumps(_adf_bullet_list([]))),
+}
+
+
+def _adf_paragraph(lines: List[str]) -> Dict[str, Any]:
+    # one paragraph with hard breaks instead of one paragraph per line
+    content: List[Dict[str, Any]] = []
+    for ln in lines:
+        if content:
+            content.append(_HARD_BREAK)
+        content.append({"type": "text", "text": ln})
+    return {"type": "paragraph", "content": content}
+
+
+def _adf_blocks(lines: List[str], start: int = 0):
+    """
+    (index of its first line, node) per ADF block of `lines[start:]`:
+    "#" .. "######" headings, runs of "- " lines -> a bullet list, runs of other
+    lines -> one paragraph; blank lines end a paragraph or list, and so does
+    reaching about _ADF_BLOCK_CHARS of JSON, so a long run can be split
+    between documents.
+    """
+    kind, buf, first, chars = None, [], start, 0
+    for i in range(start, len(lines)):
+        ln = lines[i].rstrip()
+        m = _ADF_HEADING.match(ln) if ln[:1] == "#" else None
+        k = None if m or not ln else "list" if ln[:2] == "- " else "para"
+        if buf and (k != kind or chars >= _ADF_BLOCK_CHARS):
+            yield first, _adf_paragraph(buf) if kind == "para" else _adf_bullet_list(buf)
+            buf, chars = [], 0
+        if m:
+            yield i, _adf_heading(m.group(2), len(m.group(1)))
+        elif k:
+            if not buf:
+                first, kind = i, k
+            buf.append(ln[2:] if k == "list" else ln)
+            chars += len(ln) + _ADF_LINE_COST[k]
+    if buf:
+        yield first, _adf_paragraph(buf) if kind == "para" else _adf_bullet_list(buf)
+
+
+class _AdfDoc:
+    """
+    ADF doc content kept under `limit` serialized characters (json.dumps, as
+    the request body is written); None -> no limit and no size tracking.
+    """
+
+    _BASE = len(json.dumps({"type": "doc", "version": 1, "content": []}))
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.size = self._BASE
+        self.content: List[Dict[str, Any]] = []
+
+    def add(self, node: Dict[str, Any], reserve: int = 0) -> bool:
+        """Append `node` if it fits with `reserve` characters to spare."""
+        if self.limit is not None:
+            n = len(json.dumps(node)) + 2          # + ", " between nodes
+            if self.size + n + reserve > self.limit and (self.content or reserve):
+                return False
+            # an empty doc takes its first block whatever its size, so filling always progresses
+            self.size += n
+        self.content.append(node)
+        return True
+
+    def fill(self, lines: List[str], start: int = 0, reserve: int = 0) -> Optional[int]:
+        """Add the blocks of `lines[start:]` while they fit; the first line left over, or None."""
+        for first, node in _adf_blocks(lines, start):
+            if not self.add(node, reserve):
+                return first
+        return None
+
+    def note(self, text: str) -> None:
+        self.content.append(_adf_text_paragraph(text))
+
+    def doc(self) -> Dict[str, Any]:
+        # Jira dislikes completely empty docs
+        return {"type": "doc", "version": 1, "content": self.content or [_adf_text_paragraph(" ")]}
+
+
+def _overflow_note(mode: str, chars: int) -> str:
+    # an unknown mode sends nothing more, like "truncate"
+    return _OVERFLOW_NOTES.get(mode, _OVERFLOW_NOTES["truncate"]).format(chars=chars)
+
+
+def _note_size(mode: str) -> int:
+    return len(json.dumps(_adf_text_paragraph(_overflow_note(mode, 10 ** 12)))) + 2
+
+
+def _description_adf(description: str, acceptance: Optional[List[str]] = None,
+                     limit: Optional[int] = None, overflow: str = "comment") -> Tuple[Dict[str, Any], List[str]]:
+    """
+    (ADF doc, overflow lines) for a description plus its acceptance criteria.
+    - consecutive lines share a paragraph; "### " headings and "- " bullets
+      (as parse_text writes them) become heading and bullet-list nodes
+    - the acceptance criteria go last under their own heading, and are set
+      aside up to half of `limit` first, so a long description can't push them out
+    - blocks that don't fit in `limit` serialized characters are returned as
+      lines for `overflow` ("comment", "attachment" or "truncate"), and the doc
+      ends with a note saying where the rest went
+    Only what fits is turned into ADF nodes.
+    """
+    doc = _AdfDoc(limit - _note_size(overflow) if limit is not None else None)
+    desc = _adf_lines(description or "")
+    ac = _adf_lines("\n".join(["### Acceptance Criteria", *(f"- {a}" for a in acceptance)])) if acceptance else []
+
+    ac_size = 0
+    if doc.limit is not None and ac:
+        measure = _AdfDoc(doc.limit // 2)
+        measure.fill(ac)
+        ac_size = measure.size - _AdfDoc._BASE
+    desc_rest = doc.fill(desc, reserve=ac_size)
+    ac_rest = doc.fill(ac)
+
+    rest: List[str] = desc[desc_rest:] if desc_rest is not None else []
+    if ac_rest is not None:
+        rest += (["### Acceptance Criteria (continued)"] if ac_rest else []) + ac[ac_rest:]
+    if rest:
+        chars = sum(len(ln) + 1 for ln in rest)
+        doc.note(_overflow_note(overflow, chars))
+    return doc.doc(), rest
+
+
 def _to_adf(description: str, acceptance: Optional[List[str]] = None) -> Dict[str, Any]:
     """
-    Minimal, robust ADF that Jira Cloud accepts.
-    - Turns each line of `description` into a paragraph (blank lines -> empty paragraph)
-    - Appends an "Acceptance Criteria" heading + bullet list if provided
+    Minimal, robust ADF that Jira Cloud accepts, with no size limit (see
+    _description_adf): paragraphs, headings and bullet lists, then an
+    "Acceptance Criteria" heading + bullet list if provided.
     """
-    content: List[Dict[str, Any]] = []
+    return _description_adf(description, acceptance)[0]
 
-    # split into lines; make paragraphs
-    lines = (description or "").splitlines()
-    if not lines:
-        content.append(_adf_text_paragraph(" "))  # Jira dislikes completely empty docs
-    else:
-        for ln in lines:
-            content.append(_adf_text_paragraph(ln))
 
-    # append AC if present
-    if acceptance:
-        content.append(_adf_heading("Acceptance Criteria", level=3))
-        content.append(_adf_bullet_list(acceptance))
+def _comment_docs(lines: List[str], limit: int, max_comments: int) -> List[Dict[str, Any]]:
+    # overflow as comment bodies, each under `limit`; past `max_comments` the rest is dropped
+    docs, start = [], 0
+    while start is not None and len(docs) < max_comments:
+        doc = _AdfDoc(limit - _note_size("truncate"))
+        nxt = doc.fill(lines, start)
+        if nxt is not None and len(docs) + 1 == max_comments:
+            doc.note(_overflow_note("truncate", sum(len(ln) + 1 for ln in lines[nxt:])))
+        docs.append(doc.doc())
+        start = nxt
+    return docs
 
-    return {"type": "doc", "version": 1, "content": content}
+
+def _post_overflow(key: str, lines: List[str]) -> Dict[str, Any]:
+    """
+    Send the part of a description that didn't fit, after the issue exists.
+    Failures are reported, not raised: the issue has been created either way.
+    """
+    mode = S.JIRA_DESCRIPTION_OVERFLOW
+    info: Dict[str, Any] = {"mode": mode, "chars": sum(len(ln) + 1 for ln in lines)}
+    base = f"{S.JIRA_BASE}/rest/api/3/issue/{key}"
+    try:
+        if mode == "attachment":
+            r = _request("POST", f"{base}/attachments",
+                         files={"file": (OVERFLOW_FILENAME, "\n".join(lines).encode(), "text/markdown")},
+                         # multipart body; Jira wants the XSRF opt-out header on uploads
+                         headers={"X-Atlassian-Token": "no-check", "Content-Type": None})
+            if r.status_code not in (200, 201):
+                raise RuntimeError(f"{r.status_code} {r.text[:200]}")
+            info["attachment"] = OVERFLOW_FILENAME
+        elif mode == "comment":
+            info["comments"] = 0
+            for doc in _comment_docs(lines, S.JIRA_DESCRIPTION_LIMIT, max(1, S.JIRA_OVERFLOW_MAX_COMMENTS)):
+                r = _request("POST", f"{base}/comment", data=json.dumps({"body": doc}))
+                if r.status_code not in (200, 201):
+                    raise RuntimeError(f"{r.status_code} {r.text[:200]}")
+                info["comments"] += 1
+    except Exception as e:
+        info["error"] = f"overflow {mode} failed: {e}"
+    return info
 
 
 def _is_bad(value: Any) -> bool:
@@ -117,13 +582,20 @@ def _is_bad(value: Any) -> bool:
 # --------------------------- payload + create ---------------------------
 
 def _payload_for_story(story: Dict[str, Any], customfields: Dict[str, str]) -> Dict[str, Any]:
+    return _story_payload(story, customfields)[0]
+
+
+def _story_payload(story: Dict[str, Any], customfields: Dict[str, str]) -> Tuple[Dict[str, Any], List[str]]:
+    """(create-issue payload, description lines left for _post_overflow)."""
     issuetype_name = (story.get("issuetype_name") or S.DEFAULT_ISSUETYPE or "Story").strip()
 
+    # ADF description, cut to what Jira accepts
+    description, overflow = _description_adf(story.get("description", ""), story.get("acceptance_criteria"),
+                                             S.JIRA_DESCRIPTION_LIMIT, S.JIRA_DESCRIPTION_OVERFLOW)
     fields: Dict[str, Any] = {
         "project": {"key": story["project_key"]},
         "summary": story["summary"],
-        # 👇 ADF description
-        "description": _to_adf(story.get("description", ""), story.get("acceptance_criteria")),
+        "description": description,
         "issuetype": {"name": issuetype_name},
         "labels": story.get("labels", []),
     }
@@ -154,13 +626,114 @@ def _payload_for_story(story: Dict[str, Any], customfields: Dict[str, str]) -> D
     if issuetype_name.lower() == "epic" and not _is_bad(epic_name_cf):
         fields[epic_name_cf] = story.get("epic_name") or story["summary"]
 
-    return {"fields": fields}
+    return {"fields": fields}, overflow
+
 
+def payload_hash(story: Dict[str, Any], customfields: Dict[str, str]) -> str:
+    """Content hash of what create_issue() would send, for idempotency keys."""
+    body = json.dumps(_payload_for_story(story, customfields), sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
 
-def create_issue(story: Dict[str, Any], customfields: Dict[str, str]) -> Dict[str, Any]:
+
+def create_issue(story: Dict[str, Any], customfields: Dict[str, str],
+                 timings: Optional[dict] = None) -> Dict[str, Any]:
     url = f"{S.JIRA_BASE}/rest/api/3/issue"
-    payload = _payload_for_story(story, customfields)
-    r = requests.post(url, headers=_auth_headers(), data=json.dumps(payload), timeout=30)
+    with metrics.stage(timings, "adf_build"):
+        payload, overflow = _story_payload(story, customfields)
+        body = json.dumps(payload)
+    with metrics.stage(timings, "jira_request"):
+        r = _request("POST", url, data=body)
     if r.status_code not in (200, 201):
         raise RuntimeError(f"Jira create failed: {r.status_code} {r.text}")
-    return r.json()
+    created = r.json()
+    if overflow:
+        with metrics.stage(timings, "jira_overflow"):
+            created["description_overflow"] = _post_overflow(created["key"], overflow)
+    return created
+
+
+# --------------------------- bulk create ---------------------------
+
+def _bulk_error_text(err: Dict[str, Any], status: int) -> str:
+    # `status` (the response's) stands in when the element doesn't carry its own
+    el = err.get("elementErrors") or {}
+    msgs = list(el.get("errorMessages") or [])
+    msgs += [f"{k}: {v}" for k, v in (el.get("errors") or {}).items()]
+    return f"{err.get('status') or status} " + ("; ".join(msgs) or "unknown error")
+
+
+def _create_chunk(chunk: List[tuple]) -> List[Dict[str, Any]]:
+    """POST one chunk of (index, payload) to /issue/bulk and map results back to indexes."""
+    url = f"{S.JIRA_BASE}/rest/api/3/issue/bulk"
+    body = {"issueUpdates": [p for _, p in chunk]}
+    try:
+        r = _request("POST", url, data=json.dumps(body))
+    except Exception as e:
+        return [{"index": i, "key": None, "self": None, "error": str(e)} for i, _ in chunk]
+    try:
+        data = r.json() if r.content else {}
+    except ValueError:
+        data = None             # e.g. a proxy's HTML error page
+    if not isinstance(data, dict):
+        data = {}
+    errors = [e for e in data.get("errors") or [] if isinstance(e, dict)]
+
+    if not errors and (not r.ok or "issues" not in data):
+        what = "Jira bulk create failed" if not r.ok else "unexpected Jira bulk response"
+        msg = f"{what}: {r.status_code} {r.text[:500]}"
+        return [{"index": i, "key": None, "self": None, "error": msg} for i, _ in chunk]
+
+    # Jira lists created issues in submission order, skipping failed elements
+    failed = {e.get("failedElementNumber"): _bulk_error_text(e, r.status_code) for e in errors}
+    created = iter(data.get("issues") or [])
+    out = []
+    for pos, (i, _) in enumerate(chunk):
+        if pos in failed:
+            out.append({"index": i, "key": None, "self": None, "error": failed[pos]})
+            continue
+        issue = next(created, None)
+        if issue is None:
+            out.append({"index": i, "key": None, "self": None, "error": "missing from Jira bulk response"})
+        else:
+            out.append({"index": i, "key": issue.get("key"), "self": issue.get("self"), "error": None})
+    return out
+
+
+def create_issues_bulk(stories: List[Dict[str, Any]], customfields: Dict[str, str],
+                       timings: Optional[dict] = None) -> List[Dict[str, Any]]:
+    """
+    Create many issues through /rest/api/3/issue/bulk.
+    - JIRA_BULK_CHUNK issues per request (Jira caps this at 50)
+    - JIRA_BULK_PARALLEL requests in flight
+    - descriptions over JIRA_DESCRIPTION_LIMIT: the rest follows each created
+      issue (JIRA_DESCRIPTION_OVERFLOW), reported as "description_overflow"
+    Returns one {"index", "key", "self", "error"} per story, in input order.
+    Stages as in create_issue(), with "jira_bulk_request" for all the chunk round trips.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(stories)
+    items = []
+    overflow: Dict[int, List[str]] = {}
+    with metrics.stage(timings, "adf_build"):
+        for i, story in enumerate(stories):
+            try:
+                payload, rest = _story_payload(story, customfields)
+            except Exception as e:
+                results[i] = {"index": i, "key": None, "self": None, "error": f"invalid story: {e}"}
+                continue
+            items.append((i, payload))
+            if rest:
+                overflow[i] = rest
+
+    size = max(1, min(S.JIRA_BULK_CHUNK, 50))
+    chunks = [items[k:k + size] for k in range(0, len(items), size)]
+    with ThreadPoolExecutor(max_workers=max(1, S.JIRA_BULK_PARALLEL)) as ex:
+        with metrics.stage(timings, "jira_bulk_request"):
+            for res in ex.map(_create_chunk, chunks):
+                for item in res:
+                    results[item["index"]] = item
+        follow = [r for r in results if r and r["key"] and r["index"] in overflow]
+        if follow:
+            with metrics.stage(timings, "jira_overflow"):
+                for r, info in zip(follow, ex.map(lambda r: _post_overflow(r["key"], overflow[r["index"]]), follow)):
+                    r["description_overflow"] = info
+    return results
@@ -0,0 +1,347 @@
+# jobs.py
+"""
+Background jobs for conversions that would outlive a gateway timeout.
+
+A submitted job (upload already spooled to disk) waits in one of two lanes and
+is picked up by one of JOB_WORKERS consumers on the event loop. Interactive
+jobs are always taken before bulk ones. CPU work runs on a dedicated process
+pool of the same size, so jobs neither hold a client connection nor compete
+with /convert for EXTRACT_WORKERS. Page progress reported by the readers in
+pool processes comes back over a multiprocessing queue. Finished jobs keep
+their result or error for JOB_TTL seconds.
+
+Several API worker processes may share one SQLite store. Each runner tags
+its jobs with an owner id and heartbeats; queued/running jobs whose owner has
+not been seen for OWNER_TIMEOUT seconds (a crashed or killed worker) are
+failed by whichever runner notices first.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+log = logging.getLogger("taskbench.jobs")
+
+LANES = {"interactive": 0, "bulk": 1}
+TERMINAL = ("done", "failed")
+HEARTBEAT_SECONDS = 10
+OWNER_TIMEOUT = 60
+
+
+# --------------------------- stores ---------------------------
+
+class MemoryJobStore:
+    """Jobs in a dict; lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or (job.get("expires") and job["expires"] <= time.time()):
+                return None
+            return dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def progress(self, job_id: str, stage: str, done: int, total: Optional[int]) -> None:
+        # late messages must not overwrite a finished job
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] == "running":
+                job.update(stage=stage, pages_done=done, pages_total=total)
+
+    def purge(self, now: float) -> int:
+        with self._lock:
+            dead = [k for k, j in self._jobs.items() if j.get("expires") and j["expires"] <= now]
+            for k in dead:
+                del self._jobs[k]
+        return len(dead)
+
+    def interrupt(self, now: float, expires: float, stale_before: Optional[float] = None,
+                  owner: Optional[str] = None) -> int:
+        return 0
+
+    def heartbeat(self, owner: str, now: float) -> None:
+        pass
+
+    def retire(self, owner: str) -> None:
+        pass
+
+
+class SQLiteJobStore:
+    """Jobs in a SQLite file; queued/running jobs of dead owners are failed, not resumed."""
+
+    _COLS = ("id", "kind", "lane", "status", "stage", "filename", "pages_done", "pages_total",
+             "created", "started", "finished", "expires", "error", "error_status", "result", "owner")
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT, lane TEXT, status TEXT, stage TEXT, filename TEXT,"
+            " pages_done INTEGER, pages_total INTEGER, created REAL, started REAL, finished REAL,"
+            " expires REAL, error TEXT, error_status INTEGER, result TEXT)"
+        )
+        if "owner" not in {r[1] for r in self._db.execute("PRAGMA table_info(jobs)")}:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS job_owners (owner TEXT PRIMARY KEY, seen REAL)")
+        self._db.commit()
+
+    def _write(self, sql: str, args: tuple) -> int:
+        with self._lock:
+            n = self._db.execute(sql, args).rowcount
+            self._db.commit()
+        return n
+
+    def create(self, job: dict) -> None:
+        row = tuple(json.dumps(job[c]) if c == "result" and job.get(c) is not None else job.get(c)
+                    for c in self._COLS)
+        self._write(f"INSERT INTO jobs ({', '.join(self._COLS)}) VALUES ({', '.join('?' * len(self._COLS))})",
+                    row)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(self._COLS)} FROM jobs WHERE id = ? AND (expires IS NULL OR expires > ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self._COLS, row))
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def update(self, job_id: str, **fields) -> None:
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._write(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def progress(self, job_id: str, stage: str, done: int, total: Optional[int]) -> None:
+        self._write("UPDATE jobs SET stage = ?, pages_done = ?, pages_total = ? WHERE id = ? AND status = 'running'",
+                    (stage, done, total, job_id))
+
+    def purge(self, now: float) -> int:
+        return self._write("DELETE FROM jobs WHERE expires IS NOT NULL AND expires <= ?", (now,))
+
+    def interrupt(self, now: float, expires: float, stale_before: Optional[float] = None,
+                  owner: Optional[str] = None) -> int:
+        """
+        Fail queued/running jobs: those of `owner`, or those whose owner has not
+        heartbeat since `stale_before`, or (neither given) all of them.
+        """
+        sql = ("UPDATE jobs SET status = 'failed', error = 'interrupted by a restart', error_status = 500,"
+               " finished = ?, expires = ? WHERE status IN ('queued', 'running')")
+        args: tuple = (now, expires)
+        if owner is not None:
+            sql, args = sql + " AND owner = ?", args + (owner,)
+        elif stale_before is not None:
+            sql += " AND (owner IS NULL OR owner NOT IN (SELECT owner FROM job_owners WHERE seen > ?))"
+            args += (stale_before,)
+        return self._write(sql, args)
+
+    def heartbeat(self, owner: str, now: float) -> None:
+        self._write("INSERT OR REPLACE INTO job_owners (owner, seen) VALUES (?, ?)", (owner, now))
+
+    def retire(self, owner: str) -> None:
+        self._write("DELETE FROM job_owners WHERE owner = ?", (owner,))
+
+
+def make_store(db_path: Optional[str]):
+    return SQLiteJobStore(db_path) if db_path else MemoryJobStore()
+
+
+# --------------------------- pool-side progress ---------------------------
+
+_worker_queue = None
+
+
+def _init_worker(queue, warm: bool) -> None:
+    global _worker_queue
+    _worker_queue = queue
+    if warm:
+        from parsers import warm_up
+        warm_up()
+
+
+class Progress:
+    """Picklable progress callback for extract_text(); forwards to the API process."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def __call__(self, stage: str, done: int, total: Optional[int]) -> None:
+        if _worker_queue is not None:
+            _worker_queue.put((self.job_id, stage, done, total))
+
+
+class JobContext:
+    """What a handler gets besides its params: the job pool, a progress callback and stage()."""
+
+    def __init__(self, runner: "JobRunner", job_id: str):
+        self.pool = runner.pool
+        self.progress = Progress(job_id)
+        self._store, self._id = runner.store, job_id
+
+    def stage(self, name: str) -> None:
+        self._store.update(self._id, stage=name)
+
+
+Handler = Callable[[Dict[str, Any], str, JobContext], Awaitable[dict]]
+
+
+# --------------------------- runner ---------------------------
+
+class JobRunner:
+    def __init__(self, store, workers: int = 2, ttl: float = 3600, max_queued: int = 100,
+                 warm_up: bool = False, retry_after: int = 5):
+        self.store = store
+        self.workers = max(1, workers)
+        self.ttl = ttl
+        self.max_queued = max_queued
+        self.retry_after = retry_after       # seconds, sent with the queue-full 503
+        self.warm_up = warm_up
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._handlers: Dict[str, Handler] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._progress = None
+        self._tasks = []
+        self._seq = count()
+        self.owner = uuid.uuid4().hex
+        self._closing = False
+
+    def handler(self, kind: str):
+        def register(fn: Handler) -> Handler:
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    async def start(self) -> None:
+        now = time.time()
+        await asyncio.to_thread(self.store.heartbeat, self.owner, now)
+        n = await asyncio.to_thread(self.store.interrupt, now, now + self.ttl, now - OWNER_TIMEOUT)
+        if n:
+            log.warning("marked %d unfinished job(s) from a previous run as failed", n)
+        self._queue = asyncio.PriorityQueue()
+        self._progress = mp.get_context().Queue()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self._progress, self.warm_up))
+        threading.Thread(target=self._drain_progress, args=(self._progress,),
+                         name="job-progress", daemon=True).start()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self, drain: float = 0) -> None:
+        """Stop taking jobs; with `drain`, give queued and running ones that long to finish first."""
+        self._closing = True
+        if drain > 0 and self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), drain)
+            except asyncio.TimeoutError:
+                log.warning("%d job(s) still queued or running after %.0fs", self._queue.qsize(), drain)
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        if self._progress is not None:
+            self._progress.put(None)
+            self._progress = None
+        now = time.time()
+        await asyncio.to_thread(self.store.interrupt, now, now + self.ttl, owner=self.owner)
+        await asyncio.to_thread(self.store.retire, self.owner)
+
+    def submit(self, kind: str, lane: str, params: Dict[str, Any], path: str,
+               filename: Optional[str] = None) -> dict:
+        """Queue a job; takes ownership of `path`, which is deleted once the job has run."""
+        if self._queue is None or self._closing or self._queue.qsize() >= self.max_queued:
+            os.unlink(path)
+            raise HTTPException(status_code=503, detail="Job queue full, retry later",
+                                headers={"Retry-After": str(self.retry_after)})
+        job = {
+            "id": uuid.uuid4().hex, "kind": kind, "lane": lane, "status": "queued", "stage": "queued",
+            "filename": filename, "pages_done": None, "pages_total": None,
+            "created": time.time(), "started": None, "finished": None, "expires": None,
+            "error": None, "error_status": None, "result": None, "owner": self.owner,
+        }
+        self.store.create(job)
+        self._queue.put_nowait((LANES[lane], next(self._seq), job["id"], kind, params, path))
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.get(job_id)
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize() if self._queue else 0, "workers": self.workers}
+
+    async def _consume(self) -> None:
+        while True:
+            _, _, job_id, kind, params, path = await self._queue.get()
+            await asyncio.to_thread(self.store.update, job_id, status="running", stage="started",
+                                    started=time.time())
+            try:
+                result = await self._handlers[kind](params, path, JobContext(self, job_id))
+                fields = {"status": "done", "stage": "done", "result": result}
+            except HTTPException as e:
+                fields = {"status": "failed", "error": str(e.detail), "error_status": e.status_code}
+            except Exception as e:
+                log.exception("job %s failed", job_id)
+                fields = {"status": "failed", "error": str(e), "error_status": 500}
+            finally:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            now = time.time()
+            await asyncio.to_thread(self.store.update, job_id, finished=now, expires=now + self.ttl, **fields)
+            self._queue.task_done()
+
+    async def _janitor(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(60.0, self.ttl / 2)))
+            await asyncio.to_thread(self.store.purge, time.time())
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            now = time.time()
+            await asyncio.to_thread(self.store.heartbeat, self.owner, now)
+            n = await asyncio.to_thread(self.store.interrupt, now, now + self.ttl, now - OWNER_TIMEOUT)
+            if n:
+                log.warning("marked %d job(s) of a vanished worker as failed", n)
+
+    def _drain_progress(self, queue) -> None:
+        while True:
+            msg = queue.get()
+            if msg is None:
+                return
+            try:
+                self.store.progress(*msg)
+            except Exception:
+                log.exception("progress update failed")
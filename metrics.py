@@ -0,0 +1,122 @@
+# metrics.py
+"""
+Lightweight per-stage timing.
+
+Every stage records wall time and CPU time into a per-request `timings` dict
+(returned in `diagnostics["timings"]`) and into process-wide Prometheus
+histograms served by /metrics. Work done in pool processes is timed there with
+`timed_call` and recorded by the caller, so all series live in the API process.
+Cost per stage is two clock reads and one short lock.
+"""
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+log = logging.getLogger("taskbench.trace")
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _labels(names, values) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in zip(names, values))
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labelnames: Tuple[str, ...], buckets=BUCKETS):
+        self.name, self.doc, self.labelnames, self.buckets = name, doc, labelnames, tuple(buckets)
+        self._series: Dict[tuple, list] = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for labels, s in items:
+            base = _labels(self.labelnames, labels)
+            acc = 0
+            for le, n in zip(self.buckets, s):
+                acc += n
+                yield f'{self.name}_bucket{{{base},le="{le}"}} {acc}'
+            yield f'{self.name}_bucket{{{base},le="+Inf"}} {s[-1]}'
+            yield f"{self.name}_sum{{{base}}} {s[-2]}"
+            yield f"{self.name}_count{{{base}}} {s[-1]}"
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames: Tuple[str, ...]):
+        self.name, self.doc, self.labelnames = name, doc, labelnames
+        self._series: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._series.items())
+        for labels, v in items:
+            yield f"{self.name}{{{_labels(self.labelnames, labels)}}} {v}"
+
+
+STAGE_SECONDS = Histogram("taskbench_stage_seconds", "Time spent per pipeline stage.", ("stage", "clock"))
+EXTRACTIONS = Counter("taskbench_extractions_total", "Extractions by reader and OCR fallback.", ("extractor", "ocr"))
+_REGISTRY = [STAGE_SECONDS, EXTRACTIONS]
+
+
+def render() -> str:
+    return "\n".join(line for m in _REGISTRY for line in m.render()) + "\n"
+
+
+# --------------------------- recording ---------------------------
+
+def record(timings: Optional[dict], stage: str, wall: float, cpu: Optional[float] = None) -> None:
+    """Add one stage (seconds) to the histograms and, if given, the request's timings dict."""
+    STAGE_SECONDS.observe(wall, stage, "wall")
+    if cpu is not None:
+        STAGE_SECONDS.observe(cpu, stage, "cpu")
+    if timings is not None:
+        t = {"wall_ms": round(wall * 1000, 3)}
+        if cpu is not None:
+            t["cpu_ms"] = round(cpu * 1000, 3)
+        timings[stage] = t
+
+
+@contextmanager
+def stage(timings: Optional[dict], name: str):
+    # CPU is this thread's; use timed_call for work shipped to another process
+    w0, c0 = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        record(timings, name, time.perf_counter() - w0, time.thread_time() - c0)
+
+
+def timed_call(fn, *args, **kwargs):
+    """Run fn in the current (worker) process; returns (result, wall_s, cpu_s)."""
+    w0, c0 = time.perf_counter(), time.process_time()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - w0, time.process_time() - c0
+
+
+def trace(route: str, timings: dict, **extra: Any) -> None:
+    # per-request trace line; enabled with TRACE_LOG (logger "taskbench.trace")
+    log.info(json.dumps({"route": route, "timings": timings, **extra}, default=str))
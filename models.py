@@ -20,7 +20,13 @@ class JiraStory(BaseModel):
 
 class ConvertResult(BaseModel):
     story: JiraStory
-    raw_text: str
+    raw_text: Optional[str] = None
+    diagnostics: Dict[str, Any] = {}
+
+
+class SplitConvertResult(BaseModel):
+    stories: List[ConvertResult]              # raw_text is null per story; the document's is below
+    raw_text: Optional[str] = None
     diagnostics: Dict[str, Any] = {}
 
 
@@ -28,6 +34,7 @@ class JiraCreateResponse(BaseModel):
     key: str
     self_url: str
     story: JiraStory
+    diagnostics: Dict[str, Any] = {}
 
 
 class JiraField(BaseModel):
@@ -45,7 +52,87 @@ class BulkConvertRequest(BaseModel):
     filenames: List[str]
     files: List[str]
     project_key: str
+    include_raw_text: bool = True
+    concurrency: Optional[int] = None   # /bulk/convert/stream only; capped by BULK_CONCURRENCY
+    fields: Optional[List[Literal["story", "raw_text", "diagnostics"]]] = None   # /bulk/convert*: result keys
 
 
 class BulkConvertResult(BaseModel):
     items: List[ConvertResult]
+
+
+class BulkConvertItem(BaseModel):
+    # one NDJSON line of /bulk/convert/stream
+    index: int
+    filename: str
+    result: Optional[ConvertResult] = None
+    error: Optional[str] = None
+
+
+class BulkJiraCreateRequest(BulkConvertRequest):
+    include_raw_text: bool = False
+    default_labels: List[str] = []
+    default_components: List[str] = []
+    story_points_cf: Optional[str] = None   # e.g. customfield_10016
+    epic_link_cf: Optional[str] = None      # e.g. customfield_10014
+    epic_name_cf: Optional[str] = None      # only for Epic
+    issuetype_name: Optional[str] = None
+
+
+class BulkJiraCreateItem(BaseModel):
+    index: int
+    filename: str
+    key: Optional[str] = None
+    self_url: Optional[str] = None
+    story: Optional[JiraStory] = None
+    error: Optional[str] = None
+    replayed: bool = False                    # key/self_url come from an earlier request (Idempotency-Key)
+    diagnostics: Optional[Dict[str, Any]] = None   # /jira/create/split: the story's parse diagnostics;
+                                                   # description_overflow when it didn't fit in Jira's limit
+
+
+class BulkJiraCreateResponse(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkJiraCreateItem]
+
+
+class JobStatus(BaseModel):
+    id: str
+    kind: Literal["convert", "jira_create"]
+    lane: Literal["interactive", "bulk"]
+    status: Literal["queued", "running", "done", "failed"]
+    stage: str                                # queued, started, extract, pdf_text, ocr, parse, jira, done
+    filename: Optional[str] = None
+    pages_done: Optional[int] = None
+    pages_total: Optional[int] = None
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    expires: Optional[float] = None           # result is dropped after this (unix time)
+    error: Optional[str] = None
+
+
+class HistoryItem(BaseModel):
+    # one stored conversion in a /history listing
+    id: int
+    created: float                            # unix time
+    source: str                               # endpoint / job kind that produced it
+    filename: Optional[str] = None
+    content_hash: Optional[str] = None        # SHA-256 of the uploaded file
+    project_key: str
+    summary: str
+    labels: List[str] = []
+    epic_link: Optional[str] = None
+    jira_key: Optional[str] = None
+    jira_self: Optional[str] = None
+
+
+class HistoryEntry(HistoryItem):
+    story: JiraStory
+    diagnostics: Dict[str, Any] = {}
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None         # pass as `cursor` for the next page; null on the last one
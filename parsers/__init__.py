@@ -1,2 +1,3 @@
-from .core import extract_text, decode_base64
-from .heuristics import parse_text
\ No newline at end of file
+from .core import extract_text, extract_file, extract_parse, extract_parse_file, iter_text, structure_hints, decode_base64, warm_up, shutdown_ocr
+from .heuristics import parse_text, parse_stories
+from .cache import ExtractionCache, cache_key, cached_extract_text, cached_extract_parse
@@ -0,0 +1,241 @@
+# parsers/cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict, Any
+
+from .core import extract_text, extract_parse, structure_hints
+
+log = logging.getLogger("taskbench.cache")
+
+# options that change the extracted text (worker counts etc. do not)
+_KEY_OPTS = ("enable_html", "html_engine", "max_pages", "enable_ocr", "ocr_lang", "ocr_min_chars",
+             "ocr_max_pages", "ocr_opts")
+# bump when a reader's output format changes so persisted entries aren't reused
+_READER_VERSION = 3
+_FAILED_PREFIXES = ("[OCR failed:", "[PDF OCR failed:")
+# seconds a write waits for another process holding the shared SQLite file's lock
+_BUSY_TIMEOUT = 2.0
+
+
+def cache_key(filename: str, file_bytes: bytes, **opts) -> str:
+    h = hashlib.sha256(file_bytes)
+    ext = os.path.splitext((filename or "").lower())[1]
+    meta = {k: opts.get(k) for k in _KEY_OPTS}
+    h.update(json.dumps([ext, meta, _READER_VERSION], sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Two-tier cache for extracted text.
+    - memory: LRU bounded by total UTF-8 size of the cached texts
+    - disk:   optional SQLite file, survives restarts; each put drops rows older
+              than `ttl` seconds, then the oldest rows beyond `disk_max_bytes`
+              of text (0 -> no limit)
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, db_path: Optional[str] = None,
+                 disk_max_bytes: int = 0, ttl: float = 0):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+        self._mem: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=_BUSY_TIMEOUT, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extract_cache ("
+                " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+                " src_bytes INTEGER NOT NULL, created REAL NOT NULL, text_bytes INTEGER NOT NULL DEFAULT 0)"
+            )
+            if "text_bytes" not in {r[1] for r in self._db.execute("PRAGMA table_info(extract_cache)")}:
+                self._db.execute("ALTER TABLE extract_cache ADD COLUMN text_bytes INTEGER NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE extract_cache SET text_bytes = LENGTH(CAST(text AS BLOB))")
+            # covers the purge: age order plus each row's size, without reading the texts
+            self._db.execute("CREATE INDEX IF NOT EXISTS extract_cache_created ON extract_cache (created, text_bytes)")
+            # running total of text_bytes, kept by triggers so a put doesn't have to sum the table
+            self._db.execute("CREATE TABLE IF NOT EXISTS extract_cache_size (total INTEGER NOT NULL)")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS extract_cache_ai AFTER INSERT ON extract_cache BEGIN"
+                " UPDATE extract_cache_size SET total = total + new.text_bytes; END")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS extract_cache_au AFTER UPDATE ON extract_cache BEGIN"
+                " UPDATE extract_cache_size SET total = total + new.text_bytes - old.text_bytes; END")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS extract_cache_ad AFTER DELETE ON extract_cache BEGIN"
+                " UPDATE extract_cache_size SET total = total - old.text_bytes; END")
+            if self._db.execute("SELECT 1 FROM extract_cache_size").fetchone() is None:
+                self._db.execute("INSERT INTO extract_cache_size SELECT COALESCE(SUM(text_bytes), 0) FROM extract_cache")
+            self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    # ---------------- memory tier ----------------
+    def _mem_put(self, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old:
+            self._mem_bytes -= old[1]
+        self._mem[key] = (text, size)
+        self._mem_bytes += size
+        while self._mem_bytes > self.max_bytes:
+            _, (_, sz) = self._mem.popitem(last=False)
+            self._mem_bytes -= sz
+
+    # ---------------- public ----------------
+    def get(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (text, tier) where tier is 'memory', 'disk' or None on miss."""
+        with self._lock:
+            ent = self._mem.get(key)
+            if ent is not None:
+                self._mem.move_to_end(key)
+                return ent[0], "memory"
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT text FROM extract_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    log.warning("extraction cache: disk read skipped (%s)", e)
+                    row = None
+                if row is not None:
+                    self._mem_put(key, row[0])
+                    return row[0], "disk"
+        return None, None
+
+    def put(self, key: str, text: str, src_bytes: int = 0) -> None:
+        """Cache `text`; the disk write is best-effort (e.g. the file stays locked by another worker)."""
+        with self._lock:
+            self._mem_put(key, text)
+            size = len(text.encode("utf-8"))
+            if self._db is not None and not (self.disk_max_bytes and size > self.disk_max_bytes):
+                now = time.time()
+                try:
+                    # an upsert rather than INSERT OR REPLACE: REPLACE's delete doesn't fire the size trigger
+                    self._db.execute(
+                        "INSERT INTO extract_cache (key, text, src_bytes, created, text_bytes) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT (key) DO UPDATE SET text = excluded.text, src_bytes = excluded.src_bytes,"
+                        " created = excluded.created, text_bytes = excluded.text_bytes",
+                        (key, text, src_bytes, now, size),
+                    )
+                    self._purge(now)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    log.warning("extraction cache: disk write skipped (%s)", e)
+                    try:
+                        self._db.rollback()
+                    except sqlite3.Error:
+                        pass
+
+    def _purge(self, now: float) -> None:
+        if self.ttl:
+            self._db.execute("DELETE FROM extract_cache WHERE created < ?", (now - self.ttl,))
+        if not self.disk_max_bytes:
+            return
+        excess = self._db.execute("SELECT total FROM extract_cache_size").fetchone()[0] - self.disk_max_bytes
+        if excess <= 0:
+            return
+        # drop the oldest rows until the rest fit; reads only as far as needed
+        drop = []
+        for key, size in self._db.execute("SELECT key, text_bytes FROM extract_cache ORDER BY created"):
+            drop.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM extract_cache WHERE key = ?", drop)
+
+    def store(self, key: str, text: str, src_bytes: int = 0, info: Optional[dict] = None) -> None:
+        """
+        put(), except for results worth retrying: OCR failure strings, and
+        partial text whose extraction `info` reports an OCR error.
+        """
+        if text.startswith(_FAILED_PREFIXES):
+            return
+        if info and (info.get("ocr_error") or info.get("ocr_failed_pages")):
+            return
+        self.put(key, text, src_bytes)
+
+    def report(self, key: str, tier: Optional[str], src_bytes: int) -> Dict[str, Any]:
+        """Count one lookup and return the diagnostics entry for it."""
+        with self._lock:
+            if tier:
+                self.hits += 1
+                self.bytes_saved += src_bytes
+            else:
+                self.misses += 1
+        info = {"hit": tier is not None, "tier": tier, "key": key[:16]}
+        info.update(self.stats())
+        return {"extract_cache": info}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+                "mem_entries": len(self._mem),
+                "mem_bytes": self._mem_bytes,
+                "disk": self._db is not None,
+            }
+
+
+def cached_extract_text(cache: Optional[ExtractionCache], filename: str, file_bytes: bytes,
+                        **opts) -> Tuple[str, Dict[str, Any]]:
+    """
+    extract_text() behind `cache`; returns (text, diagnostics). Diagnostics carry
+    the extraction info as "extract" when the text was extracted, not cached.
+    """
+    info: Dict[str, Any] = {}
+    if cache is None:
+        return extract_text(filename, file_bytes, info=info, **opts), {"extract": info}
+
+    key = cache_key(filename, file_bytes, **opts)
+    text, tier = cache.get(key)
+    diag: Dict[str, Any] = {}
+    if text is None:
+        text = extract_text(filename, file_bytes, info=info, **opts)
+        cache.store(key, text, len(file_bytes), info)
+        diag["extract"] = info
+    diag.update(cache.report(key, tier, len(file_bytes)))
+    return text, diag
+
+
+def cached_extract_parse(cache: Optional[ExtractionCache], filename: str, file_bytes, parse, *args,
+                         options: Optional[dict] = None, keep_text: bool = False,
+                         **opts) -> Tuple[Any, Optional[str], Dict[str, Any]]:
+    """
+    parse(extract_text(...)) behind `cache`, as (parsed, text, diagnostics); text
+    is None unless `keep_text`. A hit parses the cached text; a miss streams
+    extraction into the parser (extract_parse) and caches the text built from
+    the same chunks.
+    """
+    info: Dict[str, Any] = {}
+    if cache is None:
+        parsed, text = extract_parse(filename, file_bytes, parse, *args, options=options,
+                                     keep_text=keep_text, info=info, **opts)
+        return parsed, text, {"extract": info}
+
+    key = cache_key(filename, file_bytes, **opts)
+    text, tier = cache.get(key)
+    diag: Dict[str, Any] = {}
+    if text is None:
+        parsed, text = extract_parse(filename, file_bytes, parse, *args, options=options,
+                                     keep_text=True, info=info, **opts)
+        cache.store(key, text, len(file_bytes), info)
+        diag["extract"] = info
+    else:
+        parsed = parse(text, *args, options={**(options or {}), "structure_hints": structure_hints(filename)})
+    diag.update(cache.report(key, tier, len(file_bytes)))
+    return parsed, (text if keep_text else None), diag
@@ -1,39 +1,244 @@
+import os
+import sys
+import mmap
 import base64
-from .pdf_reader import read_pdf_bytes
-from .docx_reader import read_docx_bytes
-from .md_txt_reader import read_md_or_txt_bytes
-from .html_reader import read_html_bytes
-from .ocr_reader import run_ocr_on_image_bytes, run_ocr_on_pdf
+from functools import lru_cache
+from importlib import import_module
+from typing import Iterator
 
-def extract_text(filename: str, file_bytes: bytes,
-                 enable_html=True, max_pages=50,
-                 enable_ocr=False, ocr_lang="eng") -> str:
+from utils.text import iter_lines
+
+# extension -> (extractor name, module, function). Reader modules pull in
+# pypdf / python-docx / bs4 / PIL / pytesseract, so they are imported on first use.
+READERS = {
+    ".pdf":  ("pdf", "pdf_reader", "iter_pdf_pages"),
+    ".docx": ("docx", "docx_reader", "read_docx_bytes"),
+    ".md":   ("md_txt", "md_txt_reader", "read_md_or_txt_bytes"),
+    ".txt":  ("md_txt", "md_txt_reader", "read_md_or_txt_bytes"),
+    ".html": ("html", "html_reader", "read_html_bytes"),
+    ".htm":  ("html", "html_reader", "read_html_bytes"),
+    ".png":  ("image", "ocr_reader", "run_ocr_on_image_bytes"),
+    ".jpg":  ("image", "ocr_reader", "run_ocr_on_image_bytes"),
+    ".jpeg": ("image", "ocr_reader", "run_ocr_on_image_bytes"),
+    ".tiff": ("image", "ocr_reader", "run_ocr_on_image_bytes"),
+    ".bmp":  ("image", "ocr_reader", "run_ocr_on_image_bytes"),
+}
+
+# readers whose text marks structure ("#" headings, "- " list items, "| a | b |" table rows);
+# parse_text reads those marks only with options["structure_hints"], see structure_hints()
+STRUCTURED = {"docx"}
+
+@lru_cache(maxsize=None)
+def _load(module: str, attr: str):
+    return getattr(import_module(f"{__package__}.{module}"), attr)
+
+def warm_up() -> None:
+    """Import every reader now, e.g. at server startup, so the first request doesn't pay for it."""
+    for _, module, attr in set(READERS.values()):
+        _load(module, attr)
+    _load("ocr_reader", "ocr_pdf_pages")
+
+def shutdown_ocr() -> None:
+    """Stop this process's OCR pool (ocr_workers > 1), if it started one; e.g. at server shutdown."""
+    ocr = sys.modules.get(f"{__package__}.ocr_reader")     # not imported just to find nothing to stop
+    if ocr is not None:
+        ocr.shutdown()
+
+def _reader(filename: str, enable_html: bool, enable_ocr: bool):
     name = (filename or "").lower()
-    text = ""
+    ext = name[name.rfind("."):] if "." in name else ""
+    kind, module, attr = READERS.get(ext, ("raw", None, None))
+    if (kind == "html" and not enable_html) or (kind == "image" and not enable_ocr):
+        return "raw", None, None
+    return kind, module, attr
+
+def structure_hints(filename: str) -> bool:
+    """Whether `filename`'s extracted text carries structure marks for the parser (DOCX)."""
+    return _reader(filename, False, False)[0] in STRUCTURED
+
+def iter_text(filename: str, file_bytes, info=None, **opts) -> Iterator[str]:
+    """
+    extract_text() as chunks whose "\n"-join is the extracted text: PDFs page by
+    page as they are read (pages waiting for OCR are held until their window is
+    OCR'd), a single chunk for everything else.
+    Pair with utils.text.iter_lines() to parse without building the full string.
+    """
+    info = {} if info is None else info
+    kind, module, attr = _reader(filename, opts.get("enable_html", True), opts.get("enable_ocr", False))
+    if kind != "pdf":
+        yield extract_text(filename, file_bytes, info=info, **opts)
+        return
+    info["extractor"], info["ocr"] = kind, False
+    yield from _pdf_chunks(file_bytes, module, attr, info, **opts)
+
+def extract_text(filename: str, file_bytes: bytes,
+                 enable_html=True, max_pages=50, html_engine="stream",
+                 enable_ocr=False, ocr_lang="eng",
+                 ocr_workers=1, ocr_window=4, file_path=None, info=None,
+                 ocr_min_chars=20, ocr_max_pages=10, progress=None,
+                 ocr_opts=None) -> str:
+    """
+    `file_bytes` may also be an mmap of the upload. PDFs are read from it in
+    place (and OCR'd straight from `file_path` if given); other formats are
+    small enough to copy.
+    `info`, if given, receives "extractor" (the reader used) and "ocr" (fallback ran);
+    for PDFs also "ocr_pages", the 1-based pages that were OCR'd, and "ocr_error" /
+    "ocr_failed_pages" when OCR failed outright / for some of them.
+    `html_engine` picks the HTML extractor ("stream", "lxml" or "bs4", see html_reader).
+    `ocr_opts` (config.ocr_options) sets OCR preprocessing, DPI and tesseract flags.
+    `progress`, if given, is called as progress(stage, pages_done, pages_total)
+    while PDF pages are read and OCR'd (see the readers); it must be picklable
+    when extraction runs in another process.
+    """
+    kind, module, attr = _reader(filename, enable_html, enable_ocr)
+    info = {} if info is None else info
+    info["extractor"] = kind
+    info["ocr"] = kind == "image"
 
-    if name.endswith(".pdf"):
-        text = read_pdf_bytes(file_bytes, max_pages)
-        if enable_ocr and (not text or len(text) < 20):
-            return run_ocr_on_pdf(file_bytes, lang=ocr_lang, max_pages=min(max_pages,10))
-        return text
+    if kind == "pdf":
+        return "\n".join(_pdf_chunks(
+            file_bytes, module, attr, info, max_pages, enable_ocr, ocr_lang, ocr_workers, ocr_window,
+            file_path, ocr_min_chars, ocr_max_pages, progress, ocr_opts,
+        )).strip()
 
-    if name.endswith(".docx"):
-        return read_docx_bytes(file_bytes)
+    if not isinstance(file_bytes, bytes):
+        file_bytes = bytes(file_bytes)
 
-    if name.endswith(".md") or name.endswith(".txt"):
-        return read_md_or_txt_bytes(file_bytes)
+    if kind == "image":
+        return _load(module, attr)(file_bytes, lang=ocr_lang, opts=ocr_opts)
 
-    if enable_html and (name.endswith(".html") or name.endswith(".htm")):
-        return read_html_bytes(file_bytes)
+    if kind == "html":
+        return _load(module, attr)(file_bytes, engine=html_engine)
 
-    if enable_ocr and name.endswith((".png",".jpg",".jpeg",".tiff",".bmp")):
-        return run_ocr_on_image_bytes(file_bytes, lang=ocr_lang)
+    if kind != "raw":
+        return _load(module, attr)(file_bytes)
 
     try:
         return file_bytes.decode("utf-8", errors="ignore")
     except:
         return ""
 
+def _pdf_chunks(file_bytes, module, attr, info, max_pages=50, enable_ocr=False, ocr_lang="eng",
+                ocr_workers=1, ocr_window=4, file_path=None, ocr_min_chars=20, ocr_max_pages=10,
+                progress=None, ocr_opts=None, **_) -> Iterator[str]:
+    """
+    A PDF's text as chunks (see iter_text). With OCR on, pages whose text layer
+    has fewer than `ocr_min_chars` (the first `ocr_max_pages` of them) are OCR'd
+    instead, a run of up to `ocr_window` consecutive ones at a time; the others
+    go out as soon as they are read. Text pages join with "\n" and OCR blocks
+    with a blank line, so all-text and all-scanned PDFs come out exactly as before.
+    If OCR fails, that run and every later page keep their text layer.
+    """
+    pages = _load(module, attr)(file_bytes, max_pages, progress)
+    if not enable_ocr:
+        yield from pages
+        return
+    info["ocr_pages"] = need = []
+    run, failed = [], []
+    prev_ocr = None          # whether the last chunk out was an OCR block; None before the first
+    text_out = False
+    ocr_done = 0
+
+    def ocr_progress(stage, done, total):
+        progress(stage, ocr_done + done, None)
+
+    def emit(t, is_ocr):
+        nonlocal prev_ocr, text_out
+        sep = "\n" if prev_ocr is not None and (is_ocr or prev_ocr) else ""
+        prev_ocr, text_out = is_ocr, text_out or bool(t.strip())
+        return sep + t
+
+    def flush():
+        # OCR the held run; a page OCR didn't return keeps its text layer, an empty result is dropped
+        nonlocal ocr_done
+        texts = {}
+        if "ocr_error" not in info:
+            try:
+                texts = _load("ocr_reader", "ocr_pdf_pages")(
+                    file_bytes, [i for i, _ in run], ocr_lang, ocr_workers, ocr_window, file_path,
+                    ocr_progress if progress else None, ocr_opts)
+            except Exception as e:
+                info["ocr_error"] = str(e)
+        for i, t in run:
+            if i not in texts:
+                if "ocr_error" not in info:
+                    failed.append(i)
+                yield emit(t, False)
+            elif texts[i]:
+                yield emit(f"[Page {i} OCR]\n{texts[i]}", True)
+        ocr_done += len(run)
+        run.clear()
+
+    for i, t in enumerate(pages, 1):
+        if len(need) < ocr_max_pages and len(t.strip()) < ocr_min_chars:
+            need.append(i)
+            info["ocr"] = True
+            if run and (run[-1][0] != i - 1 or len(run) >= ocr_window):
+                yield from flush()
+            run.append((i, t))
+            continue
+        if run:
+            yield from flush()
+        yield emit(t, False)
+    if run:
+        yield from flush()
+    if failed:
+        info["ocr_failed_pages"] = failed       # not rasterized; the page keeps its (short) text layer
+    if "ocr_error" in info and not text_out:
+        yield emit(f"[PDF OCR failed: {info['ocr_error']}]", False)
+
+def extract_file(filename: str, path: str, **opts):
+    """
+    extract_text() on a file on disk, mapped rather than read; safe to run in a
+    worker process. Returns (text, info) since `info` can't be shared across processes.
+    """
+    info = {}
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return extract_text(filename, b"", info=info, **opts), info
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return extract_text(filename, mm, file_path=path, info=info, **opts), info
+
+def extract_parse(filename: str, file_bytes, parse, *args, options=None, keep_text=False, info=None, **opts):
+    """
+    iter_text() fed line by line into `parse` (parse_text or parse_stories), so
+    the parser never waits for, or holds, the whole text. With `keep_text` the
+    text extract_text() would return is also built from the same chunks, after
+    parsing (e.g. for the cache). Returns (parse's result, text or None).
+    """
+    info = {} if info is None else info
+    options = {**(options or {}), "structure_hints": structure_hints(filename)}
+    chunks = iter_text(filename, file_bytes, info=info, **opts)
+    kept = [] if keep_text else None
+    if keep_text:
+        chunks = _keep(chunks, kept)
+    parsed = parse(iter_lines(chunks), *args, options=options)
+    if not keep_text:
+        return parsed, None
+    text = "\n".join(kept)
+    return parsed, (text.strip() if _reader(filename, True, True)[0] == "pdf" else text)
+
+def _keep(chunks, kept: list):
+    for c in chunks:
+        kept.append(c)
+        yield c
+
+def extract_parse_file(filename: str, path: str, parse, *args, options=None, keep_text=False, **opts):
+    """
+    extract_parse() on a file on disk, mapped rather than read; for a worker
+    process. Returns (parse's result, info, text or None).
+    """
+    info = {}
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            parsed, text = extract_parse(filename, b"", parse, *args, options=options, keep_text=keep_text,
+                                         info=info, **opts)
+            return parsed, info, text
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            parsed, text = extract_parse(filename, mm, parse, *args, options=options, keep_text=keep_text,
+                                         info=info, file_path=path, **opts)
+            return parsed, info, text
+
 def decode_base64(data: str) -> bytes:
     return base64.b64decode(data.split(",")[-1].encode())
 
@@ -1,10 +1,146 @@
-from docx import Document
+# parsers/docx_reader.py
+"""
+DOCX text without building a python-docx object model: word/document.xml is
+parsed incrementally straight out of the zip and each paragraph is dropped as
+soon as its line has been produced.
+
+Lines come out in document order:
+- headings as "#" * level + " " + text (from the paragraph style's outline level)
+- list items as "  " * level + "- " + text
+- table rows as "| cell | cell |" (empty cells dropped), then a blank line
+  after the table; nested tables are flattened into their cell
+"""
 import io
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Tuple
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+P, T, TAB, PTAB, BR, CR, NBH = (_W + x for x in ("p", "t", "tab", "ptab", "br", "cr", "noBreakHyphen"))
+BODY, TBL, TR, TC = _W + "body", _W + "tbl", _W + "tr", _W + "tc"
+PSTYLE, NUMPR, ILVL, OUTLINE = _W + "pStyle", _W + "numPr", _W + "ilvl", _W + "outlineLvl"
+VAL, TYPE = _W + "val", _W + "type"
+FALLBACK = _MC + "Fallback"
+STYLE, NAME = _W + "style", _W + "name"
+
+_TRAILING_DIGIT = re.compile(r"(\d)$")
+
+
+def _styles(z: zipfile.ZipFile) -> Dict[str, Tuple[int, Optional[int]]]:
+    """styleId -> (heading level or 0, list level or None)."""
+    if "word/styles.xml" not in z.namelist():
+        return {}
+    out = {}
+    with z.open("word/styles.xml") as fh:
+        for _, st in ET.iterparse(fh):
+            if st.tag != STYLE:
+                continue
+            name_el = st.find(NAME)
+            name = (name_el.get(VAL) if name_el is not None else "") or ""
+            heading = 0
+            lvl = st.find(f"{_W}pPr/{OUTLINE}")
+            if lvl is not None and lvl.get(VAL, "").isdigit() and int(lvl.get(VAL)) < 9:
+                heading = int(lvl.get(VAL)) + 1
+            elif name.lower() == "title":
+                heading = 1
+            listed = None
+            if st.find(f"{_W}pPr/{NUMPR}") is not None or name.lower().startswith("list"):
+                m = _TRAILING_DIGIT.search(name)
+                listed = int(m.group(1)) - 1 if m else 0
+            if heading or listed is not None:
+                out[st.get(_W + "styleId")] = (heading, listed)
+            st.clear()
+    return out
+
+
+def iter_docx_lines(b) -> Iterator[str]:
+    with zipfile.ZipFile(io.BytesIO(b) if isinstance(b, (bytes, bytearray)) else b) as z:
+        styles = _styles(z)
+        with z.open("word/document.xml") as fh:
+            yield from _lines(fh, styles)
+
+
+def _lines(fh, styles) -> Iterator[str]:
+    parts: list = []            # text of the current paragraph
+    style, ilvl, numbered = None, None, False
+    tbl = 0                     # table nesting depth
+    row: list = []
+    cell: list = []
+    skip = 0                    # inside mc:Fallback (duplicate of mc:Choice)
+    body = None
+
+    for ev, el in ET.iterparse(fh, events=("start", "end")):
+        tag = el.tag
+        if ev == "start":
+            if tag == BODY:
+                body = el
+            elif tag == FALLBACK:
+                skip += 1
+            elif tag == TBL:
+                tbl += 1
+            elif tag == TR and tbl == 1:
+                row = []
+            elif tag == TC and tbl == 1:
+                cell = []
+            continue
+
+        if tag == FALLBACK:
+            skip -= 1
+        elif skip:
+            continue
+        elif tag == T:
+            parts.append(el.text or "")
+        elif tag in (TAB, PTAB):
+            # w:tab also defines tab stops under w:pPr/w:tabs; only run content counts
+            if el.get(_W + "pos") is None:
+                parts.append("\t")
+        elif tag == BR:
+            if el.get(TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == CR:
+            parts.append("\n")
+        elif tag == NBH:
+            parts.append("-")
+        elif tag == PSTYLE:
+            style = el.get(VAL)
+        elif tag == ILVL:
+            v = el.get(VAL, "0")
+            ilvl = int(v) if v.isdigit() else 0
+        elif tag == NUMPR:
+            numbered = True
+        elif tag == P:
+            text = "".join(parts)
+            heading, listed = styles.get(style, (0, None))
+            if numbered or ilvl is not None:
+                listed = ilvl if ilvl is not None else (listed or 0)
+            parts, style, ilvl, numbered = [], None, None, False
+            if tbl:
+                if text.strip():
+                    cell.append(text.strip())
+            elif heading and text.strip():
+                yield "#" * heading + " " + text.strip()
+            elif listed is not None and text.strip():
+                yield "  " * listed + "- " + text.strip()
+            else:
+                yield text
+            el.clear()
+            if body is not None and not tbl:
+                body.clear()    # drop finished paragraphs; the parser keeps its own stack
+        elif tag == TC and tbl == 1:
+            if cell:
+                row.append(" ".join(cell))
+        elif tag == TR and tbl == 1:
+            if row:
+                yield "| " + " | ".join(row) + " |"
+        elif tag == TBL:
+            tbl -= 1
+            if tbl == 0:
+                yield ""
+                if body is not None:
+                    body.clear()
+
 
 def read_docx_bytes(b: bytes) -> str:
-    f = io.BytesIO(b)
-    doc = Document(f)
-    texts = []
-    for p in doc.paragraphs:
-        texts.append(p.text)
-    return "\n".join(texts).strip()
+    return "\n".join(iter_docx_lines(b)).strip()
@@ -1,99 +1,214 @@
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterable, Union
 from utils.text import split_lines, squash_spaces, clamp_text
 from utils.ac_rules import normalize_ac
 from utils.detection import *
 from utils.mapping import map_priority
 
-def parse_text(raw: str, project_key: str,
+def parse_text(raw: Union[str, Iterable[str]], project_key: str,
                default_labels: List[str],
                default_components: List[str],
                options: Dict) -> Tuple[Dict, Dict]:
-
-    lines = split_lines(raw)
-    title = ""
-    labels = set([x.lower() for x in default_labels])
-    components = set(default_components)
-    priority = None
-    story_points = None
-    epic_link = None
-    user_story_lines = []
-    desc_lines = []
-    ac_block = []
-    in_ac = False
+    """
+    `raw` is the extracted text, or an iterable of its lines (see
+    utils.text.iter_lines), which is consumed once, in order.
+    options["structure_hints"] (parsers.structure_hints(), DOCX) also reads "#"
+    headings by their text, opens the AC block at a heading naming it and
+    makes each top-level "- " item or "| a | b |" row in it one criterion.
+    """
+    return next(_parse(raw, project_key, default_labels, default_components, options, 0))
+
+
+def parse_stories(raw: Union[str, Iterable[str]], project_key: str,
+                  default_labels: List[str],
+                  default_components: List[str],
+                  options: Dict) -> List[Tuple[Dict, Dict]]:
+    """
+    parse_text() for a document holding many stories, in the same single pass.
+    A story starts at a heading of level <= options["split_heading_level"]
+    (default 2; 0 splits on titles only), whose text is the story's title, and
+    at a Title:/Summary: line once the current story has a title or, after a
+    heading, any content (a Title: right under a heading names that story).
+    Text before the first boundary belongs to the first story;
+    sections with no content (e.g. a document heading right before the first
+    story heading) are dropped, but there is always at least one story. Each story's diagnostics also carry its
+    "index", "start_line"/"end_line" (1-based) and "boundary".
+    """
+    level = options.get("split_heading_level", 2)
+    return list(_parse(raw, project_key, default_labels, default_components, options, max(0, level), True))
+
+
+def _parse(raw, project_key, default_labels, default_components, options, split_level, split=False):
+    lines = split_lines(raw) if isinstance(raw, str) else raw
+
+    # description and user-story lines past what the description clamp keeps are not
+    # buffered (every line is still parsed for fields); *_end: length up to the last
+    # non-blank kept line, so strip() can't pull the joined text back under the clamp
+    cap = options.get("max_chars", 400000)
+    us_count = us_len = us_end = desc_len = desc_end = 0
+
+    # "#" headings, "- " list items and "| a | b |" rows as the DOCX reader writes
+    # them; split mode reads heading levels either way, to find the stories
+    hints = options.get("structure_hints", False)
+    label_hashtags = options.get("label_hashtags", True)
+    detect_points = options.get("detect_points_from_text", True)
+    detect_priority = options.get("detect_priority_from_text", True)
+
+    def fresh():
+        # first_line, title, heading, labels, components, priority, story_points, epic_link,
+        # user_story_lines, desc_lines, ac_block, in_ac
+        return ("", "", "", set([x.lower() for x in default_labels]), set(default_components),
+                None, None, None, [], [], [], False)
+
+    (first_line, title, heading, labels, components, priority, story_points, epic_link,
+     user_story_lines, desc_lines, ac_block, in_ac) = fresh()
+    n = start = 0
+    boundary = "start"
+    index = 0
 
     for ln in lines:
+        n += 1
         l = ln.strip()
-        low = l.lower()
+        field = l
+        level = 0
+        if l[:1] == "#" and (hints or split):
+            h = RE_HEADING.match(l)
+            if h:
+                text = h.group(2).strip()
+                if not RE_AC_HEADING.match(text):
+                    level = len(h.group(1))
+                    if hints:
+                        # a structured heading is matched on its text and closes an open AC block
+                        field, in_ac = text, False
+                elif hints:
+                    # ... and one naming the AC block opens it, colon or not
+                    if not first_line:
+                        first_line = ln
+                    in_ac = True
+                    continue
+        kind, m = match_field(field, in_ac, bool(title) and not split)
+
+        if split:
+            if in_ac and kind is None and field[:1] in "tTsS\u017f":
+                # a title right after the criteria, with no blank line between
+                m = RE_TITLE.match(field.lower())
+                if m:
+                    kind, in_ac = "title", False
+            cut = ""
+            if kind == "title" and (title or (boundary != "start" and (user_story_lines or desc_lines or ac_block))):
+                cut = "title"
+            if level and level <= split_level:
+                cut = "heading" if first_line else ""
+            if cut:
+                if title or user_story_lines or desc_lines or ac_block:
+                    story, diag = _finish(project_key, options, first_line, title, heading, labels,
+                                          components, priority, story_points, epic_link,
+                                          user_story_lines, desc_lines, ac_block, us_count)
+                    diag.update(index=index, start_line=start + 1, end_line=n - 1, boundary=boundary)
+                    index += 1
+                    yield story, diag
+                (first_line, title, heading, labels, components, priority, story_points, epic_link,
+                 user_story_lines, desc_lines, ac_block, in_ac) = fresh()
+                us_count = us_len = us_end = desc_len = desc_end = 0
+                start, boundary = n - 1, cut
+            if level and level <= split_level and kind is None:
+                heading = text
+                first_line = first_line or ln
+                continue
+
+        if not first_line and l:
+            first_line = ln
 
-        if RE_ACCEPTANCE.match(low):
+        if kind == "acceptance":
             in_ac = True
             continue
 
         if in_ac:
             if not l:
                 in_ac = False
+            elif not hints:
+                ac_block.append(l)
+            elif RE_BULLET.match(l):
+                # a top-level list item starts a new criterion; indented ones continue it
+                if ac_block and not ln[:1].isspace():
+                    ac_block.append("")
+                ac_block.append(RE_BULLET.sub("", l, count=1))
+            elif RE_TABLE_ROW.match(l):
+                # each table row is one criterion
+                cells = table_cells(l)
+                if cells:
+                    ac_block.extend(("", " ".join(cells)) if ac_block else (" ".join(cells),))
             else:
                 ac_block.append(l)
             continue
 
-        if not title:
-            m = RE_TITLE.match(low)
-            if m:
-                title = m.group(2).strip()
-                continue
+        if kind == "title":
+            title = m.group(2).strip()
+            continue
 
-        m = RE_LABELS.match(low)
-        if m:
+        if kind == "labels":
             labels.update(comma_words(m.group(1)))
             continue
 
-        m = RE_COMPONENTS.match(low)
-        if m:
+        if kind == "components":
             components.update(comma_words(m.group(1)))
             continue
 
-        m = RE_PRIORITY.match(low)
-        if m:
+        if kind == "priority":
             priority = m.group(1).strip().lower()
             continue
 
-        m = RE_POINTS.match(low)
-        if m:
+        if kind == "points":
             try:
                 story_points = float(m.group(2))
             except: pass
             continue
 
-        m = RE_EPIC.match(low)
-        if m:
+        if kind == "epic":
             epic_link = m.group(2).strip()
             continue
 
-        if RE_USER_STORY.match(low):
-            user_story_lines.append(l)
-        else:
+        if kind == "user_story":
+            us_count += 1
+            if us_end <= cap:
+                user_story_lines.append(l)
+                us_len += len(l) + 1
+                us_end = us_len if l else us_end
+        elif desc_end <= cap:
             desc_lines.append(l)
+            desc_len += len(l) + 1
+            desc_end = desc_len if l else desc_end
 
-        if options.get("label_hashtags", True):
+        if label_hashtags:
             for tag in find_hashtags(l):
                 labels.add(tag)
 
-        if options.get("detect_points_from_text", True) and story_points is None:
+        if detect_points and story_points is None:
             m = RE_POINTS_INLINE.search(l)
             if m:
                 try: story_points = float(m.group(1))
                 except: pass
 
-        if options.get("detect_priority_from_text", True) and not priority:
+        if detect_priority and not priority:
             m = RE_PRIORITY_INLINE.search(l)
             if m:
                 priority = m.group(1)
 
-    acceptance = normalize_ac(ac_block)
+    if split and index and not (title or user_story_lines or desc_lines or ac_block):
+        return
+    story, diag = _finish(project_key, options, first_line, title, heading, labels, components, priority,
+                          story_points, epic_link, user_story_lines, desc_lines, ac_block, us_count)
+    if split:
+        diag.update(index=index, start_line=start + 1, end_line=n, boundary=boundary)
+    yield story, diag
+
+
+def _finish(project_key, options, first_line, title, heading, labels, components, priority,
+            story_points, epic_link, user_story_lines, desc_lines, ac_block, us_count) -> Tuple[Dict, Dict]:
+    acceptance = normalize_ac(ac_block, options.get("ac_near_duplicates", False))
 
     if not title:
-        title = (user_story_lines[0] if user_story_lines else "")
-        title = title or next((x for x in lines if x.strip()), "Generated Story")
+        title = heading or (user_story_lines[0] if user_story_lines else "")
+        title = title or first_line or "Generated Story"
         title = squash_spaces(title)[:255]
 
     desc = []
@@ -124,7 +239,7 @@ def parse_text(raw: str, project_key: str,
     }
 
     diagnostics = {
-        "found_user_story_lines": len(user_story_lines),
+        "found_user_story_lines": us_count,
         "ac_count": len(acceptance),
         "labels_auto": sorted(list(labels)),
         "priority_token": priority,
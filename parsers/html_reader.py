@@ -1,8 +1,230 @@
-from bs4 import BeautifulSoup
+# parsers/html_reader.py
+"""
+HTML -> text: every text node stripped, empty ones dropped, one per line, with
+script/style/noscript content left out (plus template/rt/rp, which
+BeautifulSoup's get_text() never returned either).
 
-def read_html_bytes(b: bytes) -> str:
+Engines:
+- "stream": stdlib html.parser events; no tree, same tokenizer bs4 used, so the
+  output is identical to the old BeautifulSoup path
+- "lxml":   libxml2's HTML parser driving the same collector (much faster);
+  libxml2 repairs broken markup its own way, so malformed input can differ
+- "bs4":    the original BeautifulSoup implementation
+"""
+import re
+import codecs
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import List
+
+ENGINES = ("stream", "lxml", "bs4")
+
+# subtrees dropped outright (decomposed in the bs4 version)
+_DROP = frozenset(("script", "style", "noscript"))
+# bs4 keeps these, but their strings are not returned by get_text()
+_HIDDEN = frozenset(("template", "rt", "rp"))
+# closed by bs4 as soon as they open
+_VOID = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+                   "menuitem", "meta", "param", "source", "spacer", "track", "wbr", "basefont",
+                   "bgsound", "command", "frame", "image", "isindex", "nextid"))
+
+# named references as bs4 resolves them (the HTML5 list, matched without the ";")
+_ENTITIES = {k[:-1]: v for k, v in html5.items() if k.endswith(";")}
+
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_:.-]+)""", re.I)
+
+
+def _decode(b: bytes) -> str:
+    """BOM, then a <meta> charset near the top, then UTF-8, then Windows-1252."""
+    for bom, enc in _BOMS:
+        if b.startswith(bom):
+            return b.decode(enc, errors="replace")
+    m = _META_CHARSET.search(b, 0, 4096)
+    if m:
+        try:
+            return b.decode(m.group(1).decode("ascii"))
+        except (LookupError, UnicodeDecodeError):
+            pass
+    try:
+        return b.decode("utf-8")
+    except UnicodeDecodeError:
+        return b.decode("windows-1252", errors="replace")
+
+
+class _Collector:
+    """
+    Text nodes from start/end/data events. Data is buffered until the next
+    event that isn't text, then emitted as one node, the way bs4 builds
+    strings. Open tags are kept on a stack so an end tag closes everything
+    opened after its start tag, like bs4's tree does.
+    """
+
+    def __init__(self):
+        self.out: List[str] = []
+        self._buf: List[str] = []
+        self._stack: List[str] = []
+        self._drop = 0
+        self._hidden = 0
+
+    def flush(self) -> None:
+        if self._buf:
+            s = "".join(self._buf).strip()
+            self._buf = []
+            if s and not self._drop and not self._hidden:
+                self.out.append(s)
+
+    def text(self, data: str) -> None:
+        self._buf.append(data)
+
+    def cdata(self, data: str) -> None:
+        # CData is returned even inside template/rt/rp
+        self.flush()
+        s = data.strip()
+        if s and not self._drop:
+            self.out.append(s)
+
+    def start(self, tag: str) -> None:
+        self.flush()
+        self._stack.append(tag)
+        if tag in _DROP:
+            self._drop += 1
+        elif tag in _HIDDEN:
+            self._hidden += 1
+
+    def end(self, tag: str) -> None:
+        self.flush()
+        if tag not in self._stack:
+            return
+        while True:
+            t = self._stack.pop()
+            if t in _DROP:
+                self._drop -= 1
+            elif t in _HIDDEN:
+                self._hidden -= 1
+            if t == tag:
+                return
+
+
+class _StreamParser(HTMLParser):
+    def __init__(self, sink: _Collector):
+        # entities are resolved here, as bs4 does, so its quirks carry over
+        super().__init__(convert_charrefs=False)
+        self.sink = sink
+        self._closed: List[str] = []    # void tags whose explicit end tag bs4 swallows
+
+    def handle_starttag(self, tag, attrs):
+        self.sink.start(tag)
+        if tag in _VOID:
+            self.sink.end(tag)
+            self._closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.sink.start(tag)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed:
+            self._closed.remove(tag)
+        else:
+            self.sink.end(tag)
+
+    def handle_data(self, data):
+        self.sink.text(data)
+
+    def handle_charref(self, name):
+        try:
+            n = int(name[1:], 16) if name[:1] in "xX" else int(name)
+        except ValueError:
+            n = -1
+        data = None
+        if 0 <= n < 256:
+            # &#147; and friends mean Windows-1252, not Latin-1 control codes
+            try:
+                data = bytes([n]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(n)
+            except (ValueError, OverflowError):
+                pass
+        self.sink.text(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        self.sink.text(_ENTITIES.get(name) or "&" + name)
+
+    def handle_comment(self, data):
+        self.sink.flush()
+
+    def handle_decl(self, decl):
+        self.sink.flush()
+
+    def handle_pi(self, data):
+        self.sink.flush()
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self.sink.cdata(data[6:])
+        else:
+            self.sink.flush()
+
+
+class _LxmlTarget:
+    def __init__(self, sink: _Collector):
+        self.sink = sink
+
+    def start(self, tag, attrib):
+        self.sink.start(tag)
+
+    def end(self, tag):
+        self.sink.end(tag)
+
+    def data(self, data):
+        self.sink.text(data)
+
+    def comment(self, text):
+        self.sink.flush()
+
+    def pi(self, target, data=None):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.flush()
+
+
+def _read_stream(text: str) -> List[str]:
+    sink = _Collector()
+    p = _StreamParser(sink)
+    p.feed(text)
+    p.close()
+    sink.flush()
+    return sink.out
+
+
+def _read_lxml(text: str) -> List[str]:
+    from lxml import etree
+    sink = _Collector()
+    p = etree.HTMLParser(target=_LxmlTarget(sink), no_network=True)
+    p.feed(text)
+    p.close()
+    return sink.out
+
+
+def read_html_bytes_bs4(b: bytes) -> str:
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(b, "html.parser")
-    for t in soup(["script","style","noscript"]):
+    for t in soup(["script", "style", "noscript"]):
         t.decompose()
     return soup.get_text("\n", strip=True)
 
+
+def read_html_bytes(b: bytes, engine: str = "stream") -> str:
+    if engine == "bs4":
+        return read_html_bytes_bs4(b)
+    if engine == "lxml":
+        try:
+            return "\n".join(_read_lxml(_decode(b)))
+        except ImportError:
+            pass
+    return "\n".join(_read_stream(_decode(b)))
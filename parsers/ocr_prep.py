@@ -0,0 +1,146 @@
+# parsers/ocr_prep.py
+"""
+Page cleanup before tesseract: grayscale, deskew, crop blank margins, scale
+text down to about `target_xheight` px of x-height and binarize (Otsu).
+Tesseract works best around 20-30 px x-height and gets slower, and less
+accurate, on tilted, speckled or oversized input; a cropped 1-bit bitmap is
+also far cheaper to hand over than a full-page RGB one.
+
+Layout analysis (threshold, skew, margins) runs on a box-averaged copy of
+the page about ANALYSIS_PX on its long side. Isolated ink pixels (scanner
+speckle) are dropped there, so they count neither as text nor as margin
+content, and from the binarized output.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+ANALYSIS_PX = 1000
+MIN_SCALE = 0.3          # never shrink text below this, whatever the estimate says
+BLANK_INK = 0.00005      # pages with less ink than this fraction are blank
+MIN_SKEW = 0.5           # degrees; smaller tilts don't bother tesseract and are often misread on short pages
+NOISE_FLOOR = 0.005      # rows/columns with less ink than this fraction don't count for cropping
+
+
+def otsu(gray: np.ndarray) -> int:
+    """Otsu threshold of a uint8 image: pixels <= it are ink."""
+    p = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    p /= p.sum()
+    omega = np.cumsum(p)
+    mu = np.cumsum(p * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    return int(np.nanargmax(between))
+
+
+def _gray(img: Image.Image) -> Image.Image:
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        # transparent areas would turn black
+        img = img.convert("RGBA")
+        img = Image.alpha_composite(Image.new("RGBA", img.size, "white"), img)
+    return img if img.mode == "L" else img.convert("L")
+
+
+def despeckle(ink: np.ndarray) -> np.ndarray:
+    """`ink` without the ink pixels none of whose 8 neighbours is ink."""
+    p = np.pad(ink, 1).astype(np.uint8)
+    h, w = ink.shape
+    n = sum(p[1 + dy:1 + dy + h, 1 + dx:1 + dx + w]
+            for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx)
+    return ink & (n > 0)
+
+
+def _row_score(ink: Image.Image, angle: float) -> float:
+    # text lines rotated level give the peakiest row profile
+    rows = np.asarray(ink.rotate(angle, resample=Image.NEAREST, fillcolor=0), dtype=np.float32).sum(axis=1)
+    return float(rows.var())
+
+
+def skew_angle(ink: Image.Image, max_angle: float = 5.0) -> float:
+    """Degrees to rotate `ink` (text 255 on 0) by so its lines are horizontal."""
+    # 0.5 degree steps on a half-size copy, then 0.1 degree steps around the best
+    half = ink.reduce(2) if min(ink.size) >= 400 else ink
+    coarse = np.arange(-max_angle, max_angle + 1e-9, 0.5)
+    best = max(coarse, key=lambda a: _row_score(half, a))
+    fine = np.arange(best - 0.4, best + 0.41, 0.1)
+    return round(float(max(fine, key=lambda a: _row_score(ink, a))), 2)
+
+
+def x_height(ink: np.ndarray) -> Optional[float]:
+    """
+    Median x-height (px) of the text lines in a boolean ink array: per line
+    (a run of rows with ink), the rows at least half as dense as its densest one.
+    """
+    rows = ink.sum(axis=1)
+    if not rows.any():
+        return None
+    on = rows > max(1, rows.max() * 0.05)
+    heights = []
+    i, n = 0, len(on)
+    while i < n:
+        if not on[i]:
+            i += 1
+            continue
+        j = i
+        while j < n and on[j]:
+            j += 1
+        line = rows[i:j]
+        if j - i >= 3:
+            heights.append(int((line >= line.max() * 0.5).sum()))
+        i = j
+    return float(np.median(heights)) if heights else None
+
+
+def preprocess(img: Image.Image, target_xheight: int = 20, deskew: bool = True,
+               max_skew: float = 5.0) -> Tuple[Optional[Image.Image], float, dict]:
+    """
+    (cleaned 1-bit image or None for a blank page, scale applied, info).
+    `info` has "skew", "crop" (left, top, right, bottom), "x_height" and "scale".
+    """
+    gray = _gray(img)
+    k = max(1, max(gray.size) // ANALYSIS_PX)
+    a = np.asarray(gray.reduce(k) if k > 1 else gray)
+    info = {"skew": 0.0, "crop": None, "x_height": None, "scale": 1.0}
+    if int(a.max()) - int(a.min()) < 32:
+        return None, 1.0, info
+    t = otsu(a)
+    ink = despeckle(a <= t)
+    if ink.mean() < BLANK_INK:
+        return None, 1.0, info
+
+    if deskew:
+        angle = skew_angle(Image.fromarray(np.where(ink, 255, 0).astype(np.uint8)), max_skew)
+        if abs(angle) >= MIN_SKEW:
+            info["skew"] = angle
+            gray = gray.rotate(angle, resample=Image.BILINEAR, fillcolor=255, expand=True)
+            ink = despeckle(np.asarray(gray.reduce(k) if k > 1 else gray) <= t)
+
+    # crop to the inked area plus a small margin; rows/columns with only a few
+    # ink pixels are leftover noise, not text
+    rows = np.flatnonzero(ink.sum(axis=1) >= max(2, NOISE_FLOOR * ink.shape[1]))
+    if not len(rows):
+        return None, 1.0, info
+    band = ink[rows[0]:rows[-1] + 1]
+    cols = np.flatnonzero(band.sum(axis=0) >= max(2, NOISE_FLOOR * band.shape[0]))
+    if not len(cols):
+        return None, 1.0, info
+    pad = 4
+    box = (max(0, int(cols[0] - pad) * k), max(0, int(rows[0] - pad) * k),
+           min(gray.width, int(cols[-1] + 1 + pad) * k), min(gray.height, int(rows[-1] + 1 + pad) * k))
+    gray = gray.crop(box)
+    info["crop"] = box
+
+    ink = despeckle(np.asarray(gray) <= t)
+    if ink.mean() < BLANK_INK:
+        return None, 1.0, info
+    xh = x_height(ink)
+    info["x_height"] = xh
+    scale = 1.0
+    if xh and xh > target_xheight:
+        scale = max(MIN_SCALE, target_xheight / xh)
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        gray = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8)).resize(size, Image.BOX)
+        ink = np.asarray(gray) < 128
+    info["scale"] = round(scale, 3)
+    return Image.fromarray(~ink), scale, info
@@ -1,24 +1,190 @@
 import io
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from PIL import Image
 import pytesseract
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
 
-def run_ocr_on_image_bytes(b: bytes, lang: str = "eng") -> str:
+from . import ocr_prep
+
+OCR_DPI = 200
+
+_pool = None
+_pool_size = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # one shared pool per process; rebuilt only if the configured size changes
+    global _pool, _pool_size
+    if _pool is None or _pool_size != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_size = workers
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool, _pool_size
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_size = None, 0
+
+
+def _tesseract_config(opts: dict, dpi=None) -> str:
+    parts = []
+    if opts.get("oem") is not None:
+        parts.append(f"--oem {int(opts['oem'])}")
+    if opts.get("psm") is not None:
+        parts.append(f"--psm {int(opts['psm'])}")
+    if dpi:
+        # tesseract can't guess the resolution of a cropped/scaled bitmap
+        parts.append(f"--dpi {max(70, round(dpi))}")
+    return " ".join(parts)
+
+
+def _ocr_page(img, lang: str, opts: dict = None, dpi: int = None) -> str:
+    """
+    OCR one page image. `opts` (see config.ocr_options): "preprocess" runs
+    ocr_prep first (blank pages then skip tesseract), "psm"/"oem" go to tesseract.
+    """
+    opts = opts or {}
+    if opts.get("preprocess"):
+        img, scale, _ = ocr_prep.preprocess(img, opts.get("target_xheight", 20), opts.get("deskew", True))
+        if img is None:
+            return ""
+        dpi = dpi and dpi * scale
+    return pytesseract.image_to_string(img, lang=lang, config=_tesseract_config(opts, dpi)).strip()
+
+
+def page_dpi(width_pt: float, height_pt: float, opts: dict) -> int:
+    """
+    Rasterization DPI for a page of the given size (PDF points): about
+    opts["page_px"] pixels on the long side, within dpi_min..dpi_max.
+    page_px 0 (or no opts) keeps the fixed OCR_DPI.
+    """
+    px = (opts or {}).get("page_px") or 0
+    long_in = max(width_pt, height_pt) / 72.0
+    if px <= 0 or long_in <= 0:
+        return OCR_DPI
+    return int(min(opts.get("dpi_max", 300), max(opts.get("dpi_min", 100), round(px / long_in))))
+
+
+def _page_dpis(b, pages, path: str, opts: dict) -> dict:
+    # {page_no: dpi} from the page boxes; unreadable sizes fall back to OCR_DPI
+    if not (opts or {}).get("page_px"):
+        return {}
+    try:
+        from pypdf import PdfReader
+        reader = PdfReader(path) if path else PdfReader(io.BytesIO(b) if isinstance(b, (bytes, bytearray)) else b)
+        out = {}
+        for p in pages:
+            box = reader.pages[p - 1].mediabox
+            out[p] = page_dpi(float(box.width), float(box.height), opts)
+        return out
+    except Exception:
+        return {}
+
+
+def _iter_pdf_pages(b, pages, window: int, dpi: int = OCR_DPI, path: str = None, opts: dict = None):
+    """
+    Yield (page_no, image, dpi) for the 1-based `pages` (None = all), rasterizing
+    runs of consecutive pages `window` at a time so only a few bitmaps are alive
+    at once. With `path`, pdftoppm reads the file directly instead of a temp copy of `b`.
+    With opts["page_px"] each page gets its own DPI (page_dpi); a run is split
+    wherever it changes.
+    """
+    if path:
+        convert = lambda **kw: convert_from_path(path, **kw)
+    else:
+        b = bytes(b)
+        convert = lambda **kw: convert_from_bytes(b, **kw)
+    if pages is None:
+        info = pdfinfo_from_path(path) if path else pdfinfo_from_bytes(b)
+        pages = range(1, int(info.get("Pages", 0)) + 1)
+    window = max(1, window)
+    pages = sorted(set(pages))
+    dpis = _page_dpis(b, pages, path, opts)
+
+    runs, cur = [], []
+    for p in pages:
+        if cur and (p != cur[-1] + 1 or len(cur) >= window or dpis.get(p, dpi) != dpis.get(cur[0], dpi)):
+            runs.append(cur)
+            cur = []
+        cur.append(p)
+    if cur:
+        runs.append(cur)
+
+    for run in runs:
+        run_dpi = dpis.get(run[0], dpi)
+        imgs = convert(dpi=run_dpi, first_page=run[0], last_page=run[-1])
+        for p in run:
+            if not imgs:
+                break
+            yield p, imgs.pop(0), run_dpi
+
+
+def pdf_page_count(b, path: str = None) -> int:
+    info = pdfinfo_from_path(path) if path else pdfinfo_from_bytes(bytes(b))
+    return int(info.get("Pages", 0))
+
+
+def run_ocr_on_image_bytes(b: bytes, lang: str = "eng", opts: dict = None) -> str:
     try:
         img = Image.open(io.BytesIO(b))
-        text = pytesseract.image_to_string(img, lang=lang)
-        return text.strip()
+        dpi = img.info.get("dpi")
+        return _ocr_page(img, lang, opts, dpi[0] if dpi and dpi[0] > 1 else None)
     except Exception as e:
         return f"[OCR failed: {e}]"
 
-def run_ocr_on_pdf(b: bytes, lang: str = "eng", max_pages: int = 10) -> str:
+
+def ocr_pdf_pages(b, pages, lang: str = "eng", workers: int = 1, window: int = 4,
+                  path: str = None, progress=None, opts: dict = None) -> dict:
+    """
+    OCR only the given 1-based `pages`; returns {page_no: text}. Raises on failure.
+    - workers <= 1: rasterize + OCR in this process, one window at a time
+    - workers > 1:  OCR on a shared process pool, at most max(workers, window) pages in flight
+    - workers == 0: use os.cpu_count()
+    `b` may be bytes or an mmap; pass `path` when the PDF is already on disk.
+    `progress`, if given, is called as progress("ocr", pages_done, pages_total).
+    `opts` tunes rasterization and tesseract (see _ocr_page, page_dpi).
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    texts: dict = {}
+    total = len(pages) if pages is not None and hasattr(pages, "__len__") else None
+    if workers <= 1:
+        for p, img, dpi in _iter_pdf_pages(b, pages, window, path=path, opts=opts):
+            texts[p] = _ocr_page(img, lang, opts, dpi)
+            if progress:
+                progress("ocr", len(texts), total)
+        return texts
+
+    pool = _get_pool(workers)
+    limit = max(workers, window)
+    pending = {}
+    for p, img, dpi in _iter_pdf_pages(b, pages, window, path=path, opts=opts):
+        pending[pool.submit(_ocr_page, img, lang, opts, dpi)] = p
+        if len(pending) >= limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                texts[pending.pop(fut)] = fut.result()
+                if progress:
+                    progress("ocr", len(texts), total)
+    for fut in pending:
+        texts[pending[fut]] = fut.result()
+        if progress:
+            progress("ocr", len(texts), total)
+    return texts
+
+
+def run_ocr_on_pdf(b, lang: str = "eng", max_pages: int = 10,
+                   workers: int = 1, window: int = 4, path: str = None, opts: dict = None) -> str:
+    """OCR the first `max_pages` pages; blocks are reassembled in page order."""
     try:
-        pages = convert_from_bytes(b, dpi=200, first_page=1, last_page=max_pages)
-        parts = []
-        for i, page in enumerate(pages):
-            text = pytesseract.image_to_string(page, lang=lang)
-            if text.strip():
-                parts.append(f"[Page {i+1} OCR]\n{text.strip()}")
+        last = min(pdf_page_count(b, path), max_pages)
+        texts = ocr_pdf_pages(b, range(1, last + 1), lang, workers, window, path, opts=opts)
+        parts = [f"[Page {p} OCR]\n{texts[p]}" for p in sorted(texts) if texts[p]]
         return "\n\n".join(parts).strip()
     except Exception as e:
         return f"[PDF OCR failed: {e}]"
@@ -1,14 +1,28 @@
 # parsers/pdf_reader.py
+import io
 try:
     from pypdf import PdfReader          
 except ImportError:                      
     from PyPDF2 import PdfReader
 
-def read_pdf_bytes(b: bytes, max_pages: int = 50) -> str:
-    reader = PdfReader(b)
-    pages = min(len(reader.pages), max_pages)
-    parts = []
-    for i in range(pages):
-        txt = reader.pages[i].extract_text() or ""
-        parts.append(txt)
-    return "\n".join(parts).strip()
+def iter_pdf_pages(b, max_pages: int = 50, progress=None):
+    """
+    Text layer of each of the first `max_pages` pages ("" where a page has none),
+    extracted one page at a time as the caller asks for it.
+    `progress`, if given, is called as progress("pdf_text", pages_done, pages_total).
+    """
+    # b: bytes, an mmap / file object, or a path; only plain bytes need wrapping
+    reader = PdfReader(io.BytesIO(b) if isinstance(b, (bytes, bytearray)) else b)
+    total = min(len(reader.pages), max_pages)
+    for i in range(total):
+        yield reader.pages[i].extract_text() or ""
+        if progress:
+            progress("pdf_text", i + 1, total)
+
+
+def read_pdf_pages(b, max_pages: int = 50) -> list:
+    return list(iter_pdf_pages(b, max_pages))
+
+
+def read_pdf_bytes(b, max_pages: int = 50) -> str:
+    return "\n".join(read_pdf_pages(b, max_pages)).strip()
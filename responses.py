@@ -0,0 +1,168 @@
+# responses.py
+"""
+Response shaping and encoding for the convert endpoints.
+
+- fields=story,raw_text,diagnostics picks which top-level keys of a
+  ConvertResult are sent; raw_text is not even produced when it isn't asked for
+- FastJSONResponse / json_response() serialize with orjson (pydantic_core's
+  encoder without it) and skip FastAPI's second validation + encoding pass
+- CompressionMiddleware negotiates zstd (needs `zstandard`) or gzip from
+  Accept-Encoding for JSON, NDJSON and text bodies; streamed bodies are
+  compressed chunk by chunk and flushed, so NDJSON lines still arrive as
+  they are produced
+"""
+import zlib
+import asyncio
+from typing import Iterable, Optional, Set, Union
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    from pydantic_core import to_json
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CONVERT_FIELDS = ("story", "raw_text", "diagnostics")
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+OFFLOAD_BYTES = 64 * 1024      # bigger chunks are compressed on a thread (zlib/zstd release the GIL)
+
+
+def parse_fields(value: Union[str, Iterable[str], None]) -> Optional[Set[str]]:
+    """"story,diagnostics" (or a list) -> set of ConvertResult keys; None keeps all of them."""
+    if value is None:
+        return None
+    items = value.split(",") if isinstance(value, str) else value
+    out = {x.strip() for x in items if x and x.strip()}
+    bad = sorted(out - set(CONVERT_FIELDS))
+    if bad or not out:
+        raise HTTPException(status_code=422,
+                            detail=f"fields: expected a subset of {', '.join(CONVERT_FIELDS)}, got {value!r}")
+    return out
+
+
+def wants_raw(fields: Optional[Set[str]]) -> bool:
+    return fields is None or "raw_text" in fields
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(model: BaseModel, include=None, status_code: int = 200, headers=None) -> FastJSONResponse:
+    """`model` as JSON with only the `include`d fields (pydantic include syntax)."""
+    return FastJSONResponse(model.model_dump(mode="json", include=include), status_code=status_code,
+                            headers=headers)
+
+
+# --------------------------- compression ---------------------------
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best of zstd/gzip the client accepts (by q-value, zstd on ties), or None."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    star = offered.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in (("zstd", "gzip") if zstandard is not None else ("gzip",)):
+        q = offered.get(coding, star)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Encoder:
+    def __init__(self, coding: str, gzip_level: int, zstd_level: int):
+        if coding == "zstd":
+            self._c = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)   # 31: gzip container
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(self._sync)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush()
+
+    async def encode(self, data: bytes, more: bool) -> bytes:
+        fn = self.chunk if more else self.finish
+        if len(data) >= OFFLOAD_BYTES:
+            return await asyncio.to_thread(fn, data)
+        return fn(data)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses for clients that send Accept-Encoding: whole bodies of
+    at least `min_bytes`, and every streamed body. Responses that already
+    carry a Content-Encoding, and non-text types, pass through untouched.
+    """
+
+    def __init__(self, app, min_bytes: int = 1024, gzip_level: int = 5, zstd_level: int = 3):
+        self.app = app
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.min_bytes <= 0:
+            return await self.app(scope, receive, send)
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        enc: Optional[_Encoder] = None
+
+        async def compressing_send(msg):
+            nonlocal start, enc
+            if msg["type"] == "http.response.start":
+                start = msg             # held until the first body chunk decides
+                return
+            if msg["type"] != "http.response.body":
+                return await send(msg)
+            body, more = msg.get("body", b""), msg.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                ctype = headers.get("content-type", "")
+                if ("content-encoding" not in headers and ctype.startswith(COMPRESSIBLE)
+                        and (more or len(body) >= self.min_bytes)):
+                    enc = _Encoder(coding, self.gzip_level, self.zstd_level)
+                    headers["Content-Encoding"] = coding
+                    headers.add_vary_header("Accept-Encoding")
+                    del headers["Content-Length"]
+                    body = await enc.encode(body, more)
+                    if not more:
+                        headers["Content-Length"] = str(len(body))
+                    start["headers"] = headers.raw
+                await send(start)
+                start = None
+            elif enc is not None:
+                body = await enc.encode(body, more)
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,209 @@
+# serve.py
+"""
+Production launcher: several uvicorn workers sharing one listening socket.
+
+    python -m serve [--workers N] [--cpus N] [--port 8000] [--print-plan]
+
+- Sizes the workers and each worker's process pools from the CPU budget
+  (affinity / cgroup quota), so that with every worker busy there is about
+  one CPU-heavy process per CPU: a worker's share is split between its
+  extraction, bulk and job pools (at least one process each), OCR runs
+  serially inside those processes and OMP_THREAD_LIMIT=1 stops tesseract
+  adding threads on top.
+- Points the extraction cache, job store, idempotency store, Jira metadata
+  cache and conversion history at SQLite files in SERVE_STATE_DIR, shared
+  by all workers.
+- SIGHUP replaces the workers one at a time (picking up new code and .env):
+  the new one starts accepting first, then the old one stops accepting,
+  finishes its in-flight requests and drains its jobs within
+  SERVE_GRACEFUL_TIMEOUT. SIGTERM/SIGINT stop every worker the same way.
+  A worker that dies is restarted.
+
+Settings already present in the environment or .env win over the plan.
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+from typing import Dict, List
+
+import uvicorn
+
+from config import Settings, get_settings
+
+log = logging.getLogger("taskbench.serve")
+
+READY_TIMEOUT = 120.0      # seconds a new worker gets to start before a reload gives up on it
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 quota."""
+    n = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as fh:
+            quota, period = fh.read().split()
+        if quota != "max":
+            n = min(n, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, n)
+
+
+def plan(s: Settings, cpus: int, workers: int = 0) -> Dict[str, str]:
+    """Environment for the workers: pool sizes for `cpus` CPUs and shared state files."""
+    # the API processes themselves mostly wait; the CPU goes to their pools. Each worker's
+    # share is split over its three pools (extraction, bulk, jobs), so that with all of them
+    # busy there is one process per CPU; every pool gets at least one, which on fewer than
+    # 3 CPUs per worker is a little over
+    workers = workers or max(1, min(cpus // 4, 8))
+    per = max(1, cpus // workers)
+    bulk = jobs = max(1, per // 4)
+    state = os.path.abspath(s.SERVE_STATE_DIR)
+    env = {
+        "SERVE_WORKERS": workers,
+        "EXTRACT_WORKERS": max(1, per - bulk - jobs),
+        "JOB_WORKERS": jobs,
+        "BULK_CONCURRENCY": bulk,
+        "OCR_WORKERS": 1,
+        "OMP_THREAD_LIMIT": 1,
+        "EXTRACT_CACHE_DB": os.path.join(state, "extract_cache.db"),
+        "JOB_STORE_DB": os.path.join(state, "jobs.db"),
+        "IDEMPOTENCY_DB": os.path.join(state, "idempotency.db"),
+        "JIRA_META_DB": os.path.join(state, "jira_meta.db"),
+        "HISTORY_DB": os.path.join(state, "history.db"),
+        "JOB_DRAIN_SECONDS": s.SERVE_GRACEFUL_TIMEOUT,
+    }
+    return {k: str(v) for k, v in env.items()}
+
+
+def apply(env: Dict[str, str]) -> Dict[str, str]:
+    """Set the planned variables that aren't set yet; returns the effective values."""
+    for k, v in env.items():
+        os.environ.setdefault(k, v)
+    return {k: os.environ[k] for k in env}
+
+
+# --------------------------- workers ---------------------------
+
+def _signal_ready(server: uvicorn.Server, ready) -> None:
+    while not server.started and not server.should_exit:
+        time.sleep(0.05)
+    if server.started:
+        ready.set()
+
+
+def _run_worker(config: uvicorn.Config, sockets, ready) -> None:
+    config.configure_logging()
+    server = uvicorn.Server(config)
+    threading.Thread(target=_signal_ready, args=(server, ready), daemon=True).start()
+    server.run(sockets=sockets)
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, workers: int, graceful: float):
+        self.config = config
+        self.workers = workers
+        self.graceful = graceful
+        self._ctx = mp.get_context("spawn")
+        self._sockets = []
+        self._live: List = []
+        self._retiring: Dict = {}          # process -> kill deadline
+        self._reload = threading.Event()
+        self._stop = threading.Event()
+
+    def _spawn(self):
+        ready = self._ctx.Event()
+        p = self._ctx.Process(target=_run_worker, args=(self.config, self._sockets, ready))
+        p.start()
+        p.ready = ready
+        return p
+
+    def _retire(self, p) -> None:
+        if p.is_alive():
+            p.terminate()          # SIGTERM: uvicorn's graceful shutdown, then the app's
+        # connections + lifespan shutdown (job drain), plus slack for the pools
+        self._retiring[p] = time.monotonic() + 2 * self.graceful + 10
+
+    def _roll(self) -> None:
+        log.info("reloading %d worker(s)", len(self._live))
+        for i, old in enumerate(list(self._live)):
+            new = self._spawn()
+            if not new.ready.wait(READY_TIMEOUT):
+                log.error("new worker %s did not start; keeping %s", new.pid, old.pid)
+                new.kill()
+                new.join()
+                return
+            self._live[i] = new
+            self._retire(old)
+            log.info("worker %s replaced by %s", old.pid, new.pid)
+
+    def _reap(self) -> None:
+        now = time.monotonic()
+        for p, deadline in list(self._retiring.items()):
+            if not p.is_alive():
+                p.join()
+                del self._retiring[p]
+            elif now > deadline:
+                log.warning("worker %s still busy after the grace period; killing it", p.pid)
+                p.kill()
+        for i, p in enumerate(self._live):
+            if not p.is_alive() and not self._stop.is_set():
+                log.warning("worker %s exited with %s; restarting", p.pid, p.exitcode)
+                p.join()
+                self._live[i] = self._spawn()
+
+    def run(self) -> None:
+        self._sockets = [self.config.bind_socket()]
+        signal.signal(signal.SIGHUP, lambda *_: self._reload.set())
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: self._stop.set())
+        self._live = [self._spawn() for _ in range(self.workers)]
+        log.info("serving on %s:%s with %d worker(s)", self.config.host, self.config.port, self.workers)
+        while not self._stop.wait(0.5):
+            if self._reload.is_set():
+                self._reload.clear()
+                self._roll()
+            self._reap()
+        for p in self._live:
+            self._retire(p)
+        self._live = []
+        while self._retiring:
+            time.sleep(0.2)
+            self._reap()
+        for sock in self._sockets:
+            sock.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host")
+    ap.add_argument("--port", type=int)
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--cpus", type=int, default=0)
+    ap.add_argument("--log-level", default="info")
+    ap.add_argument("--print-plan", action="store_true")
+    args = ap.parse_args(argv)
+
+    S = get_settings()           # also loads .env into the environment, so it beats the plan
+    cpus = args.cpus or S.SERVE_CPUS or available_cpus()
+    env = apply(plan(S, cpus, args.workers or S.SERVE_WORKERS))
+    if args.print_plan:
+        print(json.dumps({"cpus": cpus, "env": env}, indent=2))
+        return
+    os.makedirs(os.path.abspath(S.SERVE_STATE_DIR), exist_ok=True)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(message)s")
+    config = uvicorn.Config(
+        "app:app", host=args.host or S.SERVE_HOST, port=args.port or S.SERVE_PORT,
+        log_level=args.log_level, timeout_graceful_shutdown=S.SERVE_GRACEFUL_TIMEOUT,
+    )
+    Supervisor(config, int(env["SERVE_WORKERS"]), S.SERVE_GRACEFUL_TIMEOUT).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# uploads.py
+import os
+import mmap
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+from typing import Iterable
+
+from fastapi import UploadFile, HTTPException
+from starlette.responses import PlainTextResponse
+
+CHUNK = 1024 * 1024
+
+
+class _TooLarge(HTTPException):
+    # an HTTPException so FastAPI's body parsing re-raises it instead of turning it into a 400
+    def __init__(self, max_bytes: int):
+        super().__init__(413, f"Upload exceeds {max_bytes} bytes")
+
+
+class UploadLimitMiddleware:
+    """
+    Reject request bodies over `max_bytes` on `paths` while they stream in:
+    up front from Content-Length, otherwise as soon as the running total passes
+    the limit, so an oversized upload is never fully buffered or spooled.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or self.max_bytes <= 0:
+            return await self.app(scope, receive, send)
+
+        too_large = PlainTextResponse(f"Upload exceeds {self.max_bytes} bytes", status_code=413)
+        for k, v in scope.get("headers", []):
+            if k == b"content-length" and v.isdigit() and int(v) > self.max_bytes:
+                return await too_large(scope, receive, send)
+
+        seen = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal seen
+            msg = await receive()
+            if msg["type"] == "http.request":
+                seen += len(msg.get("body", b""))
+                if seen > self.max_bytes:
+                    raise _TooLarge(self.max_bytes)
+            return msg
+
+        async def tracking_send(msg):
+            nonlocal started
+            if msg["type"] == "http.response.start":
+                started = True
+            await send(msg)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _TooLarge:
+            if not started:
+                await too_large(scope, receive, send)
+
+
+async def _copy(file: UploadFile, fh, max_bytes: int) -> int:
+    size = 0
+    while True:
+        chunk = await file.read(CHUNK)
+        if not chunk:
+            break
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise HTTPException(413, f"Upload exceeds {max_bytes} bytes")
+        fh.write(chunk)
+    fh.flush()
+    return size
+
+
+def _close(mm) -> None:
+    if mm is not None:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # a reader still holds a view; freed with it
+
+
+@asynccontextmanager
+async def spooled_upload(file: UploadFile, max_bytes: int = 0):
+    """
+    Copy an upload to a temp file in CHUNK-sized pieces and yield (data, path):
+    `data` is a read-only mmap of the file (b"" when empty), `path` its location.
+    Both are released on exit.
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    tmp = tempfile.NamedTemporaryFile(prefix="taskbench-", suffix=suffix)
+    mm = None
+    try:
+        if await _copy(file, tmp, max_bytes):
+            mm = mmap.mmap(tmp.fileno(), 0, access=mmap.ACCESS_READ)
+        yield (mm if mm is not None else b""), tmp.name
+    finally:
+        _close(mm)
+        tmp.close()
+
+
+async def spool_to_path(file: UploadFile, max_bytes: int = 0) -> str:
+    """Like spooled_upload, but the temp file outlives the request; the caller deletes it."""
+    suffix = os.path.splitext(file.filename or "")[1]
+    tmp = tempfile.NamedTemporaryFile(prefix="taskbench-job-", suffix=suffix, delete=False)
+    try:
+        with tmp:
+            await _copy(file, tmp, max_bytes)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    return tmp.name
+
+
+@contextmanager
+def mapped(path: str):
+    """Read-only mmap of a file on disk (b"" when empty), released on exit."""
+    mm = None
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mm if mm is not None else b""
+    finally:
+        _close(mm)
@@ -1,28 +1,74 @@
 import re
 GWT_LINE = re.compile(r"^(given|when|then|and)\b[:\-\s]*(.+)$", re.I)
+# GWT_LINE over many lines joined with "\n" (and a leading "\n"); \s minus
+# newlines, so a match stays on its line
+_GWT_BLOCK = re.compile(r"\n(given|when|then|and)\b(?:[:\-]|[^\S\n])*(.+)", re.I)
+_ITEM_BREAK = re.compile(r"\n\n+")
+_NEAR_NOISE = re.compile(r"[\W_]+")
 
-def normalize_ac(lines):
-    out, cur = [], []
+
+def near_key(item: str) -> str:
+    """Case, punctuation and whitespace folded away: "Given: a user, logs in." -> "given a user logs in"."""
+    return _NEAR_NOISE.sub(" ", item.lower()).strip()
+
+
+def _gwt(m) -> str:
+    # the lines are stripped already, so the rest needs no strip() of its own
+    return f"\n{m[1].title()}: {m[2]}"
+
+
+def _items(lines):
+    cur = []
     for ln in lines:
         t = ln.strip()
-        if not t:
-            if cur:
-                out.append(" ".join(cur))
-                cur=[]
-            continue
-        m = GWT_LINE.match(t)
-        if m:
-            role = m.group(1).title()
-            rest = m.group(2).strip()
-            cur.append(f"{role}: {rest}")
-        else:
-            cur.append(t)
-    if cur: out.append(" ".join(cur))
-    # de-dupe
-    seen, final = set(), []
-    for x in out:
-        k = x.lower()
-        if len(k)>3 and k not in seen:
-            final.append(x)
-            seen.add(k)
-    return final
+        if t:
+            m = GWT_LINE.match(t)
+            cur.append(f"{m[1].title()}: {m[2]}" if m else t)
+        elif cur:
+            yield " ".join(cur)
+            cur = []
+    if cur:
+        yield " ".join(cur)
+
+
+def _items_of_repeats(stripped):
+    # each distinct line is rewritten once, in one regex pass over all of them
+    uniq = list(dict.fromkeys(stripped))
+    text = "\n".join(uniq)
+    if text.count("\n") != len(uniq) - 1:
+        # a line with an embedded newline would split in two
+        return None
+    done = _GWT_BLOCK.sub(_gwt, "\n" + text).split("\n")[1:]
+    text = "\n".join(map(dict(zip(uniq, done)).__getitem__, stripped))
+    return [g.replace("\n", " ") for g in _ITEM_BREAK.split(text.strip("\n")) if g]
+
+
+def normalize_ac(lines, near_duplicates: bool = False):
+    """
+    Acceptance-criteria lines -> items: blank lines separate items, the lines
+    of one item are joined with spaces and Given/When/Then/And prefixes become
+    "Given: ...". Items of 3 characters or less and repeats (case-insensitive)
+    are dropped. With `near_duplicates`, items that differ only in
+    punctuation or spacing count as repeats too.
+
+    Generated test plans repeat the same steps over and over; when at least
+    half the lines are repeats each distinct line is normalized only once.
+    """
+    lines = list(lines)
+    items = None
+    if len(set(lines)) * 2 <= len(lines):
+        items = _items_of_repeats(list(map(str.strip, lines)))
+    if items is None:
+        items = _items(lines)
+
+    seen = set()
+    out = []
+    for item in items:
+        k = item.lower()
+        if len(k) > 3:
+            if near_duplicates:
+                k = near_key(k)
+            if k not in seen:
+                seen.add(k)
+                out.append(item)
+    return out
@@ -8,13 +8,74 @@ RE_POINTS = re.compile(r"^(story points|sp|points)\s*:\s*([\d\.]+)$", re.I)
 RE_EPIC = re.compile(r"^(epic|epic link)\s*:\s*(.+)$", re.I)
 RE_USER_STORY = re.compile(r"^(as\s+an?|as\s+the).+", re.I)
 RE_ACCEPTANCE = re.compile(r"^(acceptance criteria|ac|criteria)\s*:\s*$", re.I)
+RE_AC_HEADING = re.compile(r"^(acceptance criteria|ac|criteria)\s*:?\s*$", re.I)
+RE_HEADING = re.compile(r"^(#{1,6})\s+(.+)$")
+RE_BULLET = re.compile(r"^[-*\u2022]\s+")
+RE_TABLE_ROW = re.compile(r"^\|(.*)\|$")
+RE_TABLE_RULE = re.compile(r"^[\s|:\-]+$")
+
+def table_cells(line: str):
+    """Non-empty cells of a "| a | b |" row; [] for a "|---|---|" rule."""
+    if RE_TABLE_RULE.match(line):
+        return []
+    return [c.strip() for c in line.strip()[1:-1].split("|") if c.strip()]
 
 RE_POINTS_INLINE = re.compile(r"\b(\d+(?:\.\d+)?)\s*(story\s*points?|points?)\b", re.I)
 RE_PRIORITY_INLINE = re.compile(r"\b(p0|p1|p2|p3|sev[1-4]|critical|high|medium|low)\b", re.I)
 RE_HASHTAG = re.compile(r"(?:^|\s)#([a-z0-9_\-]+)")
 
+# ---- single-pass dispatch for parse_text ----
+# Anchored field rules in the order parse_text applies them, each with the
+# characters its keyword can start with. Lines are routed by their first
+# character, so most lines never get lowercased or regex-matched at all.
+FIELD_RULES = (
+    ("acceptance", RE_ACCEPTANCE, "ac"),
+    ("title", RE_TITLE, "ts"),
+    ("labels", RE_LABELS, "l"),
+    ("components", RE_COMPONENTS, "c"),
+    ("priority", RE_PRIORITY, "p"),
+    ("points", RE_POINTS, "sp"),
+    ("epic", RE_EPIC, "e"),
+    ("user_story", RE_USER_STORY, "a"),
+)
+
+def _build_dispatch():
+    table = {}
+    for kind, rx, firsts in FIELD_RULES:
+        for ch in firsts:
+            # re.I also lets "s" match U+017F (long s); no other char lowercases into a key
+            keys = {ch, ch.upper()} | ({"\u017f"} if ch == "s" else set())
+            for k in keys:
+                table.setdefault(k, []).append((kind, rx))
+    return {k: tuple(v) for k, v in table.items()}
+
+LINE_DISPATCH = _build_dispatch()
+
+def match_field(line: str, in_ac: bool = False, have_title: bool = False):
+    """
+    First anchored rule matching the stripped `line`, as (kind, match) or (None, None).
+    Same precedence as trying every RE_* in turn on line.lower():
+    - in_ac: only the acceptance header is looked for
+    - have_title: the title rule is skipped
+    """
+    rules = LINE_DISPATCH.get(line[:1])
+    if not rules:
+        return None, None
+    low = line.lower()
+    for kind, rx in rules:
+        if in_ac and kind != "acceptance":
+            break
+        if have_title and kind == "title":
+            continue
+        m = rx.match(low)
+        if m:
+            return kind, m
+    return None, None
+
 def comma_words(val: str):
     return [x.strip() for x in val.split(",") if x.strip()]
 
 def find_hashtags(line: str):
+    if "#" not in line:
+        return []
     return [m.group(1).lower() for m in RE_HASHTAG.finditer(line)]
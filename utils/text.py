@@ -11,3 +11,31 @@ def clamp_text(s: str, max_chars: int) -> str:
 
 def split_lines(s: str):
     return [ln.rstrip() for ln in s.splitlines()]
+
+def iter_lines(chunks):
+    """
+    Same lines as split_lines("\n".join(chunks).strip()), produced chunk by chunk
+    so the joined text is never built. Blank lines are held back until a
+    non-blank one follows, which drops the trailing ones like strip() would.
+    """
+    carry, sep, blanks, started = "", "", 0, False
+    for chunk in chunks:
+        lines = (carry + sep + chunk).splitlines(keepends=True)
+        sep = "\n"
+        # an unterminated last line, or one ending in a lone "\r" (which the next
+        # separator turns into "\r\n"), continues into the next chunk
+        carry = lines.pop() if lines and (lines[-1][-1] not in "\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029") else ""
+        for ln in lines:
+            ln = ln.rstrip()
+            if not ln:
+                blanks += started
+                continue
+            for _ in range(blanks):
+                yield ""
+            yield ln if started else ln.lstrip()
+            blanks, started = 0, True
+    carry = carry.rstrip()
+    if carry:
+        for _ in range(blanks):
+            yield ""
+        yield carry if started else carry.lstrip()